@@ -25,7 +25,8 @@ from Furious.Library import *
 from Furious.Utility import *
 from Furious.Core import *
 
-import uuid
+from typing import Tuple
+
 import logging
 import functools
 import subprocess
@@ -54,9 +55,9 @@ def fixLogObjectPath(config: ConfigurationFactory, attr: str, value: str, log=Tr
         config['log'][attr] = path = ''
 
     if path == '':
-        if isPythonw() and StdoutRedirectHelper.TemporaryDir.isValid():
+        if isPythonw() and value:
             # Redirect implementation for pythonw environment
-            config['log'][attr] = StdoutRedirectHelper.TemporaryDir.filePath(value)
+            config['log'][attr] = value
     else:
         # Relative path fails if booting on start up
         # on Windows, when packed using nuitka...
@@ -108,6 +109,15 @@ class CoreManager(SupportExitCleanup):
         else:
             copy = config
 
+        if isinstance(copy, ConfigurationFactory):
+            # Core is ready once its inbounds accept connections
+            kwargs.setdefault(
+                'readyEndpoints',
+                list(
+                    filter(None, [copy.httpProxyEndpoint(), copy.socksProxyEndpoint()])
+                ),
+            )
+
         if isinstance(copy, ConfigurationXray):
             if copy.get('log') is None or not isinstance(copy['log'], dict):
                 copy['log'] = {
@@ -116,7 +126,17 @@ class CoreManager(SupportExitCleanup):
                     'loglevel': 'warning',
                 }
 
-            logRedirectValue = str(uuid.uuid4())
+            if isPythonw():
+                # Shared by access and error log. Released with the core
+                logRedirectValue = CoreLogFiles.acquire(f'{XrayCore.name()}-log')
+
+                kwargs['logFiles'] = list(filter(None, [logRedirectValue]))
+
+                if not XrayCore.canRedirect():
+                    # Not followed in the core process either
+                    kwargs['unfollowedLogFiles'] = kwargs['logFiles']
+            else:
+                logRedirectValue = ''
 
             # Fix logObject
             for attr in ['access', 'error']:
@@ -212,6 +232,9 @@ class CoreManager(SupportExitCleanup):
             else:
                 routingObject = {}
 
+            # Proxied traffic of a balancer group goes to its balancer
+            routingObject = applyXrayBalancerRouting(copy, routingObject)
+
             if log:
                 logger.info(f'core {XrayCore.name()} configured')
                 logger.info(f'routing is {routing}')
@@ -335,24 +358,33 @@ class CoreManager(SupportExitCleanup):
                 ):
                     return False
 
-                address = copy.itemAddress
-
-                if not isValidIPAddress(address):
-                    error, resolved = DNSResolver.resolve(
-                        address, *parseHostPort(copy.httpProxyEndpoint())
+                if isinstance(copy, ConfigurationXray):
+                    # Every member of a balancer group goes around the TUN
+                    addresses = list(
+                        member.itemAddress for member in copy.balancerMembers()
                     )
+                else:
+                    addresses = [copy.itemAddress]
 
-                    if error:
-                        logger.error(f'DNS resolution failed: {address}')
+                for address in addresses:
+                    if not isValidIPAddress(address):
+                        error, resolved = DNSResolver.resolve(
+                            address, *parseHostPort(copy.httpProxyEndpoint())
+                        )
 
-                        SystemRoutingTable.Relations.clear()
+                        if error:
+                            logger.error(f'DNS resolution failed: {address}')
 
-                        return False
+                            SystemRoutingTable.Relations.clear()
+
+                            return False
+                        else:
+                            for resolvedAddress in resolved:
+                                SystemRoutingTable.Relations.append(
+                                    [resolvedAddress, gateway]
+                                )
                     else:
-                        for address in resolved:
-                            SystemRoutingTable.Relations.append([address, gateway])
-                else:
-                    SystemRoutingTable.Relations.append([address, gateway])
+                        SystemRoutingTable.Relations.append([address, gateway])
 
                 if PLATFORM == 'Windows':
                     foundDevice = False
@@ -456,6 +488,31 @@ class CoreManager(SupportExitCleanup):
     def anyRunning(self) -> bool:
         return any(core.isRunning() for core in self.coresPool)
 
+    def msgStats(self, tun=False) -> Tuple[int, int, int]:
+        """
+        :param tun: Stats of Tun2socks instead of the proxy cores
+        :return: (pending log chunks, lines consumed, lines dropped).
+                 Pending is -1 if unknown on this platform
+        """
+
+        depth, consumed, dropped = 0, 0, 0
+
+        for core in self.coresPool:
+            if not isinstance(core, CoreProcess) or isinstance(core, Tun2socks) != tun:
+                continue
+
+            coreDepth = core.msgQueueDepth()
+
+            if coreDepth < 0 or depth < 0:
+                depth = -1
+            else:
+                depth += coreDepth
+
+            consumed += core.msgConsumedCount()
+            dropped += core.msgDroppedCount()
+
+        return depth, consumed, dropped
+
     def stopAll(self):
         if self.coresPool:
             for core in self.coresPool:
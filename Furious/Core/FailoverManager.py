@@ -0,0 +1,343 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.Interface import *
+from Furious.PyFramework import *
+from Furious.QtFramework import *
+from Furious.Utility import *
+from Furious.Core.CoreManager import *
+
+from PySide6 import QtCore
+
+from typing import Tuple, Union
+
+import logging
+
+__all__ = ['FailoverManager']
+
+logger = logging.getLogger(__name__)
+
+registerAppSettings('Failover', isBinary=True)
+registerAppSettings('FailoverProbeFailures', default='3')
+
+
+class FailoverManager:
+    """
+    Keeps a standby core for the next-best server on alternate local
+    ports, ready to take over from the active one
+    """
+
+    # Delay before starting a new standby after the last one failed, in milliseconds
+    STANDBY_RETRY_DELAY = 5000
+    # Maximum time for a standby core to accept connections, in milliseconds
+    STANDBY_WAIT_TIME = 10000
+
+    def __init__(self):
+        # Standby core and the server it serves
+        self.coreManager = None
+        self.factory = None
+        self.httpProxyEndpoint = ''
+        self.activeFactory = None
+        # id of servers failed during this connection
+        self.excluded = set()
+        # Standby core found accepting connections
+        self.standbyAccepting = False
+
+        self.retryTimer = QtCore.QTimer()
+        self.retryTimer.setSingleShot(True)
+        self.retryTimer.timeout.connect(lambda: self.startStandby(self.activeFactory))
+
+        self.readyTimer = QtCore.QTimer()
+        self.readyTimer.setSingleShot(True)
+        self.readyTimer.timeout.connect(lambda: self.checkStandbyReady())
+        self.readyInterval = CoreProcess.READY_CHECK_INTERVAL
+        self.readyElapsedTimer = QtCore.QElapsedTimer()
+        self.readyProbe = EndpointProbe()
+        self.readyProbe.finished.connect(
+            lambda accepting: self.handleStandbyProbed(accepting)
+        )
+
+    @staticmethod
+    def isEnabled() -> bool:
+        # Only the system proxy can be flipped over
+        return (
+            AppSettings.isStateON_('Failover')
+            and AppSettings.get('SystemProxyMode') == 'Auto'
+            and not isVPNMode()
+        )
+
+    @staticmethod
+    def probeFailuresThreshold() -> int:
+        try:
+            return max(int(AppSettings.get('FailoverProbeFailures')), 1)
+        except Exception:
+            # Any non-exit exceptions
+
+            return 3
+
+    @staticmethod
+    def rankKey(factory: ConfigurationFactory) -> Union[Tuple[int, float], None]:
+        """
+        :return: Sort key from the latest test results. None if untested or failed
+        """
+
+        stats = factory.getExtras('urlTestStats')
+
+        if isinstance(stats, dict) and stats.get('ttfb') is not None:
+            return 0, float(stats['ttfb'])
+
+        stats = factory.getExtras('delayStats')
+
+        if isinstance(stats, dict) and stats.get('avg') is not None:
+            return 1, float(stats['avg'])
+
+        return None
+
+    @staticmethod
+    def portsInUse(*factories: ConfigurationFactory) -> set:
+        """
+        :return: Local ports that must not be handed out: those of running
+                 tests, and the configured ones of factories. They may not
+                 be bound yet
+        """
+
+        ports = APP().mainWindow.userServersQTableWidget.localPortsInUse()
+
+        for factory in factories:
+            for endpoint in [factory.httpProxyEndpoint(), factory.socksProxyEndpoint()]:
+                parsed = parseLocalEndpoint(endpoint)
+
+                if parsed is not None:
+                    ports.add(parsed[1])
+
+        return ports
+
+    @staticmethod
+    def remapLocalEndpoints(factory: ConfigurationFactory, exclude=()) -> str:
+        """
+        Moves the local inbounds of factory to free ports, so that its
+        core can run next to the one using the configured ports
+
+        :param exclude: Ports not to use, see portsInUse
+        :return: The new http proxy endpoint, or empty string on failure
+        """
+
+        try:
+            httpPort = getFreeLocalPort(exclude)
+            socksPort = getFreeLocalPort({*exclude, httpPort})
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot allocate local ports: {ex}')
+
+            return ''
+
+        httpProxyEndpoint = f'127.0.0.1:{httpPort}'
+
+        if not factory.setHttpProxyEndpoint(httpProxyEndpoint):
+            return ''
+
+        if factory.socksProxyEndpoint():
+            factory.setSocksProxyEndpoint(f'127.0.0.1:{socksPort}')
+
+        return httpProxyEndpoint
+
+    def candidates(self, activeFactory: ConfigurationFactory):
+        """
+        Yields servers with test results, best first. Ranking only reads
+        the results, so lazily restored servers are loaded on validation
+        only once they are next in line
+        """
+
+        ranked = []
+
+        for factory in AS_UserServers():
+            if factory is activeFactory or id(factory) in self.excluded:
+                continue
+
+            key = self.rankKey(factory)
+
+            if key is not None:
+                ranked.append((key, factory))
+
+        ranked.sort(key=lambda item: item[0])
+
+        for key, factory in ranked:
+            if factory.isValid():
+                yield factory
+
+    def reset(self):
+        self.stopStandby()
+        self.excluded.clear()
+        self.activeFactory = None
+
+    def exclude(self, factory: ConfigurationFactory):
+        if factory is not None:
+            self.excluded.add(id(factory))
+
+    def startStandby(self, activeFactory: ConfigurationFactory) -> bool:
+        """
+        Starts a standby core for the best ranked server. Does not block
+        """
+
+        self.stopStandby()
+
+        self.activeFactory = activeFactory
+
+        if not self.isEnabled() or activeFactory is None:
+            return False
+
+        for factory in self.candidates(activeFactory):
+            copy = factory.deepcopy()
+
+            httpProxyEndpoint = self.remapLocalEndpoints(
+                copy, self.portsInUse(activeFactory, factory)
+            )
+
+            if not httpProxyEndpoint:
+                self.exclude(factory)
+
+                continue
+
+            coreManager = CoreManager()
+
+            def exitCallback(core, exitcode, coreManager=coreManager):
+                self.handleExit(coreManager, core, exitcode)
+
+            def msgCallback(line, coreManager=coreManager):
+                if coreManager is not self.coreManager:
+                    # Taken over. Logs like the active core
+                    APP().systemTray.ConnectAction.coreMsgCallback(line)
+
+            if coreManager.start(
+                copy,
+                AppSettings.get('Routing'),
+                exitCallback,
+                msgCallback=msgCallback,
+                deepcopy=False,
+                proxyModeOnly=True,
+                log=False,
+                waitCore=False,
+            ):
+                logger.info(
+                    f'standby core serves \'{factory.getExtras("remark")}\' '
+                    f'on {httpProxyEndpoint}'
+                )
+
+                self.coreManager = coreManager
+                self.factory = factory
+                self.httpProxyEndpoint = httpProxyEndpoint
+
+                self.readyInterval = CoreProcess.READY_CHECK_INTERVAL
+                self.readyElapsedTimer.start()
+                self.readyTimer.start(self.readyInterval)
+
+                return True
+            else:
+                coreManager.stopAll()
+
+                self.exclude(factory)
+
+        logger.info('no server available for standby core')
+
+        return False
+
+    def stopStandby(self):
+        self.retryTimer.stop()
+        self.readyTimer.stop()
+        self.readyProbe.abort()
+
+        if self.coreManager is not None:
+            self.coreManager.stopAll()
+
+        self.coreManager = None
+        self.factory = None
+        self.httpProxyEndpoint = ''
+        self.standbyAccepting = False
+
+    def checkStandbyReady(self):
+        if self.coreManager is None or not self.coreManager.allRunning():
+            # Exits are handled by the exit callback
+            return
+
+        endpoint = parseLocalEndpoint(self.httpProxyEndpoint)
+
+        if endpoint is None:
+            return
+
+        # Result handled once the connect is done
+        self.readyProbe.probe([endpoint])
+
+    def handleStandbyProbed(self, accepting: bool):
+        if self.coreManager is None:
+            return
+
+        if accepting:
+            self.standbyAccepting = True
+
+            logger.info(f'standby core ready on {self.httpProxyEndpoint}')
+        elif self.readyElapsedTimer.elapsed() >= self.STANDBY_WAIT_TIME:
+            logger.warning(
+                f'standby core not accepting on {self.httpProxyEndpoint} '
+                f'after {self.STANDBY_WAIT_TIME}ms'
+            )
+        else:
+            self.readyInterval = min(
+                self.readyInterval * 2, CoreProcess.READY_CHECK_MAX_INTERVAL
+            )
+            self.readyTimer.start(self.readyInterval)
+
+    def isStandbyReady(self) -> bool:
+        if self.coreManager is None or not self.coreManager.allRunning():
+            return False
+
+        # Probed in the background once started
+        return self.standbyAccepting
+
+    def takeOver(self) -> Union[Tuple[CoreManager, ConfigurationFactory, str], None]:
+        """
+        Hands the standby core over to the caller, which stops it later
+
+        :return: (core manager, server, http proxy endpoint), or None if not ready
+        """
+
+        if not self.isStandbyReady():
+            return None
+
+        result = self.coreManager, self.factory, self.httpProxyEndpoint
+
+        # No longer the standby
+        self.coreManager = None
+        self.factory = None
+        self.httpProxyEndpoint = ''
+        self.standbyAccepting = False
+
+        return result
+
+    def handleExit(self, coreManager: CoreManager, core, exitcode: int):
+        if coreManager is self.coreManager:
+            logger.error(f'standby core {core.name()} exited with exitcode {exitcode}')
+
+            self.exclude(self.factory)
+            self.stopStandby()
+
+            self.retryTimer.start(self.STANDBY_RETRY_DELAY)
+        else:
+            # Taken over. It is the active core now
+            APP().systemTray.ConnectAction.coreExitCallback(core, exitcode)
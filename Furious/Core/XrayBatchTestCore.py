@@ -0,0 +1,110 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.Interface import *
+from Furious.Library import *
+from Furious.Utility import *
+from Furious.Core.CoreManager import *
+
+from PySide6 import QtCore
+
+import logging
+
+__all__ = ['XrayBatchTestCore']
+
+logger = logging.getLogger(__name__)
+
+
+class XrayBatchTestCore:
+    """
+    One Xray-core process serving a whole test sweep. Each server
+    gets its own local http port, routed to its own outbound
+    """
+
+    # Maximum time for the core to start up, in milliseconds
+    CORE_WARM_UP_TIME = 2500
+
+    def __init__(self, factories: list[ConfigurationXray], exclude=()):
+        self.coreManager = CoreManager()
+        self.elapsedTimer = QtCore.QElapsedTimer()
+        self.ports = {}
+        self.users = 0
+
+        for factory in factories:
+            self.ports[id(factory)] = getFreeLocalPort(
+                set(exclude) | set(self.ports.values())
+            )
+
+        self.factories = factories
+
+    def portOf(self, factory: ConfigurationFactory) -> int:
+        return self.ports.get(id(factory), -1)
+
+    def allPorts(self) -> list[int]:
+        return list(self.ports.values())
+
+    def start(self, exitCallback=None, msgCallback=None) -> bool:
+        config = constructXrayBatchTestConfig(
+            list((factory, self.portOf(factory)) for factory in self.factories)
+        )
+
+        logger.info(
+            f'batch test core serves {len(self.factories)} servers '
+            f'on ports {self.allPorts()}'
+        )
+
+        self.elapsedTimer.start()
+
+        # Do not block. Users wait for their own port to accept
+        return self.coreManager.start(
+            config,
+            'Custom',
+            exitCallback,
+            msgCallback=msgCallback,
+            deepcopy=False,
+            proxyModeOnly=True,
+            log=False,
+            waitCore=False,
+        )
+
+    def remainingWarmUpTime(self) -> int:
+        if not self.elapsedTimer.isValid():
+            return self.CORE_WARM_UP_TIME
+
+        return max(self.CORE_WARM_UP_TIME - self.elapsedTimer.elapsed(), 0)
+
+    def isRunning(self) -> bool:
+        return self.coreManager.allRunning()
+
+    def release(self) -> bool:
+        """
+        :return: True if the core is stopped since no one uses it
+        """
+
+        self.users -= 1
+
+        if self.users <= 0:
+            self.stop()
+
+            return True
+        else:
+            return False
+
+    def stop(self):
+        self.coreManager.stopAll()
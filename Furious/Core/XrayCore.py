@@ -88,20 +88,7 @@ def startXrayCore(jsonString: str, msgQueue: multiprocessing.Queue):
                             fileStreams.append(stream)
 
                 def produceMsg():
-                    while True:
-                        for file in fileStreams:
-                            for line in iter(file.readline, b''):
-                                if line and not line.isspace():
-                                    try:
-                                        msgQueue.put_nowait(
-                                            line.decode('utf-8', 'replace')
-                                        )
-                                    except Exception:
-                                        # Any non-exit exceptions
-
-                                        pass
-
-                        time.sleep(CoreProcess.MSG_PRODUCE_THRESHOLD / 1000)
+                    StdoutRedirectHelper.produceMsg(msgQueue, fileStreams)
 
                 try:
                     if fileStreams:
@@ -142,6 +129,12 @@ class XrayCore(CoreProcess):
 
             return '0.0.0'
 
+    @staticmethod
+    def canRedirect() -> bool:
+        # Output of older versions cannot be redirected, and their
+        # log files are not followed under pythonw
+        return versionToValue(XrayCore.version()) > versionToValue('1.8.4')
+
     def startFromArgs(self, jsonString: str, **kwargs) -> bool:
         self.registerCurrentJSONConfig(jsonString)
 
@@ -20,3 +20,5 @@ from .Hysteria1 import *
 from .Hysteria2 import *
 from .Tun2socks import *
 from .CoreManager import *
+from .XrayBatchTestCore import *
+from .FailoverManager import *
@@ -26,8 +26,33 @@ from typing import Union
 
 import copy
 import ujson
+import hashlib
+import functools
 
-__all__ = ['ConfigurationFactory']
+__all__ = ['ConfigurationFactory', 'lazyItemColumn']
+
+
+def lazyItemColumn(fn):
+    """
+    Decorator for table item columns derived from the configuration. Items
+    that are not materialized yet answer from their cached display columns
+    """
+
+    @functools.wraps(fn)
+    def wrapper(self: ConfigurationFactory) -> str:
+        if self.lazyConfig is None:
+            return fn(self)
+
+        if fn.__name__ not in self.lazyColumns:
+            # Stored before the column was cached. Materialized by fn,
+            # and written back with all columns on the next sync
+            self.modified = True
+
+            return fn(self)
+
+        return self.lazyColumns[fn.__name__]
+
+    return wrapper
 
 
 class ConfigurationFactory(UserServersTableItem, dict, ABC):
@@ -37,8 +62,24 @@ class ConfigurationFactory(UserServersTableItem, dict, ABC):
     It subclasses from dict and can be constructed from:
       1. dictionary -- from existing JSON object
       2. string -- from URI or (valid) JSON string
+
+    Items restored from storage may be lazy: they keep the raw stored
+    string and are materialized on first access to the configuration
     """
 
+    # Config-derived columns cached in storage for lazy items
+    LazyColumns = [
+        'itemProtocol',
+        'itemAddress',
+        'itemPort',
+        'itemTransport',
+        'itemTLS',
+        'itemCredential',
+    ]
+
+    # Class level default. Unpickling sets items before instance state
+    lazyConfig = None
+
     def __init__(self, config: Union[str, dict] = '', **kwargs):
         """
         Constructs a ConfigurationFactory. The constructor
@@ -50,6 +91,14 @@ class ConfigurationFactory(UserServersTableItem, dict, ABC):
         # Extra attributes
         self.kwargs = kwargs
 
+        # Whether this item has changes not yet written to storage
+        self.modified = True
+
+        # Raw stored config and cached display columns of a lazy item.
+        # lazyConfig is None once the item is materialized
+        self.lazyConfig = None
+        self.lazyColumns = {}
+
         if isinstance(config, str):
             try:
                 jsonObject = ujson.loads(config)
@@ -69,21 +118,168 @@ class ConfigurationFactory(UserServersTableItem, dict, ABC):
         else:
             super().__init__()
 
+    @classmethod
+    def fromStorage(cls, config: str, columns: dict, **kwargs):
+        """
+        Constructs a lazy item from its stored config string and
+        cached display columns. The config is not parsed here
+
+        :param config: The stored configuration JSON string
+        :param columns: Cached display columns
+        """
+
+        factory = cls({}, **kwargs)
+        factory.lazyConfig = config
+        factory.lazyColumns = columns
+
+        return factory
+
+    def isLazy(self) -> bool:
+        return self.lazyConfig is not None
+
+    def materialize(self):
+        if self.lazyConfig is None:
+            return
+
+        config, self.lazyConfig, self.lazyColumns = self.lazyConfig, None, {}
+
+        try:
+            super().update(ujson.loads(config))
+        except Exception:
+            # Any non-exit exceptions
+
+            pass
+
+    def itemColumns(self) -> dict:
+        return dict((name, getattr(self, name)) for name in self.LazyColumns)
+
     def __getitem__(self, item: str):
         if not isinstance(item, str):
             raise TypeError(f'Bad type {type(item)} for __getitem__ call')
 
+        self.materialize()
+
         return super().__getitem__(item)
 
     def __setitem__(self, item: str, value):
         if not isinstance(item, str):
             raise TypeError(f'Bad type {type(item)} for __setitem__ call')
 
+        self.materialize()
+
         return super().__setitem__(item, value)
 
+    def __delitem__(self, item: str):
+        self.materialize()
+
+        return super().__delitem__(item)
+
+    def __contains__(self, item) -> bool:
+        self.materialize()
+
+        return super().__contains__(item)
+
+    def __iter__(self):
+        self.materialize()
+
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self.materialize()
+
+        return super().__len__()
+
+    def __eq__(self, other) -> bool:
+        self.materialize()
+
+        if isinstance(other, ConfigurationFactory):
+            other.materialize()
+
+        return super().__eq__(other)
+
+    def __ne__(self, other) -> bool:
+        result = self.__eq__(other)
+
+        if result is NotImplemented:
+            return result
+
+        return not result
+
+    def sameConfig(self, other: ConfigurationFactory) -> bool:
+        """
+        Compares configurations. Lazy items are compared on their stored
+        config and stay lazy
+
+        :param other: The configuration to compare with
+        :return: True if both configurations are equal
+        """
+
+        other.materialize()
+
+        if self.lazyConfig is None:
+            return dict.__eq__(self, other)
+
+        try:
+            return dict.__eq__(ujson.loads(self.lazyConfig), other)
+        except Exception:
+            # Any non-exit exceptions
+
+            return self == other
+
+    def get(self, *args, **kwargs):
+        self.materialize()
+
+        return super().get(*args, **kwargs)
+
+    def pop(self, *args, **kwargs):
+        self.materialize()
+
+        return super().pop(*args, **kwargs)
+
+    def setdefault(self, *args, **kwargs):
+        self.materialize()
+
+        return super().setdefault(*args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        self.materialize()
+
+        return super().update(*args, **kwargs)
+
+    def keys(self):
+        self.materialize()
+
+        return super().keys()
+
+    def values(self):
+        self.materialize()
+
+        return super().values()
+
+    def items(self):
+        self.materialize()
+
+        return super().items()
+
     def deepcopy(self) -> ConfigurationFactory:
+        self.materialize()
+
         return copy.deepcopy(self)
 
+    def replaceConfig(self, config: dict):
+        """
+        Replaces the configuration in place. Extras are kept
+
+        :param config: The new configuration
+        """
+
+        self.lazyConfig, self.lazyColumns = None, {}
+
+        dict.clear(self)
+        dict.update(self, config)
+
+        self.modified = True
+
     def coreName(self) -> str:
         return 'Unknown'
 
@@ -95,6 +291,13 @@ class ConfigurationFactory(UserServersTableItem, dict, ABC):
 
     def setExtras(self, item, value):
         self.kwargs[item] = value
+        self.modified = True
+
+    def isModified(self) -> bool:
+        return self.modified
+
+    def setModified(self, modified: bool):
+        self.modified = modified
 
     @property
     def itemRemark(self) -> str:
@@ -125,6 +328,31 @@ class ConfigurationFactory(UserServersTableItem, dict, ABC):
     def itemSpeed(self) -> str:
         return self.getExtras('speedResult')
 
+    @property
+    @lazyItemColumn
+    def itemCredential(self) -> str:
+        return ''
+
+    def identity(self) -> str:
+        """
+        Stable identity of the server this configuration points to.
+        Remark and other tunables do not take part in it
+
+        :return: Identity string
+        """
+
+        return hashlib.sha256(
+            '\0'.join(
+                [
+                    self.coreName(),
+                    self.itemProtocol,
+                    self.itemAddress,
+                    self.itemPort,
+                    self.itemCredential,
+                ]
+            ).encode()
+        ).hexdigest()
+
     def toJSONString(self, **kwargs) -> str:
         """
         Converts self to a JSON string
@@ -133,6 +361,9 @@ class ConfigurationFactory(UserServersTableItem, dict, ABC):
         :return: JSON string
         """
 
+        # Encoder reads the underlying dict directly
+        self.materialize()
+
         try:
             ensure_ascii = kwargs.pop('ensure_ascii', False)
             escape_forward_slashes = kwargs.pop('escape_forward_slashes', False)
@@ -156,6 +387,10 @@ class ConfigurationFactory(UserServersTableItem, dict, ABC):
             # compatibility: remark field is mandatory in previous application version
             self.kwargs['remark'] = ''
 
+        if self.lazyConfig is not None:
+            # Unchanged since restored. No need to parse
+            return {'config': self.lazyConfig, **self.kwargs}
+
         # self.toJSONString() is used to maintain backward compatibility
         return {'config': self.toJSONString(), **self.kwargs}
 
@@ -0,0 +1,139 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import re
+import math
+import time
+import collections
+
+__all__ = ['AccessLogStats']
+
+
+class AccessLogStats:
+    """
+    Streaming aggregation of Xray-core access log lines. Only counters
+    are kept, never the lines themselves
+    """
+
+    # 2024/01/01 00:00:00 from 127.0.0.1:1234 accepted tcp:example.com:443 [http -> proxy]
+    Pattern = re.compile(
+        r'\bfrom (?:tcp:|udp:)?(\S+) accepted (tcp|udp):(\S+):(\d+) '
+        r'\[(?:(\S+) (?:->|>>) )?([^\]\s]+)\]'
+    )
+
+    # Maximum number of destinations kept
+    MAX_DESTINATIONS = 4096
+    # Time constant of the connection rate, in seconds
+    RATE_TIME_CONSTANT = 60
+
+    def __init__(self):
+        # destination: record
+        self.destinations = {}
+        # outbound tag: count
+        self.outbounds = collections.Counter()
+        self.total = 0
+
+    def clear(self):
+        self.destinations.clear()
+        self.outbounds.clear()
+        self.total = 0
+
+    def feed(self, text: str) -> int:
+        """
+        :param text: One or more log lines. Lines not in access log format are ignored
+        :return: Number of access log lines counted
+        """
+
+        counted = 0
+
+        for match in self.Pattern.finditer(text):
+            host, outbound = match.group(3, 6)
+
+            self.add(host, outbound, time.monotonic())
+
+            counted += 1
+
+        return counted
+
+    def add(self, host: str, outbound: str, timestamp: float):
+        record = self.destinations.get(host)
+
+        if record is None:
+            if len(self.destinations) >= self.MAX_DESTINATIONS:
+                self.prune()
+
+            record = self.destinations[host] = {
+                'count': 0,
+                'outbounds': collections.Counter(),
+                'rate': 0.0,
+                'lastSeen': timestamp,
+            }
+
+        # Exponentially decayed count. Divided by the time
+        # constant it is the recent connection rate
+        record['rate'] = (
+            record['rate']
+            * math.exp(-(timestamp - record['lastSeen']) / self.RATE_TIME_CONSTANT)
+            + 1
+        )
+        record['count'] += 1
+        record['outbounds'][outbound] += 1
+        record['lastSeen'] = timestamp
+
+        self.outbounds[outbound] += 1
+        self.total += 1
+
+    def prune(self):
+        # Forget the least recently seen half
+        hosts = sorted(
+            self.destinations, key=lambda host: self.destinations[host]['lastSeen']
+        )
+
+        for host in hosts[: len(hosts) // 2]:
+            del self.destinations[host]
+
+    def ratePerMinute(self, record: dict, now: float) -> float:
+        decay = math.exp(-(now - record['lastSeen']) / self.RATE_TIME_CONSTANT)
+
+        return record['rate'] * decay * 60 / self.RATE_TIME_CONSTANT
+
+    def top(self, count: int, byRate=False) -> list[dict]:
+        """
+        :return: Up to count destinations, busiest first. Each one is
+                 {host, count, rate, outbounds}, rate in connections per minute
+        """
+
+        now = time.monotonic()
+
+        rows = list(
+            {
+                'host': host,
+                'count': record['count'],
+                'rate': self.ratePerMinute(record, now),
+                'outbounds': dict(record['outbounds']),
+            }
+            for host, record in self.destinations.items()
+        )
+
+        if byRate:
+            rows.sort(key=lambda row: row['rate'], reverse=True)
+        else:
+            rows.sort(key=lambda row: row['count'], reverse=True)
+
+        return rows[:count]
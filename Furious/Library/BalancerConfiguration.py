@@ -0,0 +1,189 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.Interface import *
+from Furious.Library.Configuration import *
+
+import copy
+
+__all__ = [
+    'isXrayBalancerConfig',
+    'isXrayBalancerMember',
+    'constructXrayBalancerConfig',
+    'applyXrayBalancerRouting',
+]
+
+# Outbound tags are proxy, proxy-1, proxy-2... so that the
+# prefix selects all of them, and rules to 'proxy' keep working
+BALANCER_SELECTOR = 'proxy'
+BALANCER_TAG = 'balancer'
+
+
+def isXrayBalancerConfig(factory: ConfigurationFactory) -> bool:
+    if not isinstance(factory, ConfigurationXray):
+        return False
+
+    try:
+        return any(
+            balancer.get('tag') == BALANCER_TAG
+            for balancer in factory['routing']['balancers']
+        )
+    except Exception:
+        # Any non-exit exceptions
+
+        return False
+
+
+def isXrayBalancerMember(factory: ConfigurationFactory) -> bool:
+    """
+    Whether factory can be combined into a balancer group
+    """
+
+    if not isinstance(factory, ConfigurationXray) or not factory.isValid():
+        return False
+
+    if isXrayBalancerConfig(factory):
+        return False
+
+    outboundObject = factory.proxyOutboundObject
+
+    # Chained outbounds refer to other tags. Leave them out
+    return bool(outboundObject) and outboundObject.get('proxySettings') is None
+
+
+def constructXrayBalancerConfig(
+    factories: list[ConfigurationXray], probeURL: str, **kwargs
+) -> ConfigurationXray:
+    """
+    Builds one Xray-core configuration spreading traffic across many
+    servers. Dead servers are skipped based on burst observatory probes
+
+    :param factories: Servers in the group. Inbounds are taken from the first one
+    :param probeURL: URL used for health checking
+    :return: The configuration
+    """
+
+    assert len(factories) > 0
+
+    outbounds = []
+
+    for index, factory in enumerate(factories):
+        outboundObject = copy.deepcopy(factory.proxyOutboundObject)
+
+        if index == 0:
+            outboundObject['tag'] = BALANCER_SELECTOR
+        else:
+            outboundObject['tag'] = f'{BALANCER_SELECTOR}-{index}'
+
+        outbounds.append(outboundObject)
+
+    outbounds.extend(
+        [
+            {
+                'tag': 'direct',
+                'protocol': 'freedom',
+                'settings': {},
+            },
+            {
+                'tag': 'block',
+                'protocol': 'blackhole',
+                'settings': {
+                    'response': {
+                        'type': 'http',
+                    }
+                },
+            },
+        ]
+    )
+
+    return ConfigurationXray(
+        {
+            'log': {
+                'access': '',
+                'error': '',
+                'loglevel': 'warning',
+            },
+            'inbounds': copy.deepcopy(factories[0].get('inbounds', [])),
+            'outbounds': outbounds,
+            'routing': {
+                'domainStrategy': 'AsIs',
+                'rules': [
+                    {
+                        'type': 'field',
+                        'network': 'tcp,udp',
+                        'balancerTag': BALANCER_TAG,
+                    },
+                ],
+                'balancers': [
+                    {
+                        'tag': BALANCER_TAG,
+                        'selector': [BALANCER_SELECTOR],
+                        'strategy': {
+                            'type': 'leastLoad',
+                        },
+                    },
+                ],
+            },
+            'burstObservatory': {
+                'subjectSelector': [BALANCER_SELECTOR],
+                'pingConfig': {
+                    'destination': probeURL,
+                    'interval': '1m',
+                    'sampling': 3,
+                    'timeout': '5s',
+                },
+            },
+        },
+        **kwargs,
+    )
+
+
+def applyXrayBalancerRouting(factory: ConfigurationXray, routingObject: dict) -> dict:
+    """
+    Sends proxied traffic of routingObject to the balancer of factory,
+    if it is a balancer group
+
+    :return: The routing object to use
+    """
+
+    if not isXrayBalancerConfig(factory) or 'balancers' in routingObject:
+        # Custom routing of a group already has balancers
+        return routingObject
+
+    routingObject = copy.deepcopy(routingObject)
+    routingObject['balancers'] = copy.deepcopy(factory['routing']['balancers'])
+
+    rules = routingObject.setdefault('rules', [])
+
+    for rule in rules:
+        if rule.get('outboundTag') == BALANCER_SELECTOR:
+            rule.pop('outboundTag')
+            rule['balancerTag'] = BALANCER_TAG
+
+    if not any(rule.get('balancerTag') == BALANCER_TAG for rule in rules):
+        # Global. Everything goes to the balancer
+        rules.append(
+            {
+                'type': 'field',
+                'network': 'tcp,udp',
+                'balancerTag': BALANCER_TAG,
+            }
+        )
+
+    return routingObject
@@ -0,0 +1,115 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.Interface import *
+from Furious.Library.Configuration import *
+from Furious.Library.BalancerConfiguration import *
+
+import copy
+
+__all__ = ['isXrayBatchTestable', 'constructXrayBatchTestConfig']
+
+
+def isXrayBatchTestable(factory: ConfigurationFactory) -> bool:
+    """
+    Whether factory can be served by a shared multi-outbound Xray-core
+    """
+
+    if not isinstance(factory, ConfigurationXray) or not factory.isValid():
+        return False
+
+    if isXrayBalancerConfig(factory):
+        # Needs its own balancer and observatory
+        return False
+
+    outboundObject = factory.proxyOutboundObject
+
+    # Chained outbounds refer to other tags. Test them on their own
+    return bool(outboundObject) and outboundObject.get('proxySettings') is None
+
+
+def constructXrayBatchTestConfig(
+    entries: list[tuple[ConfigurationXray, int]],
+) -> ConfigurationXray:
+    """
+    Builds one Xray-core configuration serving many servers. Each
+    server is reachable through its own local http inbound
+
+    :param entries: (factory, local port) of each server
+    :return: The configuration, with custom routing
+    """
+
+    inbounds, outbounds, rules = [], [], []
+
+    for index, (factory, port) in enumerate(entries):
+        outboundObject = copy.deepcopy(factory.proxyOutboundObject)
+        outboundObject['tag'] = f'proxy{index}'
+
+        inbounds.append(
+            {
+                'tag': f'http{index}',
+                'port': port,
+                'listen': '127.0.0.1',
+                'protocol': 'http',
+                'sniffing': {
+                    'enabled': True,
+                    'destOverride': [
+                        'http',
+                        'tls',
+                    ],
+                },
+                'settings': {
+                    'auth': 'noauth',
+                    'udp': True,
+                    'allowTransparent': False,
+                },
+            }
+        )
+        outbounds.append(outboundObject)
+        rules.append(
+            {
+                'type': 'field',
+                'inboundTag': [f'http{index}'],
+                'outboundTag': f'proxy{index}',
+            }
+        )
+
+    outbounds.append(
+        {
+            'tag': 'direct',
+            'protocol': 'freedom',
+            'settings': {},
+        }
+    )
+
+    return ConfigurationXray(
+        {
+            'log': {
+                'access': '',
+                'error': '',
+                'loglevel': 'warning',
+            },
+            'inbounds': inbounds,
+            'outbounds': outbounds,
+            'routing': {
+                'domainStrategy': 'AsIs',
+                'rules': rules,
+            },
+        }
+    )
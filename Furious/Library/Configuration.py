@@ -23,6 +23,7 @@ from Furious.Library.Encoder import *
 
 from typing import Union, Tuple
 
+import re
 import functools
 import urllib.parse
 
@@ -38,6 +39,7 @@ __all__ = [
     'ConfigurationHysteria1',
     'ConfigurationHysteria2',
     'constructFromDict',
+    'constructFromStorage',
     'constructFromAny',
 ]
 
@@ -251,6 +253,31 @@ class ConfigurationXray(ConfigurationFactory):
 
             return {}
 
+    def balancerMembers(self) -> list:
+        """
+        :return: One configuration per proxy outbound of a balancer group,
+                 tagged proxy, proxy-1, proxy-2... Only self otherwise
+        """
+
+        try:
+            outboundObjects = list(
+                outboundObject
+                for outboundObject in self['outbounds']
+                if re.fullmatch(r'proxy(-[0-9]+)?', outboundObject['tag'])
+            )
+        except Exception:
+            # Any non-exit exceptions
+
+            return [self]
+
+        if len(outboundObjects) <= 1:
+            return [self]
+
+        return list(
+            ConfigurationXray({'outbounds': [{**outboundObject, 'tag': 'proxy'}]})
+            for outboundObject in outboundObjects
+        )
+
     @property
     def proxyStreamSettingsObject(self) -> dict:
         try:
@@ -967,26 +994,31 @@ class ConfigurationXray(ConfigurationFactory):
         return self.getExtras('remark')
 
     @property
+    @lazyItemColumn
     def itemProtocol(self) -> str:
         return protocolRepr(self.proxyProtocol)
 
     @property
+    @lazyItemColumn
     def itemAddress(self) -> str:
         addr = self.proxyServerObject.get('address', '')
 
         return str(addr)
 
     @property
+    @lazyItemColumn
     def itemPort(self) -> str:
         port = self.proxyServerObject.get('port', '')
 
         return str(port)
 
     @property
+    @lazyItemColumn
     def itemTransport(self) -> str:
         return self.proxyStreamSettingsNetwork
 
     @property
+    @lazyItemColumn
     def itemTLS(self) -> str:
         return self.proxyStreamSettingsTLS
 
@@ -1000,6 +1032,21 @@ class ConfigurationXray(ConfigurationFactory):
         # Backward compatibility
         return self.getExtras('speedResult')
 
+    @property
+    @lazyItemColumn
+    def itemCredential(self) -> str:
+        members = self.balancerMembers()
+
+        if len(members) > 1:
+            # Balancer group. Identified by all of its members
+            return '\0'.join(member.identity() for member in members)
+
+        # id for VMess/VLESS, password for Shadowsocks/Trojan
+        return str(
+            self.proxyUserObject.get('id', '')
+            or self.proxyServerObject.get('password', '')
+        )
+
     def toJSONString(self, **kwargs) -> str:
         indent = kwargs.pop('indent', 2)
 
@@ -1347,10 +1394,12 @@ class ConfigurationHysteria1(ConfigurationFactory):
         return self.getExtras('remark')
 
     @property
+    @lazyItemColumn
     def itemProtocol(self) -> str:
         return Protocol.Hysteria1
 
     @property
+    @lazyItemColumn
     def itemAddress(self) -> str:
         server = self.get('server', '')
 
@@ -1362,6 +1411,7 @@ class ConfigurationHysteria1(ConfigurationFactory):
             return server[:pos]
 
     @property
+    @lazyItemColumn
     def itemPort(self) -> str:
         server = self.get('server', '')
 
@@ -1373,10 +1423,12 @@ class ConfigurationHysteria1(ConfigurationFactory):
             return server[pos + 1 :]
 
     @property
+    @lazyItemColumn
     def itemTransport(self) -> str:
         return ''
 
     @property
+    @lazyItemColumn
     def itemTLS(self) -> str:
         return ''
 
@@ -1388,6 +1440,11 @@ class ConfigurationHysteria1(ConfigurationFactory):
     def itemSpeed(self) -> str:
         return self.getExtras('speedResult')
 
+    @property
+    @lazyItemColumn
+    def itemCredential(self) -> str:
+        return str(self.get('auth_str', ''))
+
     def toJSONString(self, **kwargs) -> str:
         indent = kwargs.pop('indent', 4)
 
@@ -1606,10 +1663,12 @@ class ConfigurationHysteria2(ConfigurationFactory):
         return self.getExtras('remark')
 
     @property
+    @lazyItemColumn
     def itemProtocol(self) -> str:
         return Protocol.Hysteria2
 
     @property
+    @lazyItemColumn
     def itemAddress(self) -> str:
         server = self.get('server', '')
 
@@ -1621,6 +1680,7 @@ class ConfigurationHysteria2(ConfigurationFactory):
             return server[:pos]
 
     @property
+    @lazyItemColumn
     def itemPort(self) -> str:
         server = self.get('server', '')
 
@@ -1632,10 +1692,12 @@ class ConfigurationHysteria2(ConfigurationFactory):
             return server[pos + 1 :]
 
     @property
+    @lazyItemColumn
     def itemTransport(self) -> str:
         return ''
 
     @property
+    @lazyItemColumn
     def itemTLS(self) -> str:
         return ''
 
@@ -1647,6 +1709,11 @@ class ConfigurationHysteria2(ConfigurationFactory):
     def itemSpeed(self) -> str:
         return self.getExtras('speedResult')
 
+    @property
+    @lazyItemColumn
+    def itemCredential(self) -> str:
+        return str(self.get('auth', ''))
+
     def toJSONString(self, **kwargs) -> str:
         indent = kwargs.pop('indent', 4)
 
@@ -1857,6 +1924,22 @@ def constructFromDict(config: dict, **kwargs) -> ConfigurationFactory:
     return ConfigurationFactory(config, **kwargs)
 
 
+def constructFromStorage(
+    coreName: str, config: str, columns: dict, **kwargs
+) -> ConfigurationFactory:
+    factoryType = {
+        'Xray-core': ConfigurationXray,
+        'Hysteria1': ConfigurationHysteria1,
+        'Hysteria2': ConfigurationHysteria2,
+    }.get(coreName)
+
+    if factoryType is None or not isinstance(columns, dict):
+        # No cached columns. Construct eagerly
+        return constructFromAny(config, **kwargs)
+
+    return factoryType.fromStorage(config, columns, **kwargs)
+
+
 def constructFromAny(config: Union[str, dict], **kwargs) -> ConfigurationFactory:
     if isinstance(config, str):
         if (
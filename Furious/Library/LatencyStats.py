@@ -0,0 +1,63 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import time
+import statistics
+
+__all__ = ['latencyStats', 'latencyStatsRepr']
+
+
+def latencyStats(rtts: list[float], count: int, error: str = '') -> dict:
+    """
+    Builds the latency result record stored with a server
+
+    :param rtts: Round-trip time of each received sample, in milliseconds
+    :param count: Number of samples sent
+    :param error: Reason if no sample is received
+    :return: Result record. JSON serializable
+    """
+
+    count = max(count, len(rtts), 1)
+
+    stats = {
+        'count': count,
+        'loss': round((count - len(rtts)) * 100 / count, 1),
+        'timestamp': int(time.time()),
+    }
+
+    if rtts:
+        stats['min'] = round(min(rtts), 2)
+        stats['avg'] = round(statistics.fmean(rtts), 2)
+        stats['median'] = round(statistics.median(rtts), 2)
+        stats['jitter'] = round(statistics.pstdev(rtts), 2)
+    else:
+        stats['error'] = error if error else 'Timeout'
+
+    return stats
+
+
+def latencyStatsRepr(stats: dict) -> str:
+    """
+    :return: Display string of a result record, as shown in the table
+    """
+
+    if stats.get('avg') is not None:
+        return f'{round(stats["avg"])}ms'
+    else:
+        return stats.get('error', '')
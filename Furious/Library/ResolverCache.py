@@ -0,0 +1,182 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from typing import Iterable, Tuple
+
+import time
+import socket
+import asyncio
+import ipaddress
+import threading
+import collections
+
+__all__ = ['ResolverCache']
+
+
+class ResolverCache:
+    """
+    Process-wide cache of hostname resolution used by latency tests.
+    Failures are cached too, for a shorter time
+    """
+
+    # Seconds a successful resolution is kept
+    TTL = 300
+    # Seconds a failed resolution is kept
+    NEGATIVE_TTL = 30
+    # Maximum number of hostnames kept
+    MAX_SIZE = 1024
+
+    Lock = threading.Lock()
+    # hostname: (expiry, address, error). LRU order
+    Entries = collections.OrderedDict()
+
+    @staticmethod
+    def isIPAddress(host: str) -> bool:
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        else:
+            return True
+
+    @staticmethod
+    def lookup(host: str) -> Tuple[bool, str, str]:
+        """
+        :return: (hit, address, error). address is empty for cached failures
+        """
+
+        with ResolverCache.Lock:
+            entry = ResolverCache.Entries.get(host)
+
+            if entry is None:
+                return False, '', ''
+
+            expiry, address, error = entry
+
+            if expiry < time.monotonic():
+                del ResolverCache.Entries[host]
+
+                return False, '', ''
+
+            ResolverCache.Entries.move_to_end(host)
+
+            return True, address, error
+
+    @staticmethod
+    def store(host: str, address: str, error: str = ''):
+        if address:
+            expiry = time.monotonic() + ResolverCache.TTL
+        else:
+            expiry = time.monotonic() + ResolverCache.NEGATIVE_TTL
+
+        with ResolverCache.Lock:
+            ResolverCache.Entries[host] = expiry, address, error
+            ResolverCache.Entries.move_to_end(host)
+
+            while len(ResolverCache.Entries) > ResolverCache.MAX_SIZE:
+                ResolverCache.Entries.popitem(last=False)
+
+    @staticmethod
+    def clear():
+        with ResolverCache.Lock:
+            ResolverCache.Entries.clear()
+
+    @staticmethod
+    def preferredAddress(addrinfo: list) -> str:
+        """
+        :return: The first IPv4 address in addrinfo, or the first address if none
+        """
+
+        for family, type, proto, canonname, sockaddr in addrinfo:
+            if family == socket.AF_INET:
+                return sockaddr[0]
+
+        return addrinfo[0][4][0]
+
+    @staticmethod
+    async def asyncResolve(host: str, timeout: float) -> Tuple[str, float]:
+        """
+        Non-blocking resolution through the cache
+
+        :return: (address, seconds spent resolving). Raises OSError on failure
+        """
+
+        if ResolverCache.isIPAddress(host):
+            return host, 0.0
+
+        hit, address, error = ResolverCache.lookup(host)
+
+        if hit:
+            if address:
+                return address, 0.0
+            else:
+                raise OSError(error)
+
+        loop = asyncio.get_running_loop()
+
+        counter = time.perf_counter()
+
+        try:
+            addrinfo = await asyncio.wait_for(
+                loop.getaddrinfo(host, 0, type=socket.SOCK_STREAM), timeout
+            )
+        except asyncio.TimeoutError:
+            ResolverCache.store(host, '', 'Timeout')
+
+            raise
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            ResolverCache.store(host, '', ex.__class__.__name__)
+
+            raise
+
+        address = ResolverCache.preferredAddress(addrinfo)
+
+        ResolverCache.store(host, address)
+
+        return address, time.perf_counter() - counter
+
+    @staticmethod
+    async def asyncPreResolve(
+        hosts: Iterable[str], timeout: float, concurrency: int = 64
+    ) -> dict[str, float]:
+        """
+        Resolves distinct hosts concurrently and fills the cache
+
+        :return: hostname: seconds spent resolving. Failures are not included
+        """
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        elapsed = {}
+
+        async def resolveOne(host):
+            async with semaphore:
+                try:
+                    address, elapsed[host] = await ResolverCache.asyncResolve(
+                        host, timeout
+                    )
+                except Exception:
+                    # Any non-exit exceptions
+
+                    pass
+
+        await asyncio.gather(*list(resolveOne(host) for host in set(hosts) if host))
+
+        return elapsed
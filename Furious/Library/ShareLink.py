@@ -0,0 +1,114 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.Interface import *
+from Furious.Library.Configuration import *
+from Furious.Library.Encoder import *
+
+from typing import AnyStr, Tuple
+
+__all__ = [
+    'ShareLinkDiagnostic',
+    'decodeShareLinks',
+    'parseShareLink',
+    'parseShareLinks',
+]
+
+
+class ShareLinkDiagnostic:
+    def __init__(self, lineno: int, line: str, reason: str):
+        self.lineno = lineno
+        self.line = line
+        self.reason = reason
+
+    def __str__(self):
+        if len(self.line) > 64:
+            line = self.line[:64] + '...'
+        else:
+            line = self.line
+
+        return f'line {self.lineno}: {self.reason}: {line}'
+
+
+def decodeShareLinks(data: AnyStr) -> list[str]:
+    """
+    Decodes a base64 subscription body to share link lines.
+    Raises exception if data is not valid base64
+
+    :param data: Subscription body
+    :return: Lines. Empty lines are kept so that line numbers match
+    """
+
+    return list(
+        line.strip() for line in PyBase64Encoder.decode(data).decode().split('\n')
+    )
+
+
+def parseShareLink(line: str, **kwargs) -> Tuple[ConfigurationFactory, str]:
+    """
+    Parses one share link
+
+    :param line: Share link
+    :param kwargs: Extras for the constructed factory
+    :return: Factory and reason. Reason is empty if factory is valid
+    """
+
+    factory = constructFromAny(line, **kwargs)
+
+    if factory.isValid():
+        return factory, ''
+
+    try:
+        # Constructor swallows exceptions. Parse again for the reason
+        if not type(factory)({}).fromURI(line):
+            return factory, 'Unrecognized share link'
+    except Exception as ex:
+        # Any non-exit exceptions
+
+        return factory, f'{ex.__class__.__name__}: {ex}'
+
+    return factory, 'Invalid configuration'
+
+
+def parseShareLinks(
+    lines: list[str], start: int = 0, **kwargs
+) -> Tuple[list[ConfigurationFactory], list[ShareLinkDiagnostic]]:
+    """
+    Parses share links. Empty lines are skipped
+
+    :param lines: Share links
+    :param start: Line number offset of the first line
+    :param kwargs: Extras for the constructed factories
+    :return: Valid factories and diagnostics for invalid lines
+    """
+
+    factories, diagnostics = [], []
+
+    for offset, line in enumerate(lines):
+        if not line:
+            continue
+
+        factory, reason = parseShareLink(line, **kwargs)
+
+        if reason:
+            diagnostics.append(ShareLinkDiagnostic(start + offset + 1, line, reason))
+        else:
+            factories.append(factory)
+
+    return factories, diagnostics
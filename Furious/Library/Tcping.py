@@ -17,64 +17,34 @@
 
 from __future__ import annotations
 
+from Furious.Library.ResolverCache import *
+
 from typing import Tuple
 
 import time
-import socket
-import ipaddress
-import functools
-
-__all__ = ['tcping']
-
+import asyncio
 
-def tcping(
-    address: str,
-    port: int,
-    timeout: float,
-    count: int,
-    interval: float,
-) -> Tuple[int, list]:
-    host = socket.gethostbyname(address)
-    addressobject = ipaddress.ip_address(host)
+__all__ = ['asyncTcping']
 
-    if isinstance(addressobject, ipaddress.IPv4Address):
-        socketFn = functools.partial(
-            socket.socket,
-            family=socket.AF_INET,
-            type=socket.SOCK_STREAM,
-            proto=socket.IPPROTO_TCP,
-        )
-    elif isinstance(addressobject, ipaddress.IPv6Address):
-        socketFn = functools.partial(
-            socket.socket,
-            family=socket.AF_INET6,
-            type=socket.SOCK_STREAM,
-            proto=socket.IPPROTO_TCP,
-        )
-    else:
-        raise ValueError('Invalid address')
 
-    sent = 0
-    rtts = []
+async def asyncTcping(address: str, port: int, timeout: float) -> Tuple[float, float]:
+    """
+    Single non-blocking TCP connect. Name resolution goes through
+    the resolver cache. Resolution and connect are each bounded by timeout
 
-    for sequence in range(count):
-        if sequence > 0:
-            time.sleep(interval)
+    :return: (resolution time, connect round-trip time) in seconds
+    """
 
-        with socketFn() as sock:
-            sock.settimeout(timeout)
+    host, resolveTime = await ResolverCache.asyncResolve(address, timeout)
 
-            counter = time.perf_counter()
+    counter = time.perf_counter()
 
-            try:
-                sock.connect((address, port))
-            except Exception:
-                # Any non-exit exceptions
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port), timeout
+    )
 
-                pass
-            else:
-                sent += 1
+    rtt = time.perf_counter() - counter
 
-                rtts.append(time.perf_counter() - counter)
+    writer.close()
 
-    return sent, rtts
+    return resolveTime, rtt
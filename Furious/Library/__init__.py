@@ -17,5 +17,11 @@
 
 from .Configuration import *
 from .EmptyFactoryHelper import *
+from .BalancerConfiguration import *
+from .BatchTestConfiguration import *
 from .Encoder import *
+from .AccessLogStats import *
+from .LatencyStats import *
+from .ShareLink import *
+from .ResolverCache import *
 from .Tcping import *
@@ -26,20 +26,232 @@ from abc import ABC
 from typing import Callable
 
 import os
+import re
 import sys
 import time
 import uuid
 import logging
 import threading
 import multiprocessing
+import multiprocessing.connection
 
-__all__ = ['CoreProcess', 'StdoutRedirectHelper']
+__all__ = ['CoreProcess', 'CoreLogFiles', 'StdoutRedirectHelper']
 
 logger = logging.getLogger(__name__)
 
+if PLATFORM == 'Linux' and not ('__compiled__' in globals() or hasattr(sys, 'frozen')):
+    # A long-lived fork server, started as a fresh interpreter with the
+    # core entry points imported once, forks every core. Cores are not
+    # forked from the multi-threaded application process, and share
+    # the pages of the fork server copy-on-write. Linux only: forking a
+    # process with Qt loaded is unsafe on macOS. Packed binaries cannot
+    # start a fresh fork server
+    CoreProcessContext = multiprocessing.get_context('forkserver')
+    CoreProcessContext.set_forkserver_preload(['Furious.Core'])
+else:
+    CoreProcessContext = multiprocessing
+
+
+class CoreLogFiles:
+    """
+    Fixed set of log files per core role under the user data directory.
+    A file is reused once the core using it stops
+    """
+
+    # Size a log file is truncated at, in bytes
+    MAX_SIZE = 8 * 1024 * 1024
+    # Interval between two size checks of log files nobody follows, in milliseconds
+    SIZE_CHECK_INTERVAL = 10000
+
+    InUse = set()
+
+    @staticmethod
+    def directory():
+        return getUserDataDir() / 'CoreLogs'
+
+    @staticmethod
+    def acquire(role: str) -> str:
+        """
+        :return: Path of an empty log file for role, or empty string on failure
+        """
+
+        role = re.sub(r'[^0-9A-Za-z]+', '-', role).strip('-').lower()
+
+        try:
+            directory = CoreLogFiles.directory()
+            directory.mkdir(parents=True, exist_ok=True)
+
+            slot = 0
+
+            while str(directory / f'{role}-{slot}.log') in CoreLogFiles.InUse:
+                slot += 1
+
+            path = str(directory / f'{role}-{slot}.log')
+
+            # Create or truncate
+            with open(path, 'wb'):
+                pass
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot acquire {role} log file: {ex}')
+
+            return ''
+
+        CoreLogFiles.InUse.add(path)
+
+        return path
+
+    @staticmethod
+    def release(path: str):
+        if path in CoreLogFiles.InUse:
+            CoreLogFiles.InUse.discard(path)
+
+            try:
+                os.truncate(path, 0)
+            except Exception:
+                # Any non-exit exceptions
+
+                pass
+
+    @staticmethod
+    def truncateOversized(paths: list):
+        """
+        Truncates files larger than MAX_SIZE. Writers must append
+        """
+
+        for path in paths:
+            try:
+                if os.path.getsize(path) > CoreLogFiles.MAX_SIZE:
+                    os.truncate(path, 0)
+            except Exception:
+                # Any non-exit exceptions
+
+                pass
+
+    @staticmethod
+    def cleanupStale():
+        # Left over by previous runs. Only one instance runs at a time
+        try:
+            for path in CoreLogFiles.directory().glob('*.log'):
+                if str(path) not in CoreLogFiles.InUse:
+                    path.unlink()
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot clean up stale core log files: {ex}')
+
+
+class CoreExitWatcher(QtCore.QObject):
+    """
+    Waits on the sentinel of a process in a thread. Exits are reported
+    through the exited signal, in the thread the watcher lives in
+    """
+
+    exited = QtCore.Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+    def watch(self, process: multiprocessing.process.BaseProcess):
+        def wait():
+            try:
+                multiprocessing.connection.wait([process.sentinel])
+            except Exception:
+                # Any non-exit exceptions
+
+                pass
+
+            self.exited.emit(process)
+
+        threading.Thread(target=wait, daemon=True).start()
+
+
+class CoreMsgWaiter(QtCore.QObject):
+    """
+    Takes chunks of a message queue in a thread, blocking while the
+    queue is empty. Chunks are handed over in order through the arrived
+    signal, in the thread the waiter lives in
+    """
+
+    arrived = QtCore.Signal(object)
+
+    # Put on the queue to wake the thread up when stopping
+    SENTINEL = None
+    # Maximum time to wait for room for the sentinel, in seconds
+    SENTINEL_PUT_TIMEOUT = 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._lock = threading.Lock()
+        self._waiting = False
+        self._stopping = False
+
+    def watch(self, msgQueue: multiprocessing.Queue):
+        with self._lock:
+            self._stopping = False
+
+            if self._waiting:
+                # Stopping, but sentinel not taken yet. Keeps going, so
+                # there is never more than one thread taking chunks
+                return
+
+            self._waiting = True
+
+        threading.Thread(target=self.wait, args=(msgQueue,), daemon=True).start()
+
+    def wait(self, msgQueue: multiprocessing.Queue):
+        while True:
+            try:
+                chunk = msgQueue.get()
+            except Exception:
+                # Any non-exit exceptions
+
+                with self._lock:
+                    self._waiting = False
+
+                return
+
+            if chunk is self.SENTINEL:
+                with self._lock:
+                    if self._stopping:
+                        self._waiting = False
+
+                        return
+            else:
+                self.arrived.emit(chunk)
+
+    def stop(self, msgQueue: multiprocessing.Queue):
+        with self._lock:
+            if not self._waiting or self._stopping:
+                return
+
+            self._stopping = True
+
+        try:
+            # Only full while the thread is taking chunks
+            msgQueue.put(self.SENTINEL, timeout=self.SENTINEL_PUT_TIMEOUT)
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot stop message waiter: {ex}')
+
+
+def launchWithRedirectFile(redirectFile: str, target, *args):
+    # Runs in the core process
+    StdoutRedirectHelper.RedirectFile = redirectFile
+
+    return target(*args)
+
 
 class CoreProcess(CoreFactory, ABC):
-    MSG_PRODUCE_THRESHOLD = 250
+    # Maximum number of pending log chunks. Producer drops beyond it
+    MSG_QUEUE_MAX_SIZE = 256
+    # First interval between two readiness checks, in milliseconds.
+    # Doubles after each check, up to the maximum
+    READY_CHECK_INTERVAL = 25
+    READY_CHECK_MAX_INTERVAL = 200
 
     def __init__(self, **kwargs):
         exitCallback = kwargs.pop('exitCallback', None)
@@ -47,26 +259,40 @@ class CoreProcess(CoreFactory, ABC):
         super().__init__(exitCallback)
 
         self._process = None
-        self._msgQueue = multiprocessing.Queue()
+        # Log files acquired for the running process
+        self._logFiles = []
+        self._msgQueue = CoreProcessContext.Queue(self.MSG_QUEUE_MAX_SIZE)
+        # Called with the lines of each chunk, joined by newlines
         self._msgCallback = kwargs.pop('msgCallback', None)
+        self._msgConsumed = 0
+        self._msgDropped = 0
+        self._msgDroppedReported = 0
 
-        @QtCore.Slot()
-        def handleMsgTimemout():
-            msg = self.getMsgNoWait()
+        @QtCore.Slot(object)
+        def handleMsgArrived(chunk):
+            self.handleMsg('\n'.join(self.takeChunk(chunk)))
 
-            if msg and not msg.isspace():
-                if callable(self._msgCallback):
-                    self._msgCallback(msg)
+        self._msgWaiter = CoreMsgWaiter()
+        self._msgWaiter.arrived.connect(handleMsgArrived)
 
-        self._msgTimer = QtCore.QTimer()
-        self._msgTimer.timeout.connect(handleMsgTimemout)
+        @QtCore.Slot(object)
+        def handleProcessExited(process):
+            if process is self._process:
+                self.checkIsRunning()
+            else:
+                # Stopped or replaced. Not reported
+                pass
 
-        @QtCore.Slot()
-        def handleDaemonTimemout():
-            self.checkIsRunning()
+        # Log files of the running process no follower reads. Their
+        # size is checked from here. Followers truncate the others
+        self._unfollowedLogFiles = []
+        self._logSizeTimer = QtCore.QTimer()
+        self._logSizeTimer.timeout.connect(
+            lambda: CoreLogFiles.truncateOversized(self._unfollowedLogFiles)
+        )
 
-        self._daemonTimer = QtCore.QTimer()
-        self._daemonTimer.timeout.connect(handleDaemonTimemout)
+        self._exitWatcher = CoreExitWatcher()
+        self._exitWatcher.exited.connect(handleProcessExited)
 
     @property
     def msgQueue(self) -> multiprocessing.Queue:
@@ -77,14 +303,52 @@ class CoreProcess(CoreFactory, ABC):
 
         return self
 
+    @staticmethod
+    def startLauncher():
+        """
+        Starts the fork server ahead of the first core, if used
+        """
+
+        if CoreProcessContext is multiprocessing:
+            return
+
+        try:
+            from multiprocessing import forkserver
+
+            forkserver.ensure_running()
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot start core fork server: {ex}')
+        else:
+            logger.info('core fork server started')
+
+    def msgQueueDepth(self) -> int:
+        """
+        :return: Number of pending log chunks, or -1 if unknown on this platform
+        """
+
+        try:
+            return self._msgQueue.qsize()
+        except Exception:
+            # Any non-exit exceptions. NotImplementedError on macOS
+
+            return -1
+
+    def msgConsumedCount(self) -> int:
+        return self._msgConsumed
+
+    def msgDroppedCount(self) -> int:
+        return self._msgDropped
+
     def isRunning(self) -> bool:
-        if isinstance(self._process, multiprocessing.Process):
+        if isinstance(self._process, multiprocessing.process.BaseProcess):
             return self._process.is_alive()
         else:
             return False
 
     def checkIsRunning(self) -> bool:
-        if isinstance(self._process, multiprocessing.Process):
+        if isinstance(self._process, multiprocessing.process.BaseProcess):
             if self._process.is_alive():
                 return True
             else:
@@ -92,8 +356,7 @@ class CoreProcess(CoreFactory, ABC):
                     f'{self.name()} stopped unexpectedly with exitcode {self._process.exitcode}'
                 )
 
-                self._msgTimer.stop()
-                self._daemonTimer.stop()
+                self._msgWaiter.stop(self._msgQueue)
 
                 if callable(self._exitCallback):
                     self._exitCallback(self, self._process.exitcode)
@@ -101,45 +364,108 @@ class CoreProcess(CoreFactory, ABC):
                 # Reset internal process
                 self._process = None
 
+                self.releaseLogFiles()
+
                 return False
         else:
             return False
 
+    def waitForReady(self, endpoints: list[str], waitTime: int) -> bool:
+        """
+        Waits until all endpoints accept connections, the process
+        exits, or waitTime (in milliseconds) elapsed
+
+        :return: True if all endpoints accept connections
+        """
+
+        pending = list(filter(None, (parseLocalEndpoint(ep) for ep in endpoints)))
+        interval = self.READY_CHECK_INTERVAL
+
+        elapsedTimer = QtCore.QElapsedTimer()
+        elapsedTimer.start()
+
+        while True:
+            pending = list(ep for ep in pending if not isEndpointAccepting(*ep))
+
+            if not pending:
+                logger.info(f'{self.name()} ready in {elapsedTimer.elapsed()}ms')
+
+                return True
+
+            if not self.isRunning():
+                # Exited. No need to wait any longer
+                return False
+
+            remaining = waitTime - elapsedTimer.elapsed()
+
+            if remaining <= 0:
+                logger.warning(
+                    f'{self.name()} not accepting on {pending} after {waitTime}ms'
+                )
+
+                return False
+
+            PySide6LegacyEventLoopWait(min(interval, remaining))
+
+            interval = min(interval * 2, self.READY_CHECK_MAX_INTERVAL)
+
     def start(self, **kwargs) -> bool:
         daemon = kwargs.pop('daemon', True)
         waitCore = kwargs.pop('waitCore', True)
         waitTime = kwargs.pop('waitTime', 2500)
-
-        self._process = multiprocessing.Process(**kwargs, daemon=daemon)
+        # Local inbound endpoints of the core, if known
+        readyEndpoints = kwargs.pop('readyEndpoints', [])
+        # Other log files the core writes to, released with it
+        logFiles = kwargs.pop('logFiles', [])
+        # Those of logFiles no follower reads
+        unfollowedLogFiles = kwargs.pop('unfollowedLogFiles', [])
+
+        target = kwargs.pop('target')
+        args = kwargs.pop('args', ())
+
+        redirectFile = CoreLogFiles.acquire(self.name())
+
+        self.releaseLogFiles()
+        self._logFiles = list(filter(None, [redirectFile, *logFiles]))
+        self._unfollowedLogFiles = list(filter(None, unfollowedLogFiles))
+
+        if not redirectFile:
+            # Not released. Removed with the temporary directory
+            redirectFile = StdoutRedirectHelper.temporaryFile()
+
+        self._process = CoreProcessContext.Process(
+            target=launchWithRedirectFile,
+            args=(redirectFile, target, *args),
+            **kwargs,
+            daemon=daemon,
+        )
         self._process.start()
 
-        logger.info(f'{self.name()} {self.version()} started')
+        # Exits are reported as soon as they happen
+        self._exitWatcher.watch(self._process)
 
-        self._msgTimer.start(self.MSG_PRODUCE_THRESHOLD)
+        logger.info(f'{self.name()} {self.version()} started')
 
-        if waitCore:
-            # Wait for the core to start up completely
-            PySide6LegacyEventLoopWait(waitTime)
+        self._msgWaiter.watch(self._msgQueue)
 
-        if self.checkIsRunning():
-            if AppSettings.isStateON_('PowerSaveMode'):
-                # Power optimization
-                logger.info(f'no core daemon for {self.name()} in power save mode')
+        if self._unfollowedLogFiles:
+            self._logSizeTimer.start(CoreLogFiles.SIZE_CHECK_INTERVAL)
 
-                self._daemonTimer.stop()
+        if waitCore:
+            if readyEndpoints:
+                # Done as soon as the inbounds accept connections.
+                # waitTime is only the upper bound
+                self.waitForReady(readyEndpoints, waitTime)
             else:
-                # Start core daemon
-                self._daemonTimer.start(CORE_CHECK_ALIVE_INTERVAL)
+                # Wait for the core to start up completely
+                PySide6LegacyEventLoopWait(waitTime)
 
-            return True
-        else:
-            return False
+        return self.checkIsRunning()
 
     def stop(self):
-        if self.isRunning():
-            self._msgTimer.stop()
-            self._daemonTimer.stop()
+        self._msgWaiter.stop(self._msgQueue)
 
+        if self.isRunning():
             self._process.terminate()
             self._process.join()
 
@@ -147,17 +473,112 @@ class CoreProcess(CoreFactory, ABC):
                 f'{self.name()} terminated with exitcode {self._process.exitcode}'
             )
 
-    def getMsgNoWait(self) -> str:
-        try:
-            return self._msgQueue.get_nowait()
-        except Exception:
-            # Any non-exit exceptions
+        # Exit of a stopped process is not reported
+        self._process = None
 
-            return ''
+        self.releaseLogFiles()
+
+    def releaseLogFiles(self):
+        self._logSizeTimer.stop()
+
+        for path in self._logFiles:
+            CoreLogFiles.release(path)
+
+        self._logFiles = []
+        self._unfollowedLogFiles = []
+
+    def handleMsg(self, msg: str):
+        if self._msgDropped > self._msgDroppedReported:
+            logger.warning(
+                f'{self.name()} log producer dropped '
+                f'{self._msgDropped - self._msgDroppedReported} lines'
+            )
+
+            self._msgDroppedReported = self._msgDropped
+
+        if msg and not msg.isspace():
+            if callable(self._msgCallback):
+                self._msgCallback(msg)
+
+    def takeChunk(self, chunk) -> list:
+        lines, dropped = chunk
+
+        # Total count reported by the producer
+        self._msgDropped = max(self._msgDropped, dropped)
+        self._msgConsumed += len(lines)
+
+        return list(line.rstrip() for line in lines)
 
 
 class StdoutRedirectHelper:
-    TemporaryDir = QtCore.QTemporaryDir()
+    # Fallback location of redirect files. Created in the
+    # application process when first needed
+    TemporaryDir = None
+    # Set in the core process. No redirect if empty
+    RedirectFile = ''
+
+    # Producer sleep when there are no new lines, in milliseconds
+    MSG_IDLE_SLEEP = 50
+    # Maximum number of lines per queued chunk
+    MSG_CHUNK_SIZE = 512
+
+    @staticmethod
+    def produceMsg(msgQueue: multiprocessing.Queue, files: list):
+        """
+        Follows files forever. Lines read in one scan are queued as
+        a chunk. Chunks are dropped and counted if the queue is full.
+        Files that are caught up and larger than CoreLogFiles.MAX_SIZE
+        are truncated. Writers must append
+        """
+
+        dropped = 0
+
+        while True:
+            lines = []
+
+            for file in files:
+                for line in iter(file.readline, b''):
+                    if line and not line.isspace():
+                        lines.append(line.decode('utf-8', 'replace'))
+
+                    if len(lines) >= StdoutRedirectHelper.MSG_CHUNK_SIZE:
+                        break
+                else:
+                    if file.tell() > CoreLogFiles.MAX_SIZE:
+                        try:
+                            os.truncate(file.name, 0)
+                        except Exception:
+                            # Any non-exit exceptions
+
+                            pass
+                        else:
+                            file.seek(0)
+
+            if not lines:
+                time.sleep(StdoutRedirectHelper.MSG_IDLE_SLEEP / 1000)
+
+                continue
+
+            try:
+                msgQueue.put_nowait((lines, dropped))
+            except Exception:
+                # Any non-exit exceptions
+
+                dropped += len(lines)
+
+    @staticmethod
+    def temporaryFile() -> str:
+        """
+        :return: Path of a new file in the temporary directory, or empty string on failure
+        """
+
+        if StdoutRedirectHelper.TemporaryDir is None:
+            StdoutRedirectHelper.TemporaryDir = QtCore.QTemporaryDir()
+
+        if StdoutRedirectHelper.TemporaryDir.isValid():
+            return StdoutRedirectHelper.TemporaryDir.filePath(str(uuid.uuid4()))
+        else:
+            return ''
 
     @staticmethod
     def launch(
@@ -167,7 +588,7 @@ class StdoutRedirectHelper:
             return
 
         if (
-            not StdoutRedirectHelper.TemporaryDir.isValid()
+            not StdoutRedirectHelper.RedirectFile
             or not redirect
             # pythonw.exe
             or isPythonw()
@@ -177,8 +598,10 @@ class StdoutRedirectHelper:
 
             return
 
-        temporaryFile = StdoutRedirectHelper.TemporaryDir.filePath(str(uuid.uuid4()))
-        tmpFileStream = open(temporaryFile, 'w+b')
+        temporaryFile = StdoutRedirectHelper.RedirectFile
+
+        # Append mode. The file can be truncated while written to
+        tmpFileStream = open(temporaryFile, 'ab')
         stdoutFileno_ = sys.stdout.fileno()
         stderrFileno_ = sys.stderr.fileno()
 
@@ -194,17 +617,7 @@ class StdoutRedirectHelper:
 
         def produceMsg():
             with open(temporaryFile, 'rb') as file:
-                while True:
-                    for line in iter(file.readline, b''):
-                        if line and not line.isspace():
-                            try:
-                                msgQueue.put_nowait(line.decode('utf-8', 'replace'))
-                            except Exception:
-                                # Any non-exit exceptions
-
-                                pass
-
-                    time.sleep(CoreProcess.MSG_PRODUCE_THRESHOLD / 1000)
+                StdoutRedirectHelper.produceMsg(msgQueue, [file])
 
         msgThread = threading.Thread(target=produceMsg, daemon=True)
         msgThread.start()
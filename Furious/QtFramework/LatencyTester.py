@@ -0,0 +1,283 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.PyFramework import *
+from Furious.Library import *
+
+from PySide6 import QtCore
+
+from typing import Any, Callable, Tuple
+
+import asyncio
+import logging
+import icmplib
+import itertools
+import threading
+
+__all__ = ['LatencyTester']
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTester(SupportExitCleanup, QtCore.QObject):
+    """
+    Tests latency of many servers concurrently on a dedicated asyncio
+    event loop thread. Results are delivered back in batches
+    """
+
+    # Interval between two result batches, in seconds
+    BATCH_INTERVAL = 0.1
+    # Interval between two samples of a server, in seconds
+    SAMPLE_INTERVAL = 0.2
+
+    resultsReady = QtCore.Signal(int, object)
+    jobFinished = QtCore.Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.loop = None
+        self.thread = None
+        self.jobCounter = itertools.count()
+        self.jobs = {}
+
+        self.resultsReady.connect(self.handleResultsReady)
+        self.jobFinished.connect(self.handleJobFinished)
+
+    def ensureLoop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(
+                target=self.loop.run_forever, name='LatencyTester', daemon=True
+            )
+            self.thread.start()
+
+        return self.loop
+
+    @staticmethod
+    async def testOne(
+        method: str, address: str, port: int, timeout: float, samples: int
+    ) -> Tuple[dict, float]:
+        """
+        :return: (result record, resolution time in seconds). Resolution
+                 time is negative if the name was not resolved
+        """
+
+        def classname(ob) -> str:
+            return ob.__class__.__name__
+
+        samples = max(samples, 1)
+        resolveTime = -1.0
+
+        try:
+            host, resolveTime = await ResolverCache.asyncResolve(address, timeout)
+        except asyncio.TimeoutError:
+            return latencyStats([], samples, 'Timeout'), resolveTime
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            return latencyStats([], samples, classname(ex)), resolveTime
+
+        if method == 'ping':
+            try:
+                result = await icmplib.async_ping(
+                    host,
+                    count=samples,
+                    timeout=timeout,
+                    interval=LatencyTester.SAMPLE_INTERVAL,
+                )
+            except Exception as ex:
+                # Any non-exit exceptions
+
+                return latencyStats([], samples, classname(ex)), resolveTime
+            else:
+                # Result address should not be empty
+                if result.address:
+                    return latencyStats(result.rtts, samples), resolveTime
+                else:
+                    return latencyStats([], samples, 'Error'), resolveTime
+
+        rtts, error = [], ''
+
+        for sequence in range(samples):
+            if sequence > 0:
+                await asyncio.sleep(LatencyTester.SAMPLE_INTERVAL)
+
+            try:
+                unused, rtt = await asyncTcping(host, port, timeout)
+            except asyncio.TimeoutError:
+                error = 'Timeout'
+            except Exception as ex:
+                # Any non-exit exceptions
+
+                error = classname(ex)
+            else:
+                rtts.append(rtt * 1000)
+
+        return latencyStats(rtts, samples, error), resolveTime
+
+    async def runJob(
+        self,
+        jobId: int,
+        method: str,
+        targets: list,
+        concurrency: int,
+        timeout: float,
+        deadline: float,
+        samples: int,
+    ):
+        expiry = asyncio.get_running_loop().time() + deadline
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        batch = []
+
+        # Subscription servers often share a few hostnames.
+        # Resolve each of them once before testing
+        resolveTimes = await ResolverCache.asyncPreResolve(
+            list(address for key, address, port in targets), timeout, concurrency
+        )
+
+        async def testOne(key, address, port):
+            async with semaphore:
+                result, resolveTime = await self.testOne(
+                    method, address, port, timeout, samples
+                )
+
+                if resolveTime >= 0:
+                    # Names resolved by pre-resolve are cache hits here
+                    resolveTime = resolveTimes.get(address, resolveTime)
+
+                batch.append((key, result, resolveTime))
+
+        tasks = list(
+            asyncio.ensure_future(testOne(key, address, port))
+            for key, address, port in targets
+        )
+
+        def flush():
+            if batch:
+                self.resultsReady.emit(jobId, list(batch))
+
+                batch.clear()
+
+        try:
+            pending = set(tasks)
+
+            while pending:
+                remaining = expiry - asyncio.get_running_loop().time()
+
+                if remaining <= 0:
+                    logger.info(
+                        f'latency test job {jobId} reached deadline. '
+                        f'{len(pending)} servers not tested'
+                    )
+
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=min(self.BATCH_INTERVAL, remaining)
+                )
+
+                flush()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            flush()
+
+    def test(
+        self,
+        method: str,
+        targets: list[tuple[Any, str, int]],
+        progressCallback: Callable[[list[tuple[Any, dict, float]]], None],
+        finishedCallback: Callable[[], None] = None,
+        **kwargs,
+    ) -> int:
+        """
+        Starts testing targets. Both callbacks are called in the
+        thread this tester lives in
+
+        :param method: 'ping' or 'tcping'
+        :param targets: (key, address, port) of each server
+        :param progressCallback: Called with a batch of (key, stats, resolveTime)
+        :param finishedCallback: Called once when the job finished or cancelled
+        :param kwargs: concurrency, samples, timeout and deadline (in seconds)
+        :return: Job id
+        """
+
+        jobId = next(self.jobCounter)
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.runJob(
+                jobId,
+                method,
+                targets,
+                kwargs.pop('concurrency', 256),
+                kwargs.pop('timeout', 2),
+                kwargs.pop('deadline', 60),
+                kwargs.pop('samples', 3),
+            ),
+            self.ensureLoop(),
+        )
+
+        self.jobs[jobId] = {
+            'future': future,
+            'progressCallback': progressCallback,
+            'finishedCallback': finishedCallback,
+        }
+
+        # Also called if cancelled before the job starts
+        future.add_done_callback(lambda unused: self.jobFinished.emit(jobId))
+
+        return jobId
+
+    def cancel(self, jobId: int):
+        job = self.jobs.get(jobId)
+
+        if job is not None:
+            # Thread-safe. Finished callback still comes
+            job['future'].cancel()
+
+    def cancelAll(self):
+        for jobId in list(self.jobs.keys()):
+            self.cancel(jobId)
+
+    def isBusy(self) -> bool:
+        return len(self.jobs) > 0
+
+    @QtCore.Slot(int, object)
+    def handleResultsReady(self, jobId: int, results):
+        job = self.jobs.get(jobId)
+
+        if job is not None and callable(job['progressCallback']):
+            job['progressCallback'](results)
+
+    @QtCore.Slot(int)
+    def handleJobFinished(self, jobId: int):
+        job = self.jobs.pop(jobId, None)
+
+        if job is not None and callable(job['finishedCallback']):
+            job['finishedCallback']()
+
+    def cleanup(self):
+        if self.loop is not None:
+            for job in self.jobs.values():
+                job['future'].cancel()
+
+            self.loop.call_soon_threadsafe(self.loop.stop)
@@ -19,11 +19,12 @@ from __future__ import annotations
 
 from Furious.Utility import *
 
+from PySide6 import QtCore
 from PySide6.QtNetwork import *
 
-from typing import Union
+from typing import Tuple, Union
 
-__all__ = ['AppQNetworkAccessManager']
+__all__ = ['AppQNetworkAccessManager', 'EndpointProbe']
 
 
 class AppQNetworkAccessManager(QNetworkAccessManager):
@@ -53,3 +54,81 @@ class AppQNetworkAccessManager(QNetworkAccessManager):
             self.setProxy(QNetworkProxy.ProxyType.NoProxy)
 
         return useProxy
+
+
+class EndpointProbe(QtCore.QObject):
+    """
+    Checks whether local endpoints accept connections, without blocking.
+    The result of each probe is reported through the finished signal
+    """
+
+    finished = QtCore.Signal(bool)
+
+    # Connects not done by then count as not accepting, in milliseconds
+    PROBE_TIMEOUT = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._sockets = []
+        self._pending = 0
+
+        self._timeoutTimer = QtCore.QTimer()
+        self._timeoutTimer.setSingleShot(True)
+        self._timeoutTimer.timeout.connect(lambda: self.finish(False))
+
+    def isProbing(self) -> bool:
+        return len(self._sockets) > 0
+
+    def probe(self, endpoints: list[Tuple[str, int]]):
+        """
+        Starts a probe of endpoints, replacing the pending one if any.
+        Accepting only if all endpoints accept connections
+        """
+
+        self.abort()
+
+        if not endpoints:
+            return self.finished.emit(True)
+
+        self._sockets = list(QTcpSocket() for endpoint in endpoints)
+        self._pending = len(self._sockets)
+
+        for socket in self._sockets:
+            socket.connected.connect(self.handleConnected)
+            socket.errorOccurred.connect(lambda error: self.finish(False))
+
+        self._timeoutTimer.start(self.PROBE_TIMEOUT)
+
+        for socket, (host, port) in zip(list(self._sockets), endpoints):
+            if not self.isProbing():
+                # Finished by an error right away
+                break
+
+            socket.connectToHost(host, port)
+
+    @QtCore.Slot()
+    def handleConnected(self):
+        self._pending -= 1
+
+        if self._pending <= 0:
+            self.finish(True)
+
+    def finish(self, accepting: bool):
+        if not self.isProbing():
+            return
+
+        self.abort()
+        self.finished.emit(accepting)
+
+    def abort(self):
+        self._timeoutTimer.stop()
+
+        for socket in self._sockets:
+            # Aborted silently
+            socket.blockSignals(True)
+            socket.abort()
+            socket.deleteLater()
+
+        self._sockets = []
+        self._pending = 0
@@ -39,12 +39,14 @@ __all__ = [
     'AppQGroupBox',
     'AppQHeaderView',
     'AppQLabel',
+    'AppQLineEdit',
     'AppQListWidget',
     'AppQMainWindow',
     'AppQMenu',
     'AppQMenuBar',
     'AppQMessageBox',
     'AppQPushButton',
+    'AppQTableView',
     'AppQTableWidget',
     'AppQTabWidget',
     'AppQToolBar',
@@ -232,6 +234,14 @@ class AppQLabel(QTranslatable, QLabel):
         self.setText(_(self.text()))
 
 
+class AppQLineEdit(QTranslatable, QLineEdit):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def retranslate(self):
+        self.setPlaceholderText(_(self.placeholderText()))
+
+
 class AppQListWidget(SupportConnectedCallback, QListWidget):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -444,6 +454,64 @@ class AppQPushButton(QTranslatable, QPushButton):
         self.setText(_(self.text()))
 
 
+class AppQTableView(SupportConnectedCallback, QTableView):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.setWordWrap(False)
+
+    def columnCount(self) -> int:
+        model = self.model()
+
+        if model is None:
+            return 0
+        else:
+            return model.columnCount()
+
+    def sourceRow(self, index: QtCore.QModelIndex) -> int:
+        # Row of index in the source model
+        return index.row()
+
+    def viewIndex(self, row: int, column: int = 0) -> QtCore.QModelIndex:
+        # View index of source model row
+        return self.model().index(row, column)
+
+    @property
+    def selectedIndex(self):
+        return sorted(
+            list(set(self.sourceRow(index) for index in self.selectedIndexes()))
+        )
+
+    @staticmethod
+    def getStyleSheet(color):
+        return f'QTableView {{ selection-background-color: {color}; }}'
+
+    def setSelectionColor(self, color):
+        self.setStyleSheet(self.getStyleSheet(color))
+
+    def selectMultipleRows(self, indexes: list[int], clearCurrentSelection: bool):
+        if clearCurrentSelection:
+            self.selectionModel().clearSelection()
+
+        selection = self.selectionModel().selection()
+
+        for index in indexes:
+            selection.select(
+                self.viewIndex(index, 0),
+                self.viewIndex(index, self.columnCount() - 1),
+            )
+
+        self.selectionModel().select(
+            selection, QtCore.QItemSelectionModel.SelectionFlag.Select
+        )
+
+    def disconnectedCallback(self):
+        self.setSelectionColor(AppHue.disconnectedColor())
+
+    def connectedCallback(self):
+        self.setSelectionColor(AppHue.connectedColor())
+
+
 class AppQTableWidget(SupportConnectedCallback, QTableWidget):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -0,0 +1,165 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.Interface import *
+from Furious.Library import *
+from Furious.Utility import *
+
+from PySide6 import QtCore
+
+from typing import Callable
+
+import logging
+import itertools
+
+__all__ = ['ShareLinkParser']
+
+logger = logging.getLogger(__name__)
+
+
+class ShareLinkParserChunk(QtCore.QRunnable):
+    def __init__(self, parser, jobId: int, chunkIndex: int, start: int, lines, kwargs):
+        super().__init__()
+
+        self.parser = parser
+        self.jobId = jobId
+        self.chunkIndex = chunkIndex
+        self.start = start
+        self.lines = lines
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            factories, diagnostics = parseShareLinks(
+                self.lines, self.start, **self.kwargs
+            )
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            factories, diagnostics = [], [
+                ShareLinkDiagnostic(self.start + 1, '', f'Chunk failed: {ex}')
+            ]
+
+        # Queued to the thread parser lives in
+        self.parser.chunkParsed.emit(
+            self.jobId, self.chunkIndex, factories, diagnostics
+        )
+
+
+class ShareLinkParser(QtCore.QObject):
+    """
+    Parses share links in chunks on a dedicated thread pool. Parsed
+    factories are streamed back in line order as chunks complete
+    """
+
+    # Lines per chunk
+    CHUNK_SIZE = 64
+
+    chunkParsed = QtCore.Signal(int, int, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.threadPool = QtCore.QThreadPool(self)
+        self.jobCounter = itertools.count()
+        self.jobs = {}
+
+        self.chunkParsed.connect(self.handleChunkParsed)
+
+    def parse(
+        self,
+        lines: list[str],
+        progressCallback: Callable[[list[ConfigurationFactory]], None],
+        finishedCallback: Callable[[list[ShareLinkDiagnostic]], None],
+        **kwargs,
+    ) -> int:
+        """
+        Starts parsing lines. Both callbacks are called in the
+        thread this parser lives in
+
+        :param lines: Share links
+        :param progressCallback: Called with factories of each chunk, in order
+        :param finishedCallback: Called once with all diagnostics
+        :param kwargs: Extras for the constructed factories
+        :return: Job id
+        """
+
+        jobId = next(self.jobCounter)
+
+        starts = list(range(0, len(lines), self.CHUNK_SIZE))
+
+        self.jobs[jobId] = {
+            'chunkCount': len(starts),
+            'nextChunk': 0,
+            'pending': {},
+            'diagnostics': [],
+            'progressCallback': progressCallback,
+            'finishedCallback': finishedCallback,
+        }
+
+        if len(starts) == 0:
+            # Nothing to parse. Finish asynchronously anyway
+            QtCore.QTimer.singleShot(0, lambda: self.finishJob(jobId))
+
+            return jobId
+
+        for chunkIndex, start in enumerate(starts):
+            self.threadPool.start(
+                ShareLinkParserChunk(
+                    self,
+                    jobId,
+                    chunkIndex,
+                    start,
+                    lines[start : start + self.CHUNK_SIZE],
+                    kwargs,
+                )
+            )
+
+        return jobId
+
+    def finishJob(self, jobId: int):
+        job = self.jobs.pop(jobId, None)
+
+        if job is None:
+            return
+
+        if callable(job['finishedCallback']):
+            job['finishedCallback'](job['diagnostics'])
+
+    @QtCore.Slot(int, int, object, object)
+    def handleChunkParsed(self, jobId: int, chunkIndex: int, factories, diagnostics):
+        job = self.jobs.get(jobId)
+
+        if job is None:
+            return
+
+        job['pending'][chunkIndex] = factories, diagnostics
+
+        # Deliver in line order
+        while job['nextChunk'] in job['pending']:
+            factories, diagnostics = job['pending'].pop(job['nextChunk'])
+
+            job['nextChunk'] += 1
+            job['diagnostics'].extend(diagnostics)
+
+            if len(factories) > 0 and callable(job['progressCallback']):
+                job['progressCallback'](factories)
+
+        if job['nextChunk'] == job['chunkCount']:
+            self.finishJob(jobId)
@@ -35,9 +35,11 @@ import functools
 __all__ = [
     'AppQPlainTextEdit',
     'AppQTextBrowser',
+    'AppQPlainTextBrowser',
     'DraculaTextEditor',
     'DraculaJSONTextEditor',
     'DraculaTextBrowser',
+    'DraculaPlainTextBrowser',
 ]
 
 
@@ -262,6 +264,77 @@ class AppQTextBrowser(SupportPointSizeSettings, QTextBrowser):
         AppSettings.set(self.pointSizeSettingsName, str(self.font().pointSize()))
 
 
+class AppQPlainTextBrowser(SupportPointSizeSettings, QPlainTextEdit):
+    """
+    Read-only plain text view. Cheap to append many lines to
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+
+    def appendLines(self, lines: list[str], scrollEnds=None):
+        """
+        :param scrollEnds: Whether to scroll to the bottom afterward.
+                           By default only if it is near the bottom already
+        """
+
+        if not lines:
+            return
+
+        hScrollBar = self.horizontalScrollBar()
+        vScrollBar = self.verticalScrollBar()
+
+        if scrollEnds is None:
+            scrollEnds = vScrollBar.maximum() - vScrollBar.value() <= 10
+
+        # One insertion. Blocks beyond maximumBlockCount are
+        # removed from the top by the document itself
+        self.appendPlainText('\n'.join(lines))
+
+        if scrollEnds:
+            vScrollBar.setValue(vScrollBar.maximum())  # Scrolls to the bottom
+            hScrollBar.setValue(0)  # scroll to the left
+
+    def scrollToBottom(self):
+        self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        self.horizontalScrollBar().setValue(0)
+
+    def restorePointSize(self):
+        if self.pointSizeSettingsEmpty():
+            return
+
+        try:
+            # Restore point size
+            font = self.font()
+            font.setPointSize(int(AppSettings.get(self.pointSizeSettingsName)))
+
+            self.setFont(font)
+        except Exception:
+            # Any non-exit exceptions
+
+            pass
+
+    def wheelEvent(self, event):
+        if event.modifiers() == QtCore.Qt.KeyboardModifier.ControlModifier:
+            delta = event.angleDelta().y()
+
+            if delta > 0:
+                self.zoomIn()
+            if delta < 0:
+                self.zoomOut()
+        else:
+            super().wheelEvent(event)
+
+    def cleanup(self):
+        if self.pointSizeSettingsEmpty():
+            return
+
+        AppSettings.set(self.pointSizeSettingsName, str(self.font().pointSize()))
+
+
 class DraculaTextEditor(AppQPlainTextEdit):
     def __init__(self, *args, **kwargs):
         fontFamily = kwargs.pop('fontFamily', '')
@@ -320,3 +393,17 @@ class DraculaTextBrowser(AppQTextBrowser):
                 widgetName='QTextBrowser', fontFamily=fontFamily
             )
         )
+
+
+class DraculaPlainTextBrowser(AppQPlainTextBrowser):
+    def __init__(self, *args, **kwargs):
+        fontFamily = kwargs.pop('fontFamily', '')
+
+        super().__init__(*args, **kwargs)
+
+        # Theme
+        self.setStyleSheet(
+            DraculaEditorTheme.getStyleSheet(
+                widgetName='QPlainTextEdit', fontFamily=fontFamily
+            )
+        )
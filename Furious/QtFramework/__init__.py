@@ -23,6 +23,8 @@ from .DynamicTranslate import *
 from .QtGui import *
 from .QtWidgets import *
 from .QtNetwork import *
+from .ShareLinkParser import *
+from .LatencyTester import *
 from .UpdatesManager import *
 from .NetworkStateManager import *
 from .TextEditor import *
@@ -22,33 +22,198 @@ from Furious.PyFramework import *
 from Furious.Utility import *
 from Furious.Library import *
 
+import uuid
+import sqlite3
+import logging
+
 __all__ = ['UserServers']
 
+logger = logging.getLogger(__name__)
+
 registerAppSettings('Configuration')
 
 
+class UserServersDatabase:
+    """
+    Record-level server storage backed by SQLite. Each server is
+    one row, so only changed records are written on sync
+    """
+
+    FILENAME = 'UserServers.sqlite3'
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(str(path))
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS servers ('
+                'key TEXT PRIMARY KEY, '
+                'position INTEGER NOT NULL, '
+                'config TEXT NOT NULL, '
+                'extras TEXT NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS meta ('
+                'name TEXT PRIMARY KEY, '
+                'value TEXT NOT NULL)'
+            )
+
+            existing = list(
+                row[1] for row in self.connection.execute('PRAGMA table_info(servers)')
+            )
+
+            # Core name and cached display columns for lazy restore
+            for column in ['core', 'columns']:
+                if column not in existing:
+                    self.connection.execute(
+                        f'ALTER TABLE servers ADD COLUMN {column} '
+                        f'TEXT NOT NULL DEFAULT \'\''
+                    )
+
+    def getMeta(self, name: str) -> str:
+        row = self.connection.execute(
+            'SELECT value FROM meta WHERE name = ?', (name,)
+        ).fetchone()
+
+        return '' if row is None else row[0]
+
+    def records(self):
+        return self.connection.execute(
+            'SELECT key, position, core, config, extras, columns '
+            'FROM servers ORDER BY position'
+        )
+
+    def close(self):
+        self.connection.close()
+
+
 class UserServers(SupportExitCleanup, StorageFactory):
     # remark, config, subsId. (subsId corresponds to unique in user subscription)
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        def restore():
-            try:
-                return UJSONEncoder.decode(
-                    PyBase64Encoder.decode(AppSettings.get('Configuration'))
+        self._list = []
+
+        # id(factory) -> record key. Valid as long as the factory
+        # is referenced by self._synced
+        self._keys: dict[int, str] = {}
+        # record key -> (factory, position) as last written
+        self._synced: dict[str, tuple[ConfigurationFactory, int]] = {}
+
+        try:
+            self._database = UserServersDatabase(
+                getUserDataDir() / UserServersDatabase.FILENAME
+            )
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot open server database: {ex}. Use legacy storage')
+
+            self._database = None
+            self._list = self.restoreLegacy()
+        else:
+            if (
+                self._database.getMeta('migrated') == BinarySettings.ON_
+                or self.migrateLegacy()
+            ):
+                self.restore()
+            else:
+                # Legacy storage stays in use for this session. The
+                # database is not written, so migration is retried
+                # on next start
+                self._database.close()
+                self._database = None
+                self._list = self.restoreLegacy()
+
+    @staticmethod
+    def restoreLegacy() -> list[ConfigurationFactory]:
+        try:
+            data = UJSONEncoder.decode(
+                PyBase64Encoder.decode(AppSettings.get('Configuration'))
+            )
+        except Exception:
+            # Any non-exit exceptions
+
+            data = {'model': []}
+
+        return list(
+            constructFromAny(model.pop('config', ''), **model)
+            for model in data['model']
+        )
+
+    def migrateLegacy(self) -> bool:
+        legacy = self.restoreLegacy()
+
+        try:
+            with self._database.connection:
+                self._database.connection.executemany(
+                    'INSERT INTO servers (key, position, core, config, extras, columns) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    list(
+                        (uuid.uuid4().hex, position, *self.toRecord(factory))
+                        for position, factory in enumerate(legacy)
+                    ),
+                )
+                self._database.connection.execute(
+                    'INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',
+                    ('migrated', BinarySettings.ON_),
                 )
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'migrate legacy server storage failed: {ex}')
+
+            return False
+        else:
+            logger.info(f'migrated {len(legacy)} servers from legacy storage')
+
+            # Legacy value is no longer used. Remove it so that
+            # other settings writes do not carry it around
+            AppSettings.remove('Configuration')
+
+            return True
+
+    def restore(self):
+        for key, position, core, config, extras, columns in self._database.records():
+            try:
+                model = UJSONEncoder.decode(extras)
             except Exception:
                 # Any non-exit exceptions
 
-                return {'model': []}
+                model = {}
 
-        self._data = restore()
-        self._list = list(
-            constructFromAny(model.pop('config', ''), **model)
-            for model in self._data['model']
+            try:
+                columns = UJSONEncoder.decode(columns)
+            except Exception:
+                # Any non-exit exceptions
+
+                columns = None
+
+            # Parsed only when edited, exported, tested or connected
+            factory = constructFromStorage(core, config, columns, **model)
+            # Records without cached columns are written again
+            factory.setModified(not isinstance(columns, dict))
+
+            self._list.append(factory)
+            self._keys[id(factory)] = key
+            # Positions are rewritten densely on next sync
+            self._synced[key] = factory, position
+
+    @staticmethod
+    def toRecord(factory: ConfigurationFactory) -> tuple[str, str, str, str]:
+        storageObject = factory.toStorageObject()
+        config = storageObject.pop('config')
+
+        return (
+            factory.coreName(),
+            config,
+            UJSONEncoder.encode(storageObject),
+            UJSONEncoder.encode(factory.itemColumns()),
         )
 
-    def sync(self):
+    def syncLegacy(self):
         AppSettings.set(
             'Configuration',
             PyBase64Encoder.encode(
@@ -58,9 +223,82 @@ class UserServers(SupportExitCleanup, StorageFactory):
             ),
         )
 
+    def sync(self):
+        if self._database is None:
+            return self.syncLegacy()
+
+        inserts, updates, positions = [], [], []
+
+        visited, written = {}, []
+
+        for position, factory in enumerate(self._list):
+            key = self._keys.get(id(factory))
+
+            if key is None or key in visited:
+                key = uuid.uuid4().hex
+
+                factory.setModified(False)
+                written.append(factory)
+
+                inserts.append((key, position, *self.toRecord(factory)))
+            elif factory.isModified():
+                factory.setModified(False)
+                written.append(factory)
+
+                updates.append((position, *self.toRecord(factory), key))
+            elif self._synced[key][1] != position:
+                positions.append((position, key))
+
+            visited[key] = factory, position
+
+        deletes = list((key,) for key in self._synced if key not in visited)
+
+        if not inserts and not updates and not positions and not deletes:
+            return
+
+        try:
+            with self._database.connection as connection:
+                connection.executemany('DELETE FROM servers WHERE key = ?', deletes)
+                connection.executemany(
+                    'INSERT INTO servers (key, position, core, config, extras, columns) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    inserts,
+                )
+                connection.executemany(
+                    'UPDATE servers SET '
+                    'position = ?, core = ?, config = ?, extras = ?, columns = ? '
+                    'WHERE key = ?',
+                    updates,
+                )
+                connection.executemany(
+                    'UPDATE servers SET position = ? WHERE key = ?', positions
+                )
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'sync server database failed: {ex}')
+
+            # Write them again next time
+            for factory in written:
+                factory.setModified(True)
+
+            return
+
+        logger.info(
+            f'server database synced. '
+            f'Inserted: {len(inserts)}, updated: {len(updates)}, '
+            f'moved: {len(positions)}, deleted: {len(deletes)}'
+        )
+
+        self._synced = visited
+        self._keys = dict((id(value[0]), key) for key, value in visited.items())
+
     def data(self) -> list[ConfigurationFactory]:
         # Shallow copy
         return self._list
 
     def cleanup(self):
         self.sync()
+
+        if self._database is not None:
+            self._database.close()
@@ -28,7 +28,9 @@ registerAppSettings('CustomSubscription')
 
 
 class UserSubs(SupportExitCleanup, StorageFactory):
-    # unique: remark, webURL
+    # unique: remark, webURL, [etag, lastModified, contentHash]
+    CacheKeys = ['etag', 'lastModified', 'contentHash']
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -52,6 +54,24 @@ class UserSubs(SupportExitCleanup, StorageFactory):
             ),
         )
 
+    def updateCache(self, unique: str, **kwargs):
+        subs = self._data.get(unique)
+
+        if subs is None:
+            # Subscription deleted while updating
+            return
+
+        for key in UserSubs.CacheKeys:
+            value = kwargs.get(key, '')
+
+            if value:
+                subs[key] = value
+            else:
+                subs.pop(key, None)
+
+    def clearCache(self, unique: str):
+        self.updateCache(unique)
+
     def data(self) -> dict[str, dict]:
         # Shallow copy
         return self._data
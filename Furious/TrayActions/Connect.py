@@ -57,6 +57,8 @@ needTrans(
     'Connection to server has been lost',
     'Core terminated unexpectedly',
     'Disconnected',
+    'Switched to',
+    'Configuration reloaded',
 )
 
 
@@ -75,6 +77,14 @@ def validateProxyServer(server) -> bool:
 
 
 class ConnectAction(AppQAction):
+    # Maximum time for a core switched to to accept connections, in milliseconds
+    SWITCH_WAIT_TIME = 2500
+    # Interval between two readiness checks of it, in milliseconds
+    SWITCH_CHECK_INTERVAL = 50
+    # Delay before trying the configured local endpoints again, in milliseconds
+    HOMING_RETRY_DELAY = 5000
+    HOMING_MAX_ATTEMPTS = 3
+
     def __init__(self, **kwargs):
         super().__init__(
             _('Connect'),
@@ -86,9 +96,36 @@ class ConnectAction(AppQAction):
         self.actionQueue = queue.Queue()
         self.coreManager = CoreManager()
         self.progressBar = ConnectProgressBar()
+        self.failoverManager = FailoverManager()
+
+        # Served by the running core. May differ from the configuration after failover
+        self.httpProxyEndpoint = ''
+        self.activeFactory = None
+        # Consecutive failed connectivity probes
+        self.probeFailures = 0
+
+        # Core started next to the running one, not switched to yet:
+        # (core manager, server, http proxy endpoint, ready endpoints, callback)
+        self.pendingSwitch = None
+        self.switchElapsedTimer = QtCore.QElapsedTimer()
+        self.switchTimer = QtCore.QTimer()
+        self.switchTimer.setSingleShot(True)
+        self.switchTimer.timeout.connect(lambda: self.checkSwitch())
+        self.switchProbe = EndpointProbe()
+        self.switchProbe.finished.connect(
+            lambda accepting: self.handleSwitchProbed(accepting)
+        )
 
+        # Attempts to serve on the configured local endpoints again
+        self.homingAttempts = 0
+        self.homingTimer = QtCore.QTimer()
+        self.homingTimer.setSingleShot(True)
+        self.homingTimer.timeout.connect(lambda: self.startHoming())
+
+        # Runs queued actions once control is back in the event loop
         self.actionTimer = QtCore.QTimer()
-        self.actionTimer.timeout.connect(lambda: self.callActionFromQueue())
+        self.actionTimer.setSingleShot(True)
+        self.actionTimer.timeout.connect(lambda: self.callAllActionsFromQueue())
 
     def reset(self):
         self.hideProgressBar(True)
@@ -160,10 +197,18 @@ class ConnectAction(AppQAction):
         SystemProxy.off()
 
         self.actionTimer.stop()
+        self.homingTimer.stop()
+        self.homingAttempts = 0
 
+        self.cancelSwitch()
+        self.failoverManager.reset()
         self.coreManager.stopAll()
         self.reset()
 
+        self.httpProxyEndpoint = ''
+        self.activeFactory = None
+        self.probeFailures = 0
+
         while not self.actionQueue.empty():
             try:
                 unused = self.actionQueue.get_nowait()
@@ -179,6 +224,260 @@ class ConnectAction(AppQAction):
 
         APP().systemTray.showMessage(message)
 
+    def doFailoverOrDisconnect(self, message: str):
+        if not self.doFailover():
+            self.doDisconnectWithTrayMessage(message)
+
+    def doFailover(self) -> bool:
+        """
+        Hands over to the standby core, if it is ready
+
+        :return: True if switched
+        """
+
+        if not self.isConnected() or not FailoverManager.isEnabled():
+            return False
+
+        result = self.failoverManager.takeOver()
+
+        if result is None:
+            logger.info('failover skipped. Standby core not ready')
+
+            return False
+
+        coreManager, factory, httpProxyEndpoint = result
+
+        # Superseded
+        self.cancelSwitch()
+
+        # Point the system proxy at the standby before stopping the old core
+        SystemProxy.set(httpProxyEndpoint, PROXY_SERVER_BYPASS)
+
+        self.failoverManager.exclude(self.activeFactory)
+        self.coreManager.stopAll()
+        self.coreManager = coreManager
+
+        self.httpProxyEndpoint = httpProxyEndpoint
+        self.activeFactory = factory
+        self.probeFailures = 0
+
+        for index, server in enumerate(AS_UserServers()):
+            if server is factory:
+                APP().mainWindow.userServersQTableWidget.activateItemByIndex(
+                    index, True
+                )
+
+                break
+
+        logger.info(f'failover to \'{factory.getExtras("remark")}\' success')
+
+        APP().systemTray.showMessage(
+            _('Switched to') + f' {factory.getExtras("remark")}'
+        )
+
+        # Prepare the next one
+        self.failoverManager.startStandby(factory)
+
+        # The standby serves on other ports. Move back to the configured ones
+        self.homingAttempts = 0
+        self.startHoming()
+
+        return True
+
+    def startSwitch(
+        self, factory: ConfigurationFactory, copy: ConfigurationFactory, callback
+    ) -> bool:
+        """
+        Starts a core for copy of factory next to the running one. Does
+        not block. Once it accepts connections the system proxy is pointed
+        at it and the running core is stopped
+
+        :param callback: Called with True once switched, False on failure
+        :return: True if the core started
+        """
+
+        self.cancelSwitch()
+
+        coreManager = CoreManager()
+
+        def exitCallback(core, exitcode):
+            if coreManager is self.coreManager:
+                self.coreExitCallback(core, exitcode)
+            else:
+                # Not switched to yet. Found by the readiness check
+                pass
+
+        if not coreManager.start(
+            copy,
+            routing=AppSettings.get('Routing'),
+            exitCallback=exitCallback,
+            msgCallback=self.coreMsgCallback,
+            deepcopy=False,
+            proxyModeOnly=True,
+            waitCore=False,
+        ):
+            coreManager.stopAll()
+
+            return False
+
+        self.pendingSwitch = (
+            coreManager,
+            factory,
+            copy.httpProxyEndpoint(),
+            list(
+                filter(
+                    None,
+                    (
+                        parseLocalEndpoint(endpoint)
+                        for endpoint in [
+                            copy.httpProxyEndpoint(),
+                            copy.socksProxyEndpoint(),
+                        ]
+                    ),
+                )
+            ),
+            callback,
+        )
+
+        self.switchElapsedTimer.start()
+        self.switchTimer.start(self.SWITCH_CHECK_INTERVAL)
+
+        return True
+
+    def cancelSwitch(self):
+        self.switchTimer.stop()
+        self.switchProbe.abort()
+
+        if self.pendingSwitch is not None:
+            coreManager = self.pendingSwitch[0]
+
+            self.pendingSwitch = None
+
+            coreManager.stopAll()
+
+    def checkSwitch(self):
+        if self.pendingSwitch is None:
+            return
+
+        (
+            coreManager,
+            factory,
+            httpProxyEndpoint,
+            readyEndpoints,
+            callback,
+        ) = self.pendingSwitch
+
+        if not coreManager.allRunning():
+            logger.error(f'core for {httpProxyEndpoint} exited before switched to')
+
+            self.cancelSwitch()
+
+            return callback(False)
+
+        # Result handled once the connects are done
+        self.switchProbe.probe(readyEndpoints)
+
+    def handleSwitchProbed(self, accepting: bool):
+        if self.pendingSwitch is None:
+            return
+
+        (
+            coreManager,
+            factory,
+            httpProxyEndpoint,
+            readyEndpoints,
+            callback,
+        ) = self.pendingSwitch
+
+        if not accepting:
+            if self.switchElapsedTimer.elapsed() >= self.SWITCH_WAIT_TIME:
+                logger.error(
+                    f'core for {httpProxyEndpoint} not accepting '
+                    f'after {self.SWITCH_WAIT_TIME}ms'
+                )
+
+                self.cancelSwitch()
+
+                return callback(False)
+            else:
+                # Check again later
+                return self.switchTimer.start(self.SWITCH_CHECK_INTERVAL)
+
+        self.pendingSwitch = None
+
+        SystemProxy.set(httpProxyEndpoint, PROXY_SERVER_BYPASS)
+
+        # Connections through the old core are dropped only now
+        self.coreManager.stopAll()
+        self.coreManager = coreManager
+
+        self.httpProxyEndpoint = httpProxyEndpoint
+        self.activeFactory = factory
+        self.probeFailures = 0
+
+        callback(True)
+
+    def startHoming(self):
+        """
+        Moves the active server back to its configured local endpoints,
+        if served on others after failover. Apps pinned to them and socks
+        clients use these. Does not block
+        """
+
+        self.homingTimer.stop()
+
+        factory = self.activeFactory
+
+        if not self.isConnected() or factory is None:
+            return
+
+        if self.httpProxyEndpoint == factory.httpProxyEndpoint():
+            # Already there
+            return
+
+        self.homingAttempts += 1
+
+        def callback(success):
+            if success:
+                self.homingAttempts = 0
+
+                logger.info(f'serving on configured endpoint {self.httpProxyEndpoint}')
+            else:
+                self.retryHoming()
+
+        if not self.startSwitch(factory, factory.deepcopy(), callback):
+            self.retryHoming()
+
+    def retryHoming(self):
+        if self.homingAttempts < self.HOMING_MAX_ATTEMPTS:
+            self.homingTimer.start(self.HOMING_RETRY_DELAY)
+        else:
+            logger.error(
+                f'cannot serve on configured endpoint '
+                f'{self.activeFactory.httpProxyEndpoint()}. '
+                f'Staying on {self.httpProxyEndpoint}'
+            )
+
+    def reportConnectivity(self, success: bool):
+        if not self.isConnected():
+            return
+
+        if success:
+            self.probeFailures = 0
+
+            return
+
+        self.probeFailures += 1
+
+        if self.probeFailures >= FailoverManager.probeFailuresThreshold():
+            logger.error(
+                f'connectivity probe failed {self.probeFailures} times in a row'
+            )
+
+            # Keep the current core if no standby is ready
+            if not self.doFailover():
+                self.probeFailures = 0
+
     def doConnect(self):
         # Connect action
         assert self.textCompare('Connect')
@@ -253,12 +552,13 @@ class ConnectAction(AppQAction):
         # Clear previous log
         APP().logViewerWindowCore.clear()
         APP().logViewerWindowTun_.clear()
+        APP().mainWindow.connectionsWindow.clear()
 
         success = self.coreManager.start(
             config,
             routing=AppSettings.get('Routing'),
             exitCallback=self.coreExitCallback,
-            msgCallback=lambda line: APP().logViewerWindowCore.appendLine(line),
+            msgCallback=self.coreMsgCallback,
             tunMsgCallback=lambda line: APP().logViewerWindowTun_.appendLine(line),
         )
 
@@ -266,17 +566,15 @@ class ConnectAction(AppQAction):
             if success:
                 SystemProxy.set(config.httpProxyEndpoint(), PROXY_SERVER_BYPASS)
 
+                self.httpProxyEndpoint = config.httpProxyEndpoint()
+                self.activeFactory = config
+                self.probeFailures = 0
+
                 self.doConnected()
 
                 APP().systemTray.showMessage(f'{config.coreName()}: ' + _('Connected'))
 
-                if AppSettings.isStateON_('PowerSaveMode'):
-                    # Power optimization
-                    logger.info(f'no action queue in power save mode')
-
-                    self.actionTimer.stop()
-                else:
-                    self.actionTimer.start(CORE_CHECK_ALIVE_INTERVAL)
+                self.failoverManager.startStandby(config)
             else:
                 logger.error('failed to start core manager')
 
@@ -285,8 +583,67 @@ class ConnectAction(AppQAction):
                     f'{config.coreName()}: ' + _('Unknown error')
                 )
         else:
-            while not self.actionQueue.empty():
-                self.callActionFromQueue()
+            self.callAllActionsFromQueue()
+
+    @staticmethod
+    def coreMsgCallback(line: str):
+        APP().logViewerWindowCore.appendLine(line)
+        # Access log lines are counted, the rest ignored
+        APP().mainWindow.connectionsWindow.feed(line)
+
+    def doReconnect(self):
+        self.doDisconnect()
+        self.trigger()
+
+    def doReload(self):
+        """
+        Applies the current configuration and routing to the running
+        connection. The old core releases the configured endpoints and
+        the new core starts on them. Does not block: the connection is
+        kept and only the core start is waited out, instead of a full
+        reconnect
+        """
+
+        if not self.isConnected():
+            return
+
+        if isVPNMode() or AppSettings.get('SystemProxyMode') != 'Auto':
+            # Switching sets the system proxy, and tun2socks cannot be
+            # re-pointed. Restart everything
+            return self.doReconnect()
+
+        try:
+            config = AS_UserServers()[AS_UserActivatedItemIndex()]
+        except Exception:
+            # Any non-exit exceptions
+
+            return self.doReconnect()
+
+        def callback(success):
+            if not success:
+                logger.error('reload failed. Reconnecting')
+
+                return self.doReconnect()
+
+            logger.info(f'configuration reloaded on {self.httpProxyEndpoint}')
+
+            APP().systemTray.showMessage(
+                f'{config.coreName()}: ' + _('Configuration reloaded')
+            )
+
+            self.failoverManager.startStandby(config)
+
+        # A reload or homing still starting its core is superseded
+        self.cancelSwitch()
+        self.homingTimer.stop()
+
+        # Release the configured endpoints
+        self.coreManager.stopAll()
+
+        if not self.startSwitch(config, config.deepcopy(), callback):
+            logger.error('reload failed. Reconnecting')
+
+            return self.doReconnect()
 
     def callActionFromQueue(self):
         try:
@@ -303,6 +660,10 @@ class ConnectAction(AppQAction):
             if callable(action):
                 action()
 
+    def callAllActionsFromQueue(self):
+        while not self.actionQueue.empty():
+            self.callActionFromQueue()
+
     def coreExitCallback(self, core: CoreFactory, exitcode: int):
         def putItem(item):
             try:
@@ -311,6 +672,10 @@ class ConnectAction(AppQAction):
                 # Any non-exit exceptions
 
                 pass
+            else:
+                if self.isConnected():
+                    # While connecting the queue is run once the core started
+                    self.actionTimer.start(0)
 
         if exitcode == CoreFactory.ExitCode.SystemShuttingDown:
             # System shutting down. Do nothing
@@ -319,7 +684,7 @@ class ConnectAction(AppQAction):
         if exitcode == CoreFactory.ExitCode.ConfigurationError:
             return putItem(
                 functools.partial(
-                    self.doDisconnectWithTrayMessage,
+                    self.doFailoverOrDisconnect,
                     f'{core.name()}: ' + _('Invalid server configuration'),
                 )
             )
@@ -327,7 +692,7 @@ class ConnectAction(AppQAction):
         if exitcode == CoreFactory.ExitCode.ServerStartFailure:
             return putItem(
                 functools.partial(
-                    self.doDisconnectWithTrayMessage,
+                    self.doFailoverOrDisconnect,
                     f'{core.name()}: ' + _('Failed to start core'),
                 )
             )
@@ -336,14 +701,14 @@ class ConnectAction(AppQAction):
             if exitcode == Hysteria1.ExitCode.RemoteNetworkError:
                 return putItem(
                     functools.partial(
-                        self.doDisconnectWithTrayMessage,
+                        self.doFailoverOrDisconnect,
                         f'{core.name()}: ' + _('Connection to server has been lost'),
                     )
                 )
 
         return putItem(
             functools.partial(
-                self.doDisconnectWithTrayMessage,
+                self.doFailoverOrDisconnect,
                 f'{core.name()}: ' + _('Core terminated unexpectedly'),
             )
         )
@@ -234,11 +234,13 @@ class ImportURIFromClipboardAction(AppQAction):
     def __init__(self, **kwargs):
         super().__init__(_('Import Share Link From Clipboard'), **kwargs)
 
+        self.shareLinkParser = ShareLinkParser(parent=self)
+
     def triggeredCallback(self, checked):
         clipboard = QApplication.clipboard().text().strip()
 
         try:
-            split = clipboard.split('\n')
+            split = list(line.strip() for line in clipboard.split('\n'))
         except Exception:
             # Any non-exit exceptions
 
@@ -247,33 +249,38 @@ class ImportURIFromClipboardAction(AppQAction):
             imported = list()
             rowCount = len(AS_UserServers())
 
-            for uri in split:
-                factory = constructFromAny(uri)
-
-                if factory.isValid():
-                    APP().mainWindow.appendNewItemByFactory(factory)
+            def progressCallback(factories: list[ConfigurationFactory]):
+                APP().mainWindow.appendNewItemsByFactory(factories)
 
-                    imported.append(factory.getExtras('remark'))
+                imported.extend(factory.getExtras('remark') for factory in factories)
 
-            if len(imported) == 0:
-                showImportErrorMBox(clipboard)
-            else:
-                if len(imported) == 1:
-                    # Fall back to single
-                    mbox = ImportSuccessMBox(icon=AppQMessageBox.Icon.Information)
-                    mbox.remark = imported[0]
-                    mbox.setText(mbox.customText())
+            def finishedCallback(diagnostics: list[ShareLinkDiagnostic]):
+                for diagnostic in diagnostics:
+                    logger.error(f'invalid item in clipboard. {diagnostic}')
 
-                    # Show the MessageBox asynchronously
-                    mbox.open()
+                if len(imported) == 0:
+                    showImportErrorMBox(clipboard)
                 else:
-                    mbox = ImportMultiSuccessMBox(icon=AppQMessageBox.Icon.Information)
-                    mbox.imported = imported
-                    mbox.rowCount = rowCount
-                    mbox.setText(mbox.customText())
-
-                    # Show the MessageBox asynchronously
-                    mbox.open()
+                    if len(imported) == 1:
+                        # Fall back to single
+                        mbox = ImportSuccessMBox(icon=AppQMessageBox.Icon.Information)
+                        mbox.remark = imported[0]
+                        mbox.setText(mbox.customText())
+
+                        # Show the MessageBox asynchronously
+                        mbox.open()
+                    else:
+                        mbox = ImportMultiSuccessMBox(
+                            icon=AppQMessageBox.Icon.Information
+                        )
+                        mbox.imported = imported
+                        mbox.rowCount = rowCount
+                        mbox.setText(mbox.customText())
+
+                        # Show the MessageBox asynchronously
+                        mbox.open()
+
+            self.shareLinkParser.parse(split, progressCallback, finishedCallback)
 
 
 needTrans('Import JSON Configuration From Clipboard')
@@ -43,8 +43,7 @@ class RoutingChildAction(AppQAction):
             AppSettings.set('Routing', textEnglish)
 
             if APP().isSystemTrayConnected():
-                APP().systemTray.ConnectAction.doDisconnect()
-                APP().systemTray.ConnectAction.trigger()
+                APP().systemTray.ConnectAction.doReload()
 
 
 needTrans('Routing')
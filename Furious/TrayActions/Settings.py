@@ -118,6 +118,32 @@ class SettingsChildAction(AppQAction):
                 AppSettings.turnOFF('PowerSaveMode')
 
             showNewChangesNextTimeMBox()
+        elif self.textCompare('Save Logs To Disk'):
+            if checked:
+                AppSettings.turnON_('SpillLogsToDisk')
+            else:
+                AppSettings.turnOFF('SpillLogsToDisk')
+
+            for window in [
+                APP().logViewerWindowApp_,
+                APP().logViewerWindowCore,
+                APP().logViewerWindowTun_,
+            ]:
+                window.setSpillEnabled(checked)
+        elif self.textCompare('Automatic Failover'):
+            ConnectAction = APP().systemTray.ConnectAction
+
+            if checked:
+                AppSettings.turnON_('Failover')
+
+                if ConnectAction.isConnected():
+                    ConnectAction.failoverManager.startStandby(
+                        ConnectAction.activeFactory
+                    )
+            else:
+                AppSettings.turnOFF('Failover')
+
+                ConnectAction.failoverManager.stopStandby()
         elif self.textCompare('Show Progress Bar When Connecting'):
             if checked:
                 AppSettings.turnON_('ShowProgressBarWhenConnecting')
@@ -140,6 +166,8 @@ needTrans(
     'Use Monochrome Tray Icon',
     'Startup On Boot',
     'Power Save Mode',
+    'Save Logs To Disk',
+    'Automatic Failover',
     'Show Progress Bar When Connecting',
     'Show Tab And Spaces In Editor',
 )
@@ -184,6 +212,16 @@ class SettingsAction(AppQAction):
                     checkable=True,
                     checked=AppSettings.isStateON_('PowerSaveMode'),
                 ),
+                SettingsChildAction(
+                    _('Save Logs To Disk'),
+                    checkable=True,
+                    checked=AppSettings.isStateON_('SpillLogsToDisk'),
+                ),
+                SettingsChildAction(
+                    _('Automatic Failover'),
+                    checkable=True,
+                    checked=AppSettings.isStateON_('Failover'),
+                ),
                 AppQSeperator(),
                 SettingsChildAction(
                     _('Show Progress Bar When Connecting'),
@@ -63,6 +63,12 @@ class AppSettings:
 
     @staticmethod
     def get(key: str):
+        """
+        :return: The stored value. Free-form settings never set return
+                 their registered default, range settings out of range
+                 are reset to it
+        """
+
         settings = AppSettings.SettingsPool.get(key)
 
         if settings is None:
@@ -72,6 +78,10 @@ class AppSettings:
 
         value = QtCore.QSettings().value(settings.name)
 
+        if value is None and settings.validRange is None:
+            # Not set yet. Free-form settings fall back to default
+            return settings.default
+
         if settings.validate(value):
             return value
         else:
@@ -119,6 +129,17 @@ class AppSettings:
             # Value not in valid range, raise exception
             raise ValueError(f'Invalid AppSettings value \'{value}\' for \'{key}\'')
 
+    @staticmethod
+    def remove(key: str):
+        settings = AppSettings.SettingsPool.get(key)
+
+        if settings is None:
+            raise AttributeError(f'AppSettings \'{key}\' not found')
+
+        assert isinstance(settings, AppSettings)
+
+        QtCore.QSettings().remove(settings.name)
+
     @staticmethod
     def turnON_(key: str):
         AppSettings.set(key, BinarySettings.ON_)
@@ -69,8 +69,6 @@ if PLATFORM == 'Windows':
         # https://github.com/2dust/v2rayN/issues/4334
         PROXY_SERVER_BYPASS += ';<local>'
 
-CORE_CHECK_ALIVE_INTERVAL = 2500
-
 if PLATFORM == 'Windows':
     APPLICATION_TUN_DEVICE_NAME = APPLICATION_NAME
 elif PLATFORM == 'Darwin':
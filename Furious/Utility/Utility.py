@@ -19,9 +19,13 @@ from __future__ import annotations
 
 from Furious.Utility.Constants import *
 
+from PySide6 import QtCore
+
 from typing import AnyStr, Tuple
 
 import os
+import socket
+import pathlib
 import ujson
 import operator
 import functools
@@ -37,6 +41,10 @@ __all__ = [
     'parseHostPort',
     'runExternalCommand',
     'getAbsolutePath',
+    'getUserDataDir',
+    'getFreeLocalPort',
+    'parseLocalEndpoint',
+    'isEndpointAccepting',
     'versionToValue',
     'getXrayProxyOutboundObject',
     'getXrayProxyOutboundStream',
@@ -114,6 +122,70 @@ def getAbsolutePath(path):
     return path if os.path.isabs(path) else str(ROOT_DIR / path)
 
 
+def getUserDataDir() -> pathlib.Path:
+    # Writable per-user data directory. Depends on application and
+    # organization name, so it must be called after they are set
+    userDataDir = pathlib.Path(
+        QtCore.QStandardPaths.writableLocation(
+            QtCore.QStandardPaths.StandardLocation.AppDataLocation
+        )
+    )
+
+    try:
+        userDataDir.mkdir(parents=True, exist_ok=True)
+    except Exception:
+        # Any non-exit exceptions
+
+        pass
+
+    return userDataDir
+
+
+def getFreeLocalPort(exclude=()) -> int:
+    # Let the system pick an unused loopback port. Ports in
+    # exclude are handed out already but may not be bound yet
+    for retry in range(16):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(('127.0.0.1', 0))
+
+            port = sock.getsockname()[1]
+
+        if port not in exclude:
+            return port
+
+    raise OSError('No free local port')
+
+
+def parseLocalEndpoint(endpoint: str) -> Tuple[str, int] | None:
+    # Inbound listen address to the one a local client connects to
+    try:
+        host, port = parseHostPort(endpoint)
+
+        port = int(port)
+    except Exception:
+        # Any non-exit exceptions
+
+        return None
+
+    if not host or host == '0.0.0.0':
+        host = '127.0.0.1'
+    elif host == '::':
+        host = '::1'
+
+    return host, port
+
+
+def isEndpointAccepting(host: str, port: int, timeout: float = 0.05) -> bool:
+    # Loopback connects are refused or accepted right away
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except Exception:
+        # Any non-exit exceptions
+
+        return False
+
+
 def versionToValue(version: str) -> int:
     def _split():
         # x.y or x.y.z or x.y.z.u
@@ -201,16 +201,23 @@ class Application(ApplicationFactory, SingletonApplication):
             tabTitle=_('Furious Log'),
             fontFamily=self.customFontName,
             pointSizeSettingsName='AppLogViewerWidgetPointSize',
+            spillName='Furious',
         )
         self.logViewerWindowCore = LogViewerWindow(
             tabTitle=_('Core Log'),
             fontFamily=self.customFontName,
             pointSizeSettingsName='CoreLogViewerWidgetPointSize',
+            spillName='Core',
+            msgStats=lambda: self.systemTray.ConnectAction.coreManager.msgStats(),
         )
         self.logViewerWindowTun_ = LogViewerWindow(
             tabTitle=_('Tun2socks Log'),
             fontFamily=self.customFontName,
             pointSizeSettingsName='TunLogViewerWidgetPointSize',
+            spillName='Tun2socks',
+            msgStats=lambda: self.systemTray.ConnectAction.coreManager.msgStats(
+                tun=True
+            ),
         )
 
         logging.basicConfig(
@@ -302,6 +309,9 @@ class Application(ApplicationFactory, SingletonApplication):
             self.addCustomFont()
             self.configureLogging()
 
+            CoreLogFiles.cleanupStale()
+            CoreProcess.startLauncher()
+
             logger.info(f'application version: {APPLICATION_VERSION}')
             logger.info(
                 f'Qt version: {QtCore.qVersion()}. PySide6 version: {PYSIDE6_VERSION}'
@@ -39,12 +39,15 @@ from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 from PySide6.QtNetwork import *
 
+from abc import ABCMeta, abstractmethod
 from typing import Callable, Union, Sequence, MutableSequence
 
-import queue
+import math
+import time
+import hashlib
 import logging
-import icmplib
 import functools
+import collections
 
 __all__ = ['UserServersQTableWidget']
 
@@ -52,15 +55,47 @@ logger = logging.getLogger(__name__)
 
 registerAppSettings('ActivatedItemIndex')
 registerAppSettings('ServerWidgetSectionSizeTable')
+registerAppSettings('LatencyTestConcurrency', default='256')
+registerAppSettings('LatencyTestDeadline', default='60')
+registerAppSettings('LatencyTestSamples', default='3')
+registerAppSettings('SpeedTestConcurrency', default='4')
+registerAppSettings(
+    'SpeedTestTarget',
+    default='http://speed.cloudflare.com/__down?during=download&bytes=104857600',
+)
+# Bytes
+registerAppSettings('SpeedTestByteBudget', default='104857600')
+# Seconds
+registerAppSettings('SpeedTestDuration', default='5')
+registerAppSettings('SpeedTestWarmUp', default='1')
+registerAppSettings('URLTestConcurrency', default='16')
+registerAppSettings('URLTestTarget', default='https://www.gstatic.com/generate_204')
 
 needTrans = functools.partial(needTransFn, source=__name__)
 
 
 class SubscriptionManager(AppQNetworkAccessManager):
+    # Maximum number of subscriptions fetched at the same time
+    MAX_CONCURRENT_REQUESTS = 4
+    # Transfer timeout of each subscription, in milliseconds
+    REQUEST_TIMEOUT = 30000
+
     def __init__(self, parent):
         super().__init__(parent)
 
         self.networkReplyTable = {}
+        self.pendingRequests = collections.deque()
+
+    @staticmethod
+    def hasSubsItems(unique: str) -> bool:
+        return any(server.getExtras('subsId') == unique for server in AS_UserServers())
+
+    @staticmethod
+    def rawHeader(networkReply: QNetworkReply, name: bytes) -> str:
+        if networkReply.hasRawHeader(name):
+            return networkReply.rawHeader(name).data().decode('utf-8', 'replace')
+        else:
+            return ''
 
     def handleFinishedByNetworkReply(self, networkReply):
         assert isinstance(networkReply, QNetworkReply)
@@ -72,67 +107,59 @@ class SubscriptionManager(AppQNetworkAccessManager):
 
         if networkReply.error() != QNetworkReply.NetworkError.NoError:
             logger.error(f'update subs {webURL} failed. {networkReply.errorString()}')
+        elif (
+            networkReply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+            == 304
+        ):
+            logger.info(f'update subs {webURL} success. Content not modified')
         else:
-            logger.info(f'update subs {webURL} success')
-
-            try:
-                data = networkReply.readAll().data()
-
-                uris = list(
-                    filter(
-                        lambda x: x != '',
-                        PyBase64Encoder.decode(data).decode().split('\n'),
-                    )
-                )
-            except Exception as ex:
-                # Any non-exit exceptions
-
-                logger.error(f'parse share link failed: {ex}')
-            else:
-                parent = self.parent()
+            data = networkReply.readAll().data()
+            contentHash = hashlib.sha256(data).hexdigest()
 
-                if isinstance(parent, UserServersQTableWidget):
-                    isConnected = APP().isSystemTrayConnected()
+            subs = AS_UserSubscription().get(unique, {})
 
-                    subsIndexes = list(
-                        index
-                        for index, server in enumerate(AS_UserServers())
-                        if server.getExtras('subsId') == unique
-                    )
+            # Read now. The reply is deleted before the merge finishes
+            etag = self.rawHeader(networkReply, b'ETag')
+            lastModified = self.rawHeader(networkReply, b'Last-Modified')
 
-                    subsGroupIndex = -1
-                    activatedIndex = AS_UserActivatedItemIndex()
-
-                    if activatedIndex in subsIndexes:
-                        for index, server in enumerate(AS_UserServers()):
-                            if index <= activatedIndex:
-                                if server.getExtras('subsId') == unique:
-                                    subsGroupIndex += 1
-                            else:
-                                break
-
-                    parent.deleteItemByIndex(
-                        subsIndexes, showTrayMessage=bool(subsGroupIndex < 0)
-                    )
+            def updateCache():
+                APP().userSubs.updateCache(
+                    unique,
+                    etag=etag,
+                    lastModified=lastModified,
+                    contentHash=contentHash,
+                )
+                APP().userSubs.sync()
 
-                    remaining = len(AS_UserServers())
+            if contentHash == subs.get('contentHash') and self.hasSubsItems(unique):
+                logger.info(f'update subs {webURL} success. Content unchanged')
 
-                    for uri in uris:
-                        parent.appendNewItem(config=uri, subsId=unique)
+                # Validators may rotate while the content stays the same
+                updateCache()
+            else:
+                logger.info(f'update subs {webURL} success')
 
-                    if subsGroupIndex >= 0:
-                        newIndex = remaining + subsGroupIndex
+                try:
+                    uris = decodeShareLinks(data)
+                except Exception as ex:
+                    # Any non-exit exceptions
 
-                        if newIndex < len(AS_UserServers()):
-                            parent.activateItemByIndex(newIndex, True)
+                    logger.error(f'parse share link failed: {ex}')
+                else:
+                    parent = self.parent()
 
-                            if isConnected and not APP().isSystemTrayConnected():
-                                # Trigger connect
-                                APP().systemTray.ConnectAction.trigger()
+                    if isinstance(parent, UserServersQTableWidget):
+                        # Cached once merged. A merge that never finishes
+                        # leaves the old validators, so it is fetched again
+                        parent.replaceSubsItems(unique, uris, updateCache)
 
         # Done. Remove entry. Key should be found, but protect it anyway
         self.networkReplyTable.pop(networkReply, None)
 
+        networkReply.deleteLater()
+
+        self.startPendingRequests()
+
     def configureHttpProxy(self, httpProxy: Union[str, None]) -> bool:
         useProxy = super().configureHttpProxy(httpProxy)
 
@@ -143,8 +170,23 @@ class SubscriptionManager(AppQNetworkAccessManager):
 
         return useProxy
 
-    def updateSubs(self, unique: str, webURL: str):
-        networkReply = self.get(QNetworkRequest(QtCore.QUrl(webURL)))
+    def startRequest(self, unique: str, webURL: str):
+        networkRequest = QNetworkRequest(QtCore.QUrl(webURL))
+        networkRequest.setTransferTimeout(self.REQUEST_TIMEOUT)
+
+        subs = AS_UserSubscription().get(unique, {})
+
+        # Conditional request only makes sense if the items are still there
+        if self.hasSubsItems(unique):
+            if subs.get('etag'):
+                networkRequest.setRawHeader(b'If-None-Match', subs['etag'].encode())
+
+            if subs.get('lastModified'):
+                networkRequest.setRawHeader(
+                    b'If-Modified-Since', subs['lastModified'].encode()
+                )
+
+        networkReply = self.get(networkRequest)
 
         self.networkReplyTable[networkReply] = {
             'unique': unique,
@@ -158,6 +200,26 @@ class SubscriptionManager(AppQNetworkAccessManager):
             )
         )
 
+    def startPendingRequests(self):
+        while (
+            len(self.pendingRequests) > 0
+            and len(self.networkReplyTable) < self.MAX_CONCURRENT_REQUESTS
+        ):
+            self.startRequest(*self.pendingRequests.popleft())
+
+    def updateSubs(self, unique: str, webURL: str):
+        if any(
+            unique == pendingUnique for pendingUnique, _webURL in self.pendingRequests
+        ) or any(
+            unique == value['unique'] for value in self.networkReplyTable.values()
+        ):
+            logger.info(f'update subs {webURL} already in progress')
+
+            return
+
+        self.pendingRequests.append((unique, webURL))
+        self.startPendingRequests()
+
 
 class WorkerSequence(ItemUpdateProtocol):
     def __init__(self, sequence: Sequence, index: int, item: ConfigurationFactory):
@@ -176,158 +238,199 @@ class WorkerSequence(ItemUpdateProtocol):
         super().updateResult()
 
 
-class TestPingLatencyWorker(WorkerSequence, QtCore.QObject, QtCore.QRunnable):
-    finished = QtCore.Signal(int, object)
+class ProxiedTestWorkerMeta(type(QtCore.QObject), ABCMeta):
+    pass
+
+
+class ProxiedTestWorker(
+    WorkerSequence, QtCore.QObject, metaclass=ProxiedTestWorkerMeta
+):
+    """
+    Tests a server through a local core instance listening on its own port.
+    Subclasses implement startTest and write extras ResultKey
+    """
+
+    # Extras key of the result
+    ResultKey = ''
+    # Extras key of the detailed statistics of the result
+    StatsKey = ''
+
+    # Maximum time for the core to start up, in milliseconds
+    CORE_WARM_UP_TIME = 2500
+
+    progressed = QtCore.Signal(int, object)
+    finished = QtCore.Signal(object)
+    # Emitted with the worker and its shared core, which did not come up.
+    # Receivers give the worker a port of its own
+    batchFailed = QtCore.Signal(object, object)
 
     def __init__(self, *args, **kwargs):
+        self.port = kwargs.pop('port')
+        self.timeout = kwargs.pop('timeout', 5000)
+        # Shared core serving this server, if any
+        self.batchCore = kwargs.pop('batchCore', None)
+
         super().__init__(*args, **kwargs)
 
         # Explictly called __init__
         QtCore.QObject.__init__(self)
-        QtCore.QRunnable.__init__(self)
 
-    def updateImpl(self):
-        self.finished.emit(self.currentIndex, self.currentItem)
+        self.hasFinished = False
 
-    def run(self):
-        if self.currentItemDeleted():
-            # Deleted. Do nothing
-            return
+        self.coreManager = CoreManager()
 
-        assert isinstance(self.currentItem, ConfigurationFactory)
+        self.networkAccessManager = QNetworkAccessManager()
+        self.networkReply = None
+        self.elapsedTimer = QtCore.QElapsedTimer()
 
-        try:
-            result = icmplib.ping(
-                self.currentItem.itemAddress,
-                count=1,
-                timeout=2,
-                interval=1,
-            )
-        except Exception as ex:
-            # Any non-exit exceptions
+        self.warmUpTimer = QtCore.QTimer()
+        self.warmUpTimer.setSingleShot(True)
+        self.warmUpTimer.timeout.connect(self.checkCoreReady)
+        self.readyProbe = EndpointProbe()
+        self.readyProbe.finished.connect(self.handleReadyProbed)
+        self.warmUpElapsedTimer = QtCore.QElapsedTimer()
+        self.warmUpInterval = CoreProcess.READY_CHECK_INTERVAL
+        self.warmUpTime = self.CORE_WARM_UP_TIME
 
-            def classname(ob) -> str:
-                return ob.__class__.__name__
+        self.timeoutTimer = QtCore.QTimer()
+        self.timeoutTimer.setSingleShot(True)
+        self.timeoutTimer.timeout.connect(self.abort)
 
-            self.currentItem.setExtras('delayResult', classname(ex))
-            self.updateResult()
-        else:
-            # Result address should not be empty
-            if result.address and result.is_alive:
-                self.currentItem.setExtras('delayResult', f'{round(result.avg_rtt)}ms')
-            else:
-                if result.packet_loss == 1:
-                    self.currentItem.setExtras('delayResult', 'Timeout')
-                else:
-                    self.currentItem.setExtras('delayResult', 'Error')
+    def isFinished(self) -> bool:
+        return self.hasFinished
 
-            self.updateResult()
+    def setErrorResult(self, result: str):
+        self.currentItem.setExtras(self.ResultKey, result)
 
+        # Statistics of an earlier run no longer apply
+        if self.StatsKey:
+            self.currentItem.setExtras(self.StatsKey, {})
 
-class TestTcpingLatencyWorker(WorkerSequence, QtCore.QObject, QtCore.QRunnable):
-    finished = QtCore.Signal(int, object)
+    def abort(self):
+        if isinstance(self.networkReply, QNetworkReply):
+            self.networkReply.abort()
+        else:
+            self.setErrorResult('Canceled')
+            self.done()
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def done(self):
+        if self.hasFinished:
+            return
 
-        # Explictly called __init__
-        QtCore.QObject.__init__(self)
-        QtCore.QRunnable.__init__(self)
+        self.hasFinished = True
+
+        self.warmUpTimer.stop()
+        self.readyProbe.abort()
+        self.timeoutTimer.stop()
+        self.coreManager.stopAll()
+        self.updateResult()
+
+        self.finished.emit(self)
 
     def updateImpl(self):
-        self.finished.emit(self.currentIndex, self.currentItem)
+        self.progressed.emit(self.currentIndex, self.currentItem)
 
-    def run(self):
-        if self.currentItemDeleted():
-            # Deleted. Do nothing
+    def isCoreRunning(self) -> bool:
+        if self.batchCore is not None:
+            return self.batchCore.isRunning()
+        else:
+            return self.coreManager.allRunning()
+
+    def waitForCoreReady(self, warmUpTime: int):
+        self.warmUpTime = warmUpTime
+        self.warmUpInterval = CoreProcess.READY_CHECK_INTERVAL
+        self.warmUpElapsedTimer.start()
+        self.warmUpTimer.start(0)
+
+    @QtCore.Slot()
+    def checkCoreReady(self):
+        if self.hasFinished:
             return
 
-        assert isinstance(self.currentItem, ConfigurationFactory)
+        if not self.isCoreRunning():
+            if self.batchCore is not None:
+                # One bad outbound takes the shared core down. Start a
+                # core of its own instead
+                return self.fallBackFromBatch()
 
-        try:
-            sent, rtts = tcping(
-                self.currentItem.itemAddress,
-                int(self.currentItem.itemPort.split(',')[0]),
-                count=1,
-                timeout=2,
-                interval=1,
-            )
-        except Exception as ex:
-            # Any non-exit exceptions
+            # Reports the exit code through the exit callback
+            for core in self.coreManager.coresPool:
+                core.checkIsRunning()
 
-            def classname(ob) -> str:
-                return ob.__class__.__name__
+            if not self.hasFinished:
+                self.setErrorResult('Start failed')
+                self.done()
 
-            self.currentItem.setExtras('delayResult', classname(ex))
-            self.updateResult()
-        else:
-            if rtts:
-                self.currentItem.setExtras('delayResult', f'{round(rtts[0] * 1000)}ms')
-            else:
-                self.currentItem.setExtras('delayResult', 'Timeout')
+            return
 
-            self.updateResult()
+        # Result handled once the connect is done
+        self.readyProbe.probe([('127.0.0.1', self.port)])
 
+    @QtCore.Slot(bool)
+    def handleReadyProbed(self, accepting: bool):
+        if self.hasFinished:
+            return
 
-class TestDownloadSpeedWorker(WorkerSequence, QtCore.QObject):
-    progressed = QtCore.Signal(int, object)
+        if accepting:
+            return self.startTest()
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        if self.warmUpElapsedTimer.elapsed() >= self.warmUpTime:
+            # Still not accepting. Test anyway and let the request fail
+            return self.startTest()
 
-        # Explictly called __init__
-        QtCore.QObject.__init__(self)
+        self.warmUpTimer.start(self.warmUpInterval)
 
-        self.hasSpeedResult = False
-        self.totalBytesRead = 0
+        self.warmUpInterval = min(
+            self.warmUpInterval * 2, CoreProcess.READY_CHECK_MAX_INTERVAL
+        )
 
-        self.coreManager = CoreManager()
+    def fallBackFromBatch(self):
+        batchCore, self.batchCore = self.batchCore, None
 
-        self.networkAccessManager = QNetworkAccessManager()
-        self.networkReply = None
-        self.elapsedTimer = QtCore.QElapsedTimer()
+        self.port = -1
+        self.batchFailed.emit(self, batchCore)
 
-    def isFinished(self) -> bool:
-        if isinstance(self.networkReply, QNetworkReply):
-            return self.networkReply.isFinished()
-        else:
-            return True
+        if self.port < 0:
+            self.setErrorResult('Start failed')
 
-    def abort(self):
-        if isinstance(self.networkReply, QNetworkReply):
-            self.networkReply.abort()
+            return self.done()
 
-    def updateImpl(self):
-        self.progressed.emit(self.currentIndex, self.currentItem)
+        self.run()
 
     def run(self):
         if self.currentItemDeleted():
             # Deleted. Do nothing
-            return
+            return self.done()
 
         assert isinstance(self.currentItem, ConfigurationFactory)
 
         if not self.currentItem.isValid():
-            self.currentItem.setExtras('speedResult', 'Invalid')
+            self.setErrorResult('Invalid')
+
+            return self.done()
+
+        if self.batchCore is not None:
+            self.currentItem.setExtras(self.ResultKey, 'Starting')
             self.updateResult()
 
-            return
+            # Core is shared. Wait at most what is left of its warm-up
+            return self.waitForCoreReady(self.batchCore.remainingWarmUpTime())
 
         def coreExitCallback(config: ConfigurationFactory, exitcode: int):
             if exitcode == CoreProcess.ExitCode.ConfigurationError:
-                self.currentItem.setExtras('speedResult', 'Invalid')
+                self.setErrorResult('Invalid')
 
-                return self.updateResult()
+                return self.done()
             if exitcode == CoreProcess.ExitCode.ServerStartFailure:
-                self.currentItem.setExtras('speedResult', 'Start failed')
+                self.setErrorResult('Start failed')
 
-                return self.updateResult()
+                return self.done()
             if exitcode == CoreProcess.ExitCode.SystemShuttingDown:
                 pass
             else:
-                self.currentItem.setExtras('speedResult', f'Core exited {exitcode}')
+                self.setErrorResult(f'Core exited {exitcode}')
 
-                return self.updateResult()
+                return self.done()
 
         def msgCallback(line: str):
             try:
@@ -337,7 +440,7 @@ class TestDownloadSpeedWorker(WorkerSequence, QtCore.QObject):
 
                 pass
 
-        self.currentItem.setExtras('speedResult', 'Starting')
+        self.currentItem.setExtras(self.ResultKey, 'Starting')
         self.updateResult()
 
         copy = self.currentItem.deepcopy()
@@ -347,7 +450,7 @@ class TestDownloadSpeedWorker(WorkerSequence, QtCore.QObject):
             copy['inbounds'] = [
                 {
                     'tag': 'http',
-                    'port': 20809,
+                    'port': self.port,
                     'listen': '127.0.0.1',
                     'protocol': 'http',
                     'sniffing': {
@@ -369,220 +472,837 @@ class TestDownloadSpeedWorker(WorkerSequence, QtCore.QObject):
                 for outboundObject in copy['outbounds']:
                     if outboundObject['tag'] == 'proxy':
                         # Avoid confusion with potentially existing 'proxy' tag
-                        outboundObject['tag'] = 'proxy20809'
+                        outboundObject['tag'] = f'proxy{self.port}'
             except Exception:
                 # Any non-exit exceptions
 
                 pass
-
-            self.coreManager.start(
-                copy,
-                'Global',
-                coreExitCallback,
-                msgCallback=msgCallback,
-                deepcopy=False,
-                proxyModeOnly=True,
-                log=False,
-            )
         elif isinstance(copy, ConfigurationHysteria1) or isinstance(
             copy, ConfigurationHysteria2
         ):
             # Force redirect
             copy['http'] = {
-                'listen': '127.0.0.1:20809',
+                'listen': f'127.0.0.1:{self.port}',
                 'timeout': 300,
                 'disable_udp': False,
             }
 
             # No socks inbounds
             copy.pop('socks5', '')
+        else:
+            self.setErrorResult('Invalid')
+
+            return self.done()
+
+        # Do not block. Test starts once the core accepts connections
+        success = self.coreManager.start(
+            copy,
+            'Global',
+            coreExitCallback,
+            msgCallback=msgCallback,
+            deepcopy=False,
+            proxyModeOnly=True,
+            log=False,
+            waitCore=False,
+        )
 
-            self.coreManager.start(
-                copy,
-                'Global',
-                coreExitCallback,
-                msgCallback=msgCallback,
-                deepcopy=False,
-                proxyModeOnly=True,
-                log=False,
-            )
+        if success:
+            self.waitForCoreReady(self.CORE_WARM_UP_TIME)
+        elif not self.hasFinished:
+            self.setErrorResult('Start failed')
+            self.done()
+
+    @staticmethod
+    def networkErrorString(networkReply: QNetworkReply) -> str:
+        try:
+            error = networkReply.error().name
+        except Exception:
+            # Any non-exit exceptions
+
+            error = 'Unknown Error'
+
+        if isinstance(error, bytes):
+            # Some old version PySide6 returns it as bytes. Protect it.
+            errorString = error.decode('utf-8', 'replace')
+        elif isinstance(error, str):
+            errorString = error
         else:
-            self.currentItem.setExtras('speedResult', 'Invalid')
-            self.updateResult()
+            errorString = 'Unknown Error'
+
+        if errorString.endswith('Error'):
+            return errorString[:-5]
+        else:
+            return errorString
+
+    @abstractmethod
+    def startTest(self):
+        pass
+
+
+class TestDownloadSpeedWorker(ProxiedTestWorker):
+    """
+    Downloads targetURL through the proxy until byteBudget bytes are read
+    or the duration cap is reached. Throughput of the first warmUp
+    milliseconds is excluded from the steady-state figure
+    """
+
+    ResultKey = 'speedResult'
+    StatsKey = 'speedStats'
+
+    # Window of peak throughput, in milliseconds
+    PEAK_WINDOW = 500
+
+    def __init__(self, *args, **kwargs):
+        self.targetURL = kwargs.pop(
+            'targetURL',
+            'http://speed.cloudflare.com/__down?during=download&bytes=104857600',
+        )
+        self.byteBudget = kwargs.pop('byteBudget', 104857600)
+        self.warmUp = kwargs.pop('warmUp', 1000)
+
+        super().__init__(*args, **kwargs)
+
+        self.hasSpeedResult = False
+        self.totalBytesRead = 0
 
+        # (elapsed, totalBytesRead) within peak window
+        self.window = collections.deque()
+        # (elapsed, totalBytesRead) when warm-up is over
+        self.steadyStart = None
+        self.peakSpeed = 0.0
+
+    @staticmethod
+    def speed(bytesRead: int, elapsed: int) -> float:
+        if elapsed <= 0:
+            return 0.0
+
+        # M/s
+        return bytesRead / (elapsed / 1000) / 1024 / 1024
+
+    @QtCore.Slot()
+    def startTest(self):
+        if self.hasFinished:
             return
 
+        if not self.isCoreRunning():
+            self.setErrorResult('Start failed')
+
+            return self.done()
+
         self.networkAccessManager.setProxy(
-            QNetworkProxy(QNetworkProxy.ProxyType.HttpProxy, '127.0.0.1', 20809)
+            QNetworkProxy(QNetworkProxy.ProxyType.HttpProxy, '127.0.0.1', self.port)
         )
         self.networkReply = self.networkAccessManager.get(
-            QNetworkRequest(
-                QtCore.QUrl(
-                    'http://speed.cloudflare.com/__down?during=download&bytes=104857600'
-                )
-            )
+            QNetworkRequest(QtCore.QUrl(self.targetURL))
         )
         self.networkReply.readyRead.connect(self.handleReadyRead)
         self.networkReply.finished.connect(self.handleFinished)
         self.elapsedTimer.start()
+        self.timeoutTimer.start(self.timeout)
+
+    def readAvailable(self):
+        self.totalBytesRead += self.networkReply.readAll().length()
+
+        elapsed = self.elapsedTimer.elapsed()
+
+        if self.steadyStart is None and elapsed >= self.warmUp:
+            self.steadyStart = elapsed, self.totalBytesRead
+
+        self.window.append((elapsed, self.totalBytesRead))
+
+        while self.window[0][0] < elapsed - self.PEAK_WINDOW:
+            self.window.popleft()
+
+        windowElapsed = elapsed - self.window[0][0]
+
+        if windowElapsed >= self.PEAK_WINDOW // 2:
+            self.peakSpeed = max(
+                self.peakSpeed,
+                self.speed(self.totalBytesRead - self.window[0][1], windowElapsed),
+            )
+
+    def speedStats(self) -> dict:
+        elapsed = self.elapsedTimer.elapsed()
+        average = self.speed(self.totalBytesRead, elapsed)
+
+        if self.steadyStart is not None and elapsed > self.steadyStart[0]:
+            steady = self.speed(
+                self.totalBytesRead - self.steadyStart[1],
+                elapsed - self.steadyStart[0],
+            )
+        else:
+            # Finished within warm-up
+            steady = average
+
+        return {
+            'steady': round(steady, 2),
+            'peak': round(max(self.peakSpeed, steady, average), 2),
+            'average': round(average, 2),
+            'bytes': self.totalBytesRead,
+            'duration': elapsed,
+            'timestamp': int(time.time()),
+        }
+
+    @QtCore.Slot()
+    def handleReadyRead(self):
+        if self.isCoreRunning():
+            self.readAvailable()
+
+            downloadSpeed = self.speed(self.totalBytesRead, self.elapsedTimer.elapsed())
+
+            # Has speed test result
+            self.hasSpeedResult = True
+            self.currentItem.setExtras('speedResult', f'{downloadSpeed:.2f} M/s')
+            self.updateResult()
+
+            if self.totalBytesRead >= self.byteBudget:
+                # Byte budget used up
+                self.networkReply.abort()
+
+    @QtCore.Slot()
+    def handleFinished(self):
+        if self.hasFinished:
+            return
+
+        if self.networkReply.error() != QNetworkReply.NetworkError.NoError:
+            if not self.hasSpeedResult:
+                if not self.isCoreRunning():
+                    # Core ExitCallback has been called
+                    return self.done()
+
+                if (
+                    self.networkReply.error()
+                    == QNetworkReply.NetworkError.OperationCanceledError
+                ):
+                    # Canceled by application
+                    self.setErrorResult('Canceled')
+                else:
+                    self.setErrorResult(self.networkErrorString(self.networkReply))
+
+                return self.done()
+        else:
+            if self.isCoreRunning():
+                self.readAvailable()
+            else:
+                self.setErrorResult('Start failed')
+
+                return self.done()
+
+        stats = self.speedStats()
+
+        self.currentItem.setExtras('speedStats', stats)
+        self.currentItem.setExtras('speedResult', f'{stats["steady"]:.2f} M/s')
+
+        self.done()
+
+
+class TestURLLatencyWorker(ProxiedTestWorker):
+    """
+    Fetches a small endpoint through the proxy. Reports time to first
+    byte and, for https targets, time until the TLS session with the
+    target is up. That session is tunnelled through the proxy, so it
+    includes, but is not, the handshake with the proxy server
+    """
+
+    ResultKey = 'urlTestResult'
+    StatsKey = 'urlTestStats'
+
+    def __init__(self, *args, **kwargs):
+        self.targetURL = kwargs.pop('targetURL')
+
+        super().__init__(*args, **kwargs)
+
+        self.targetTLSTime = None
+        self.firstByteTime = None
+
+    @QtCore.Slot()
+    def startTest(self):
+        if self.hasFinished:
+            return
+
+        if not self.isCoreRunning():
+            self.setErrorResult('Start failed')
+
+            return self.done()
+
+        networkRequest = QNetworkRequest(QtCore.QUrl(self.targetURL))
+        networkRequest.setAttribute(
+            QNetworkRequest.Attribute.CacheLoadControlAttribute,
+            QNetworkRequest.CacheLoadControl.AlwaysNetwork,
+        )
+
+        self.networkAccessManager.setProxy(
+            QNetworkProxy(QNetworkProxy.ProxyType.HttpProxy, '127.0.0.1', self.port)
+        )
+        self.networkReply = self.networkAccessManager.get(networkRequest)
+        self.networkReply.encrypted.connect(self.handleEncrypted)
+        self.networkReply.metaDataChanged.connect(self.handleFirstByte)
+        self.networkReply.readyRead.connect(self.handleFirstByte)
+        self.networkReply.finished.connect(self.handleFinished)
+        self.elapsedTimer.start()
+        self.timeoutTimer.start(self.timeout)
+
+    @QtCore.Slot()
+    def handleEncrypted(self):
+        if self.targetTLSTime is None:
+            self.targetTLSTime = self.elapsedTimer.elapsed()
+
+    @QtCore.Slot()
+    def handleFirstByte(self):
+        if self.firstByteTime is None:
+            self.firstByteTime = self.elapsedTimer.elapsed()
+
+    @QtCore.Slot()
+    def handleFinished(self):
+        if self.hasFinished:
+            return
+
+        statusCode = self.networkReply.attribute(
+            QNetworkRequest.Attribute.HttpStatusCodeAttribute
+        )
+
+        if self.networkReply.error() != QNetworkReply.NetworkError.NoError:
+            if not self.isCoreRunning():
+                # Core ExitCallback has been called
+                return self.done()
+
+            if (
+                self.networkReply.error()
+                == QNetworkReply.NetworkError.OperationCanceledError
+            ):
+                # Canceled by timeout
+                self.setErrorResult('Timeout')
+            else:
+                self.setErrorResult(self.networkErrorString(self.networkReply))
+        elif statusCode is None or not 200 <= int(statusCode) < 400:
+            self.setErrorResult(f'HTTP {statusCode}')
+        else:
+            if self.firstByteTime is None:
+                self.firstByteTime = self.elapsedTimer.elapsed()
+
+            self.currentItem.setExtras(
+                'urlTestStats',
+                {
+                    'ttfb': self.firstByteTime,
+                    'targetTLS': self.targetTLSTime,
+                    'timestamp': int(time.time()),
+                },
+            )
+            self.currentItem.setExtras(self.ResultKey, f'{self.firstByteTime}ms')
+
+        self.done()
+
+
+class ProxiedTestScheduler(QtCore.QObject):
+    """
+    Runs proxied test workers, at most concurrency of them at a time.
+    Xray servers tested together share one core
+    """
+
+    # Local ports held by all schedulers
+    PortsInUse = set()
+
+    def __init__(
+        self,
+        workerType: type[ProxiedTestWorker],
+        column: str,
+        concurrencySettingsName: str,
+        parent,
+    ):
+        super().__init__(parent)
+
+        self.workerType = workerType
+        self.column = column
+        self.concurrencySettingsName = concurrencySettingsName
+
+        # Servers waiting for test. Served by FIFO
+        self.pendingTests = collections.deque()
+        # Running workers and the local ports they hold
+        self.workers = {}
+        # Shared cores of running batches
+        self.batches = []
+
+    def concurrency(self) -> int:
+        try:
+            return max(int(AppSettings.get(self.concurrencySettingsName)), 1)
+        except Exception:
+            # Any non-exit exceptions
+
+            return max(
+                int(AppSettings.SettingsPool[self.concurrencySettingsName].default), 1
+            )
+
+    def flushResult(self, index: int, factory: ConfigurationFactory):
+        parent = self.parent()
+
+        if isinstance(parent, UserServersQTableWidget):
+            index = parent.findItemIndex(factory, index)
+
+            if index >= 0:
+                parent.flushItem(index, parent.Headers.index(self.column), factory)
+
+    def startPendingTests(self):
+        while (
+            len(self.pendingTests) > 0
+            and len(self.workers) < self.concurrency()
+            and not APP().isExiting()
+        ):
+            index, server, batchCore, kwargs = self.pendingTests.popleft()
+
+            try:
+                if batchCore is not None:
+                    port = batchCore.portOf(server)
+                else:
+                    port = getFreeLocalPort(ProxiedTestScheduler.PortsInUse)
+
+                    ProxiedTestScheduler.PortsInUse.add(port)
+            except Exception as ex:
+                # Any non-exit exceptions
+
+                logger.error(f'cannot allocate port for test: {ex}')
+
+                server.setExtras(self.workerType.ResultKey, 'Start failed')
+
+                self.flushResult(index, server)
+
+                continue
+
+            worker = self.workerType(
+                AS_UserServers(),
+                index,
+                server,
+                port=port,
+                batchCore=batchCore,
+                **kwargs,
+            )
+            worker.progressed.connect(self.flushResult)
+            worker.finished.connect(self.handleWorkerFinished)
+            worker.batchFailed.connect(self.handleBatchFailed)
+
+            self.workers[worker] = port
+
+            worker.run()
+
+    def releaseBatch(self, batchCore: XrayBatchTestCore):
+        if batchCore.release():
+            # Last user of the shared core
+            self.batches.remove(batchCore)
+
+            ProxiedTestScheduler.PortsInUse.difference_update(batchCore.allPorts())
+
+    @QtCore.Slot(object, object)
+    def handleBatchFailed(
+        self, worker: ProxiedTestWorker, batchCore: XrayBatchTestCore
+    ):
+        self.releaseBatch(batchCore)
+
+        try:
+            port = getFreeLocalPort(ProxiedTestScheduler.PortsInUse)
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot allocate port for test: {ex}')
+
+            return
+
+        ProxiedTestScheduler.PortsInUse.add(port)
+
+        self.workers[worker] = port
+
+        worker.port = port
+
+    @QtCore.Slot(object)
+    def handleWorkerFinished(self, worker: ProxiedTestWorker):
+        port = self.workers.pop(worker, None)
+
+        if worker.batchCore is not None:
+            self.releaseBatch(worker.batchCore)
+        else:
+            # Release the port
+            ProxiedTestScheduler.PortsInUse.discard(port)
+
+        worker.deleteLater()
+
+        # Streams the next one
+        QtCore.QTimer.singleShot(0, self.startPendingTests)
+
+    def startBatch(self, servers: list[ConfigurationXray]):
+        def msgCallback(line: str):
+            try:
+                APP().logViewerWindowCore.appendLine(line)
+            except Exception:
+                # Any non-exit exceptions
+
+                pass
+
+        try:
+            batchCore = XrayBatchTestCore(servers, ProxiedTestScheduler.PortsInUse)
+        except Exception as ex:
+            # Any non-exit exceptions
+
+            logger.error(f'cannot allocate ports for batch test: {ex}')
+
+            return None
+
+        if batchCore.start(msgCallback=msgCallback):
+            batchCore.users = len(servers)
+
+            self.batches.append(batchCore)
+
+            ProxiedTestScheduler.PortsInUse.update(batchCore.allPorts())
+
+            return batchCore
+        else:
+            # Workers also fall back if it exits while warming up
+            logger.error('batch test core start failed. Test one by one')
+
+            batchCore.stop()
+
+            return None
+
+    def schedule(self, indexes: list[int], **kwargs):
+        # Real selected factory
+        references = list(AS_UserServers()[index] for index in indexes)
+
+        batchable = list(
+            reference for reference in references if isXrayBatchTestable(reference)
+        )
+
+        if len(batchable) > 1:
+            # One Xray-core process serves all of them
+            batchCore = self.startBatch(batchable)
+        else:
+            batchCore = None
+
+        for index, reference in zip(indexes, references):
+            if batchCore is not None and batchCore.portOf(reference) >= 0:
+                self.pendingTests.append((index, reference, batchCore, kwargs))
+            else:
+                self.pendingTests.append((index, reference, None, kwargs))
+
+        self.startPendingTests()
+
+
+class UserServersQTableWidgetHorizontalHeader(AppQHeaderView):
+    def __init__(self, *args, **kwargs):
+        super().__init__(QtCore.Qt.Orientation.Horizontal, *args, **kwargs)
+
+        self.setSortIndicatorShown(True)
+        # Source model order
+        self.setSortIndicator(-1, QtCore.Qt.SortOrder.AscendingOrder)
+
+
+class UserServersQTableWidgetVerticalHeader(AppQHeaderView):
+    def __init__(self, *args, **kwargs):
+        super().__init__(QtCore.Qt.Orientation.Vertical, *args, **kwargs)
+
+
+class UserServersQTableWidgetHeaders:
+    def __init__(self, name: str, func: Callable[[ConfigurationFactory], str] = None):
+        self.name = name
+        self.func = func
+
+    def __call__(self, item: ConfigurationFactory) -> str:
+        if callable(self.func):
+            return self.func(item)
+        else:
+            return getattr(item, f'item{self}')
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __str__(self):
+        return self.name
+
+
+class UserServersQTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model over AS_UserServers(). Display data is produced on demand
+    """
+
+    SortRole = QtCore.Qt.ItemDataRole.UserRole
+
+    def __init__(self, headers: list[UserServersQTableWidgetHeaders], parent=None):
+        super().__init__(parent)
+
+        self.headers = headers
+
+        self.font = QFont(APP().customFontName)
+        self.boldFont = QFont(self.font)
+        self.boldFont.setBold(True)
+
+        self.activatedRow = AS_UserActivatedItemIndex()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        else:
+            return len(AS_UserServers())
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        else:
+            return len(self.headers)
+
+    def sortKey(self, column: int, item: ConfigurationFactory):
+        data = self.headers[column](item)
+
+        if str(self.headers[column]) == 'Latency':
+            stats = item.getExtras('delayStats')
+
+            if isinstance(stats, dict) and stats.get('avg') is not None:
+                # Sort on the record directly
+                return float(stats['avg'])
+
+            if data.endswith('ms'):
+                # Strip value
+                data = data[:-2]
+        elif str(self.headers[column]) == 'URL Test':
+            stats = item.getExtras('urlTestStats')
+
+            if isinstance(stats, dict) and stats.get('ttfb') is not None:
+                return float(stats['ttfb'])
+
+            if data.endswith('ms'):
+                # Strip value
+                data = data[:-2]
+        elif str(self.headers[column]) == 'Speed':
+            stats = item.getExtras('speedStats')
+
+            if isinstance(stats, dict) and stats.get('steady') is not None:
+                return float(stats['steady'])
+
+            if data.endswith(' M/s'):
+                # Strip value
+                data = data[:-4]
+        else:
+            return data
+
+        try:
+            return float(data)
+        except Exception:
+            # Any non-exit exceptions. Failed or untested. After all
+            # results, and in list order among themselves, since the
+            # proxy model sorts stably
+            return math.inf
+
+    def sortedRows(self, column: int, order: QtCore.Qt.SortOrder) -> list[int]:
+        servers = AS_UserServers()
+
+        # Stable, like the proxy model
+        return sorted(
+            range(len(servers)),
+            key=lambda row: self.sortKey(column, servers[row]),
+            reverse=order == QtCore.Qt.SortOrder.DescendingOrder,
+        )
+
+    @staticmethod
+    def latencyToolTip(item: ConfigurationFactory):
+        lines = []
+
+        stats = item.getExtras('delayStats')
+
+        if isinstance(stats, dict) and stats.get('avg') is not None:
+            lines.append(
+                f'min/avg/median/jitter: {stats["min"]}/{stats["avg"]}/'
+                f'{stats["median"]}/{stats["jitter"]} ms'
+            )
+
+        if isinstance(stats, dict) and stats.get('count'):
+            lines.append(_('Packet Loss') + f': {stats.get("loss", 0)}%')
+
+        if item.getExtras('resolveResult'):
+            # Resolution time is reported apart from latency
+            lines.append(_('DNS Resolution') + f': {item.getExtras("resolveResult")}')
+
+        if lines:
+            return '\n'.join(lines)
+        else:
+            return None
+
+    @staticmethod
+    def speedToolTip(item: ConfigurationFactory):
+        stats = item.getExtras('speedStats')
+
+        if not isinstance(stats, dict) or stats.get('steady') is None:
+            return None
+
+        return '\n'.join(
+            [
+                _('Steady') + f': {stats["steady"]:.2f} M/s',
+                _('Peak') + f': {stats["peak"]:.2f} M/s',
+                _('Average') + f': {stats["average"]:.2f} M/s',
+            ]
+        )
+
+    @staticmethod
+    def urlTestToolTip(item: ConfigurationFactory):
+        stats = item.getExtras('urlTestStats')
+
+        if not isinstance(stats, dict) or stats.get('ttfb') is None:
+            return None
 
-    @QtCore.Slot()
-    def handleReadyRead(self):
-        if self.coreManager.allRunning():
-            self.totalBytesRead += self.networkReply.readAll().length()
+        lines = [_('Time To First Byte') + f': {stats["ttfb"]}ms']
 
-            # Convert to seconds
-            elapsedSecond = self.elapsedTimer.elapsed() / 1000
-            downloadSpeed = self.totalBytesRead / elapsedSecond / 1024 / 1024
+        if stats.get('targetTLS') is not None:
+            lines.append(_('Target TLS Ready') + f': {stats["targetTLS"]}ms')
 
-            # Has speed test result
-            self.hasSpeedResult = True
-            self.currentItem.setExtras('speedResult', f'{downloadSpeed:.2f} M/s')
-            self.updateResult()
+        return '\n'.join(lines)
 
-    @QtCore.Slot()
-    def handleFinished(self):
-        if self.networkReply.error() != QNetworkReply.NetworkError.NoError:
-            if not self.hasSpeedResult:
-                if not self.coreManager.allRunning():
-                    # Core ExitCallback has been called
-                    return
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
 
-                if (
-                    self.networkReply.error()
-                    == QNetworkReply.NetworkError.OperationCanceledError
-                ):
-                    # Canceled by application
-                    self.currentItem.setExtras('speedResult', 'Canceled')
-                else:
-                    try:
-                        error = self.networkReply.error().name
-                    except Exception:
-                        # Any non-exit exceptions
-
-                        error = 'Unknown Error'
-
-                    if isinstance(error, bytes):
-                        # Some old version PySide6 returns it as bytes. Protect it.
-                        errorString = error.decode('utf-8', 'replace')
-                    elif isinstance(error, str):
-                        errorString = error
-                    else:
-                        errorString = 'Unknown Error'
-
-                    if errorString.endswith('Error'):
-                        self.currentItem.setExtras('speedResult', errorString[:-5])
-                    else:
-                        self.currentItem.setExtras('speedResult', errorString)
-        else:
-            if self.coreManager.allRunning():
-                self.totalBytesRead += self.networkReply.readAll().length()
+        row, column = index.row(), index.column()
+
+        try:
+            item = AS_UserServers()[row]
+        except IndexError:
+            return None
 
-                # Convert to seconds
-                elapsedSecond = self.elapsedTimer.elapsed() / 1000
-                downloadSpeed = self.totalBytesRead / elapsedSecond / 1024 / 1024
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.headers[column](item)
 
-                self.currentItem.setExtras('speedResult', f'{downloadSpeed:.2f} M/s')
+        if role == self.SortRole:
+            return self.sortKey(column, item)
+
+        if role == QtCore.Qt.ItemDataRole.FontRole:
+            if row == self.activatedRow:
+                return self.boldFont
             else:
-                self.currentItem.setExtras('speedResult', 'Start failed')
+                return self.font
 
-        self.coreManager.stopAll()
-        self.updateResult()
+        if role == QtCore.Qt.ItemDataRole.ForegroundRole:
+            if row == self.activatedRow:
+                return QColor(AppHue.currentColor())
+            else:
+                return None
 
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+            if (
+                str(self.headers[column]) == 'Latency'
+                or str(self.headers[column]) == 'Speed'
+                or str(self.headers[column]) == 'URL Test'
+            ):
+                # Test results. Align right and vcenter
+                return int(
+                    QtCore.Qt.AlignmentFlag.AlignRight
+                    | QtCore.Qt.AlignmentFlag.AlignVCenter
+                )
+            else:
+                return None
+
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            if str(self.headers[column]) == 'Latency':
+                return self.latencyToolTip(item)
+            elif str(self.headers[column]) == 'URL Test':
+                return self.urlTestToolTip(item)
+            elif str(self.headers[column]) == 'Speed':
+                return self.speedToolTip(item)
+            else:
+                return None
 
-class UserServersQTableWidgetHorizontalHeader(AppQHeaderView):
-    class SortOrder:
-        Ascending_ = False
-        Descending = True
+        return None
 
-    @staticmethod
-    def emptyClickGuard():
-        return False
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role=QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if orientation == QtCore.Qt.Orientation.Horizontal:
+                return _(str(self.headers[section]))
+            else:
+                return str(section + 1)
 
-    def __init__(self, *args, **kwargs):
-        self.clickGuardFn = kwargs.pop('clickGuardFn', self.emptyClickGuard)
-        self.customSortFn = kwargs.pop('customSortFn', None)
+        return None
 
-        super().__init__(QtCore.Qt.Orientation.Horizontal, *args, **kwargs)
+    def flags(self, index: QtCore.QModelIndex):
+        # Remark is now editable via GUI window
+        return QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+
+    def flushItem(self, row: int, column: int):
+        index = self.index(row, column)
 
-        self.sortOrderTable = list(
-            self.SortOrder.Ascending_ for i in range(self.columnCount)
+        self.dataChanged.emit(index, index)
+
+    def flushRow(self, row: int):
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.headers) - 1)
         )
 
-        self.sectionClicked.connect(self.handleSectionClicked)
+    def flushAll(self):
+        self.beginResetModel()
+        self.endResetModel()
 
-    def customSort(self, clickedIndex):
-        self.customSortFn(clickedIndex, reverse=self.sortOrderTable[clickedIndex])
-        # Toggle
-        self.sortOrderTable[clickedIndex] = not self.sortOrderTable[clickedIndex]
+    def retranslate(self):
+        self.headerDataChanged.emit(
+            QtCore.Qt.Orientation.Horizontal, 0, len(self.headers) - 1
+        )
 
-    @QtCore.Slot(int)
-    def handleSectionClicked(self, clickedIndex: int):
-        if callable(self.clickGuardFn) and self.clickGuardFn():
-            # Guarded. Do nothing
-            return
+    def setActivatedRow(self, row: int):
+        oldRow, self.activatedRow = self.activatedRow, row
 
-        if self.customSortFn is None:
-            # Sorting not supported
-            return
+        # Also flush when unchanged since hue may be changed
+        for flushRow in set([oldRow, row]):
+            if 0 <= flushRow < self.rowCount():
+                self.flushRow(flushRow)
 
-        parent = self.parent()
+    def appendItem(self, item: ConfigurationFactory):
+        self.appendItems([item])
 
-        if isinstance(parent, AppQTableWidget):
-            # Support item activation
-            activatedIndex = AS_UserActivatedItemIndex()
+    def appendItems(self, items: list[ConfigurationFactory]):
+        if len(items) == 0:
+            return
 
-            if activatedIndex < 0:
-                activatedServerId = None
-            else:
-                activatedServerId = id(AS_UserServers()[activatedIndex])
+        row = self.rowCount()
 
-                # De-activated temporarily for sorting
-                parent.activateItemByIndex(activatedIndex, False)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(items) - 1)
 
-            self.customSort(clickedIndex)
+        AS_UserServers().extend(items)
 
-            if activatedServerId is not None:
-                foundActivatedItem = False
+        self.endInsertRows()
 
-                for index, server in enumerate(AS_UserServers()):
-                    if activatedServerId == id(server):
-                        foundActivatedItem = True
+    def reorderItems(self, rows: list[int]):
+        """
+        Moves the item at rows[i] to row i. Persistent indexes, such as
+        the selection, follow their items
+        """
 
-                        parent.setCurrentItem(parent.item(index, 0))
-                        parent.activateItemByIndex(index, True)
+        self.layoutAboutToBeChanged.emit()
 
-                        break
+        AS_UserServers()[:] = list(AS_UserServers()[row] for row in rows)
 
-                # Object id should be found
-                assert foundActivatedItem
+        newRows = dict((row, newRow) for newRow, row in enumerate(rows))
 
-        else:
-            # Not yet implemented
-            pass
+        for index in self.persistentIndexList():
+            self.changePersistentIndex(
+                index, self.index(newRows[index.row()], index.column())
+            )
 
+        self.layoutChanged.emit()
 
-class UserServersQTableWidgetVerticalHeader(AppQHeaderView):
-    def __init__(self, *args, **kwargs):
-        super().__init__(QtCore.Qt.Orientation.Vertical, *args, **kwargs)
+    def removeItems(self, rows: list[int]):
+        # Remove contiguous ranges from bottom to top
+        ranges = []
 
+        for row in sorted(set(rows)):
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
 
-class UserServersQTableWidgetHeaders:
-    def __init__(self, name: str, func: Callable[[ConfigurationFactory], str] = None):
-        self.name = name
-        self.func = func
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
 
-    def __call__(self, item: ConfigurationFactory) -> str:
-        if callable(self.func):
-            return self.func(item)
-        else:
-            return getattr(item, f'item{self}')
+            for item in AS_UserServers()[first : last + 1]:
+                FastItemDeletionSearch.moveToTrash(item)
 
-    def __eq__(self, other):
-        return str(self) == str(other)
+            del AS_UserServers()[first : last + 1]
 
-    def __str__(self):
-        return self.name
+            self.endRemoveRows()
 
 
 needTrans(
@@ -595,17 +1315,31 @@ needTrans(
     'Subscription',
     'Latency',
     'Speed',
+    'URL Test',
     'Customize JSON Configuration...',
     'Move Up',
     'Move Down',
     'Duplicate',
+    'Combine Into Balancer Group',
+    'Balancer Group',
+    'Unable to combine',
+    'Select at least two Xray-core servers without chained proxies',
     'Delete',
     'Select All',
     'Scroll To Activated Server',
     'Test Ping Latency',
     'Test Tcping Latency',
+    'Stop Latency Test',
+    'Test URL Latency',
+    'Target TLS Ready',
+    'Time To First Byte',
+    'Steady',
+    'Peak',
+    'Average',
     'Test Download Speed',
     'Clear Test Results',
+    'DNS Resolution',
+    'Packet Loss',
     'New Empty Configuration',
     'Export Share Link To Clipboard',
     'Export As QR Code',
@@ -616,7 +1350,7 @@ needTrans(
 )
 
 
-class UserServersQTableWidget(QTranslatable, AppQTableWidget):
+class UserServersQTableWidget(QTranslatable, AppQTableView):
     Headers = [
         UserServersQTableWidgetHeaders('Remark'),
         UserServersQTableWidgetHeaders('Protocol'),
@@ -627,33 +1361,46 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         UserServersQTableWidgetHeaders('Subscription'),
         UserServersQTableWidgetHeaders('Latency'),
         UserServersQTableWidgetHeaders('Speed'),
+        UserServersQTableWidgetHeaders(
+            'URL Test', lambda item: item.getExtras('urlTestResult')
+        ),
     ]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.subsManager = SubscriptionManager(parent=self)
+        self.shareLinkParser = ShareLinkParser(parent=self)
+        self.latencyTester = LatencyTester(parent=self)
 
-        self.testDownloadSpeedQueue = queue.Queue()
-        self.testDownloadSpeedTimer = QtCore.QTimer()
-        self.testDownloadSpeedTimer.timeout.connect(self.handleTestDownloadSpeedJob)
-        self.testDownloadSpeedTimer.start(250)
+        self.downloadSpeedScheduler = ProxiedTestScheduler(
+            TestDownloadSpeedWorker, 'Speed', 'SpeedTestConcurrency', parent=self
+        )
+        self.urlLatencyScheduler = ProxiedTestScheduler(
+            TestURLLatencyWorker, 'URL Test', 'URLTestConcurrency', parent=self
+        )
 
         # Text Editor Window
         self.textEditorWindow = TextEditorWindow(parent=self.parent())
 
-        # Must set before flush all
-        self.setColumnCount(len(self.Headers))
+        # Data is served by model. Sorting and filtering by proxy model
+        self.serverModel = UserServersQTableModel(self.Headers, parent=self)
+
+        self.proxyModel = QtCore.QSortFilterProxyModel(self)
+        self.proxyModel.setSourceModel(self.serverModel)
+        self.proxyModel.setSortRole(UserServersQTableModel.SortRole)
+        self.proxyModel.setFilterKeyColumn(-1)
+        self.proxyModel.setFilterCaseSensitivity(
+            QtCore.Qt.CaseSensitivity.CaseInsensitive
+        )
 
-        # Flush all data to table
-        self.flushAll()
+        # Must set before installing custom header
+        self.setModel(self.proxyModel)
 
         # Install custom header
         self.setHorizontalHeader(
             UserServersQTableWidgetHorizontalHeader(
                 parent=self,
-                clickGuardFn=lambda: False,
-                customSortFn=self.customSortFn,
                 sectionSizeSettingsName='ServerWidgetSectionSizeTable',
             )
         )
@@ -662,12 +1409,17 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         self.horizontalHeader().setCustomSectionResizeMode()
         self.horizontalHeader().restoreSectionSize()
 
-        self.setHorizontalHeaderLabels(list(_(str(header)) for header in self.Headers))
+        self.setSortingEnabled(True)
+
+        # After the proxy model sorted
+        self.horizontalHeader().sortIndicatorChanged.connect(
+            self.handleSortIndicatorChanged
+        )
 
         # Selection
         self.setSelectionColor(AppHue.disconnectedColor())
-        self.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.setSelectionMode(QTableWidget.SelectionMode.ExtendedSelection)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
 
         # No drag and drop
         self.setDragEnabled(False)
@@ -698,6 +1450,10 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
                 _('Duplicate'),
                 callback=lambda: self.duplicateSelectedItem(),
             ),
+            AppQAction(
+                _('Combine Into Balancer Group'),
+                callback=lambda: self.combineSelectedItem(),
+            ),
             AppQAction(
                 _('Delete'),
                 callback=lambda: self.deleteSelectedItem(),
@@ -739,6 +1495,18 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
                     QtCore.Qt.Key.Key_O,
                 ),
             ),
+            AppQAction(
+                _('Stop Latency Test'),
+                callback=lambda: self.stopLatencyTest(),
+            ),
+            AppQAction(
+                _('Test URL Latency'),
+                callback=lambda: self.testSelectedItemURLLatency(),
+                shortcut=QtCore.QKeyCombination(
+                    QtCore.Qt.KeyboardModifier.ControlModifier,
+                    QtCore.Qt.Key.Key_U,
+                ),
+            ),
             AppQAction(
                 _('Test Download Speed'),
                 callback=lambda: self.testSelectedItemDownloadSpeed(),
@@ -813,36 +1581,77 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         self.doubleClickedFlag = False
 
         # Signals
-        self.itemChanged.connect(self.handleItemChanged)
-        self.itemSelectionChanged.connect(self.handleItemSelectionChanged)
-        self.itemActivated.connect(self.handleItemActivated)
-        self.itemDoubleClicked.connect(self.handleItemDoubleClicked)
+        self.selectionModel().selectionChanged.connect(self.handleItemSelectionChanged)
+        self.activated.connect(self.handleItemActivated)
+        self.doubleClicked.connect(self.handleItemDoubleClicked)
+
+        activatedIndex = AS_UserActivatedItemIndex()
+
+        if 0 <= activatedIndex < len(AS_UserServers()):
+            self.setCurrentIndex(self.viewIndex(activatedIndex))
+            self.activateItemByIndex(activatedIndex, True)
+
+    def sourceRow(self, index: QtCore.QModelIndex) -> int:
+        return self.proxyModel.mapToSource(index).row()
+
+    def viewIndex(self, row: int, column: int = 0) -> QtCore.QModelIndex:
+        return self.proxyModel.mapFromSource(self.serverModel.index(row, column))
+
+    def visibleNeighbourRow(self, row: int, offset: int) -> int:
+        """
+        :return: Source row of the item offset rows away from row in the
+                 view, skipping filtered out items. -1 if none
+        """
+
+        index = self.viewIndex(row)
+
+        if not index.isValid():
+            return -1
+
+        viewRow = index.row() + offset
+
+        if 0 <= viewRow < self.proxyModel.rowCount():
+            return self.sourceRow(self.proxyModel.index(viewRow, 0))
+        else:
+            return -1
 
-        if self.activatedItem() is not None:
-            self.setCurrentItem(self.activatedItem())
-            self.activateItemByIndex(AS_UserActivatedItemIndex(), True)
+    def setFilterText(self, text: str):
+        self.proxyModel.setFilterFixedString(text)
 
-    @QtCore.Slot(QTableWidgetItem)
-    def handleItemChanged(self, item: QTableWidgetItem):
-        index = item.row()
+    def resetSortOrder(self):
+        # Back to source model order
+        self.sortByColumn(-1, QtCore.Qt.SortOrder.AscendingOrder)
 
-        if self.item(index, 0) is None:
+    @QtCore.Slot(int, QtCore.Qt.SortOrder)
+    def handleSortIndicatorChanged(self, column: int, order: QtCore.Qt.SortOrder):
+        if column < 0:
+            # Back to source model order. Nothing to store
             return
 
-        itemText = self.item(index, 0).text()
+        rows = self.serverModel.sortedRows(column, order)
 
-        if AS_UserServers()[index].getExtras('remark') != itemText:
-            AS_UserServers()[index].setExtras('remark', itemText)
+        if rows == list(range(len(rows))):
+            # Already in order
+            return
 
-    @QtCore.Slot()
-    def handleItemSelectionChanged(self):
+        activatedIndex = AS_UserActivatedItemIndex()
+
+        # Stored in the sorted order, so that it is kept
+        # once sorting is reset or the app restarts
+        self.serverModel.reorderItems(rows)
+
+        if 0 <= activatedIndex < len(rows):
+            self.activateItemByIndex(rows.index(activatedIndex), True)
+
+    @QtCore.Slot(QtCore.QItemSelection, QtCore.QItemSelection)
+    def handleItemSelectionChanged(self, selected, deselected):
         if len(self.selectedIndex) > 1:
             self.editConfigActionRef.setDisabled(True)
         else:
             self.editConfigActionRef.setDisabled(False)
 
-    @QtCore.Slot(QTableWidgetItem)
-    def handleItemActivated(self, item: QTableWidgetItem):
+    @QtCore.Slot(QtCore.QModelIndex)
+    def handleItemActivated(self, viewIndex: QtCore.QModelIndex):
         if self.doubleClickedFlag:
             # Ignore double-click
             self.doubleClickedFlag = False
@@ -850,7 +1659,11 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
             return
 
         oldIndex = AS_UserActivatedItemIndex()
-        newIndex = item.row()
+        newIndex = self.sourceRow(viewIndex)
+
+        if newIndex < 0:
+            # Invalid index. Do nothing
+            return
 
         if oldIndex == newIndex:
             # Same item activated. Do nothing
@@ -877,8 +1690,7 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         self.activateItemByIndex(newIndex, True)
 
         if APP().isSystemTrayConnected():
-            APP().systemTray.ConnectAction.doDisconnect()
-            APP().systemTray.ConnectAction.trigger()
+            APP().systemTray.ConnectAction.doReload()
 
     @functools.lru_cache(None)
     def getGuiEditorByProtocol(self, protocol, **kwargs):
@@ -913,11 +1725,16 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
 
         return guiEditor
 
-    @QtCore.Slot(QTableWidgetItem)
-    def handleItemDoubleClicked(self, item: QTableWidgetItem):
+    @QtCore.Slot(QtCore.QModelIndex)
+    def handleItemDoubleClicked(self, viewIndex: QtCore.QModelIndex):
         self.doubleClickedFlag = True
 
-        index = item.row()
+        index = self.sourceRow(viewIndex)
+
+        if index < 0:
+            # Invalid index. Do nothing
+            return
+
         factory = AS_UserServers()[index]
 
         guiEditor = self.getGuiEditorByFactory(factory, translatable=False)
@@ -961,11 +1778,14 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
 
         modified = editor.inputToFactory(factory)
 
+        if modified:
+            factory.setModified(True)
+
         # Still flush to row since remark may be modified
         self.flushRow(index, factory)
 
         if modified and index == AS_UserActivatedItemIndex():
-            showNewChangesNextTimeMBox()
+            APP().systemTray.ConnectAction.doReload()
 
         editor.accepted.disconnect()
         editor.rejected.disconnect()
@@ -978,94 +1798,19 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
     def handleCustomContextMenuRequested(self, point):
         self.contextMenu.exec(self.mapToGlobal(point))
 
-    def customSortFn(self, clickedIndex, **kwargs):
-        def keyFn(server):
-            data = self.Headers[clickedIndex](server)
-
-            if clickedIndex == self.Headers.index('Latency'):
-                if data.endswith('ms'):
-                    # Strip value
-                    data = data[:-2]
-
-                try:
-                    return float(data)
-                except Exception:
-                    # Any non-exit exceptions
-
-                    return abs(hash(data)) + 2**20
-
-            if clickedIndex == self.Headers.index('Speed'):
-                if data.endswith(' M/s'):
-                    # Strip value
-                    data = data[:-4]
-
-                try:
-                    return float(data)
-                except Exception:
-                    # Any non-exit exceptions
-
-                    return abs(hash(data)) + 2**20
-
-            return data
-
-        AS_UserServers().sort(key=keyFn, **kwargs)
-
-        self.flushAll()
-
-    def activatedItem(self) -> QTableWidgetItem:
-        return self.item(AS_UserActivatedItemIndex(), 0)
-
     def activateItemByIndex(self, index, activate):
-        super().activateItemByIndex(index, activate)
+        index = int(index)
 
         if activate:
-            AppSettings.set('ActivatedItemIndex', str(index))
-
-    def flushItem(self, row: int, column: int, item: ConfigurationFactory):
-        header = self.Headers[column]
-
-        oldItem = self.item(row, column)
-        newItem = QTableWidgetItem(header(item))
-
-        if oldItem is None:
-            # Item does not exists
-            newItem.setFont(QFont(APP().customFontName))
+            self.serverModel.setActivatedRow(index)
 
-            if str(header) == 'Latency' or str(header) == 'Speed':
-                # Test results. Align right and vcenter
-                newItem.setTextAlignment(
-                    QtCore.Qt.AlignmentFlag.AlignRight
-                    | QtCore.Qt.AlignmentFlag.AlignVCenter
-                )
+            AppSettings.set('ActivatedItemIndex', str(index))
         else:
-            # Use existing
-            newItem.setFont(oldItem.font())
-            newItem.setForeground(oldItem.foreground())
-
-            if oldItem.textAlignment() != 0:
-                newItem.setTextAlignment(oldItem.textAlignment())
-
-        #
-        # Legacy flags. Not used
-        #
-        # if str(header) == 'Remark':
-        #     # Remark is editable
-        #     newItem.setFlags(
-        #         QtCore.Qt.ItemFlag.ItemIsEnabled
-        #         | QtCore.Qt.ItemFlag.ItemIsSelectable
-        #         | QtCore.Qt.ItemFlag.ItemIsEditable
-        #     )
-        # else:
-        #     newItem.setFlags(
-        #         QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
-        #     )
-
-        # Remark is now editable via GUI window
-        newItem.setFlags(
-            QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
-        )
+            if index == self.serverModel.activatedRow:
+                self.serverModel.setActivatedRow(-1)
 
-        self.setItem(row, column, newItem)
+    def flushItem(self, row: int, column: int, item: ConfigurationFactory):
+        self.serverModel.flushItem(row, column)
 
     def addServerViaGui(
         self,
@@ -1122,18 +1867,10 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         editor.rejected.disconnect()
 
     def flushRow(self, row: int, item: ConfigurationFactory):
-        for column in list(range(self.columnCount())):
-            self.flushItem(row, column, item)
+        self.serverModel.flushRow(row)
 
     def flushAll(self):
-        if self.rowCount() == 0:
-            # Should insert row
-            for index, item in enumerate(AS_UserServers()):
-                self.insertRow(index)
-                self.flushRow(index, item)
-        else:
-            for index, item in enumerate(AS_UserServers()):
-                self.flushRow(index, item)
+        self.serverModel.flushAll()
 
     def swapItem(self, index0: int, index1: int):
         def swapSequenceItem(sequence: MutableSequence, param0: int, param1: int):
@@ -1161,12 +1898,21 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
     def newEmptyItem(self):
         self.appendNewItem(remark=_('Untitled'), acceptInvalid=True)
 
-    def moveUpItemByIndex(self, index):
-        if index <= 0 or index >= len(AS_UserServers()):
+    def moveUpItemByIndex(self, index) -> int:
+        """
+        :return: Row the item is at afterwards
+        """
+
+        # Swap with the previous visible item, if filtered
+        target = self.visibleNeighbourRow(index, -1)
+
+        if target < 0:
             # The top item, or does not exist. Do nothing
-            return
+            return index
+
+        self.swapItem(index, target)
 
-        self.swapItem(index, index - 1)
+        return target
 
     def moveUpSelectedItem(self):
         indexes = self.selectedIndex
@@ -1175,20 +1921,30 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
             # Nothing selected. Do nothing
             return
 
-        for index in indexes:
-            self.moveUpItemByIndex(index)
+        self.resetSortOrder()
+
+        moved = list(self.moveUpItemByIndex(index) for index in indexes)
 
         with QBlockSignals(self):
-            self.setCurrentIndex(self.indexFromItem(self.item(indexes[-1] - 1, 0)))
+            self.setCurrentIndex(self.viewIndex(moved[-1]))
 
-        self.selectMultipleRows(list(index - 1 for index in indexes), True)
+        self.selectMultipleRows(moved, True)
 
-    def moveDownItemByIndex(self, index):
-        if index < 0 or index >= len(AS_UserServers()) - 1:
+    def moveDownItemByIndex(self, index) -> int:
+        """
+        :return: Row the item is at afterwards
+        """
+
+        # Swap with the next visible item, if filtered
+        target = self.visibleNeighbourRow(index, 1)
+
+        if target < 0:
             # The bottom item, or does not exist. Do nothing
-            return
+            return index
+
+        self.swapItem(index, target)
 
-        self.swapItem(index, index + 1)
+        return target
 
     def moveDownSelectedItem(self):
         indexes = self.selectedIndex
@@ -1197,13 +1953,14 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
             # Nothing selected. Do nothing
             return
 
-        for index in indexes[::-1]:
-            self.moveDownItemByIndex(index)
+        self.resetSortOrder()
+
+        moved = list(self.moveDownItemByIndex(index) for index in indexes[::-1])
 
         with QBlockSignals(self):
-            self.setCurrentIndex(self.indexFromItem(self.item(indexes[0] + 1, 0)))
+            self.setCurrentIndex(self.viewIndex(moved[-1]))
 
-        self.selectMultipleRows(list(index + 1 for index in indexes), True)
+        self.selectMultipleRows(moved, True)
 
     def duplicateSelectedItem(self):
         indexes = self.selectedIndex
@@ -1220,34 +1977,60 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
                     config=AS_UserServers()[index],
                 )
 
+    def combineSelectedItem(self):
+        factories = list(
+            AS_UserServers()[index]
+            for index in self.selectedIndex
+            if 0 <= index < len(AS_UserServers())
+            and isXrayBalancerMember(AS_UserServers()[index])
+        )
+
+        if len(factories) < 2:
+            mbox = AppQMessageBox(icon=AppQMessageBox.Icon.Critical)
+            mbox.setWindowTitle(_('Unable to combine'))
+            mbox.setText(
+                _('Select at least two Xray-core servers without chained proxies')
+            )
+
+            # Show the MessageBox asynchronously
+            mbox.open()
+
+            return
+
+        self.appendNewItemByFactory(
+            constructXrayBalancerConfig(
+                factories,
+                AppSettings.get('URLTestTarget'),
+                remark=_('Balancer Group') + f' ({len(factories)})',
+                subsId='',
+            )
+        )
+
     def deleteItemByIndex(self, indexes, showTrayMessage=True) -> int:
         if len(indexes) == 0:
             # Nothing selected. Do nothing
             return 0
 
-        if AS_UserActivatedItemIndex() in indexes:
+        activatedIndex = AS_UserActivatedItemIndex()
+
+        if activatedIndex in indexes:
             deleteActivated = True
         else:
             deleteActivated = False
 
-        for i in range(len(indexes)):
-            deleteIndex = indexes[i] - i
+        self.serverModel.removeItems(indexes)
 
-            with QBlockSignals(self):
-                self.removeRow(deleteIndex)
-
-            FastItemDeletionSearch.moveToTrash(AS_UserServers()[deleteIndex])
-
-            AS_UserServers().pop(deleteIndex)
+        if not deleteActivated:
+            deletedBefore = len(
+                list(index for index in set(indexes) if index < activatedIndex)
+            )
 
-            if not deleteActivated and deleteIndex < AS_UserActivatedItemIndex():
-                AppSettings.set(
-                    'ActivatedItemIndex', str(AS_UserActivatedItemIndex() - 1)
-                )
+            if deletedBefore > 0:
+                self.activateItemByIndex(activatedIndex - deletedBefore, True)
 
         if deleteActivated:
             # Set invalid first
-            AppSettings.set('ActivatedItemIndex', str(-1))
+            self.activateItemByIndex(-1, True)
 
             if APP().isSystemTrayConnected():
                 if showTrayMessage:
@@ -1283,7 +2066,9 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
             mbox.setWindowModality(QtCore.Qt.WindowModality.WindowModal)
 
         mbox.isMulti = bool(len(indexes) > 1)
-        mbox.possibleRemark = f'{indexes[0] + 1} - {self.item(indexes[0], 0).text()}'
+        mbox.possibleRemark = (
+            f'{indexes[0] + 1} - {AS_UserServers()[indexes[0]].itemRemark}'
+        )
         mbox.setText(mbox.customText())
         mbox.finished.connect(functools.partial(handleResultCode, indexes))
 
@@ -1314,91 +2099,96 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         self.textEditorWindow.show()
 
     def scrollToActivatedItem(self):
-        activatedItem = self.activatedItem()
-
-        self.setCurrentItem(activatedItem)
-        self.scrollToItem(activatedItem)
+        activatedIndex = AS_UserActivatedItemIndex()
 
-    def testSelectedItemPingLatency(self):
-        indexes = self.selectedIndex
+        if 0 <= activatedIndex < len(AS_UserServers()):
+            self.setCurrentIndex(self.viewIndex(activatedIndex))
+            self.scrollTo(self.viewIndex(activatedIndex))
 
-        if len(indexes) == 0:
-            # Nothing selected. Do nothing
-            return
+    @staticmethod
+    def getIntSettings(key: str) -> int:
+        try:
+            return int(AppSettings.get(key))
+        except Exception:
+            # Any non-exit exceptions
 
-        # Real selected factory
-        references = list(AS_UserServers()[index] for index in indexes)
+            return int(AppSettings.SettingsPool[key].default)
 
-        for index, reference in zip(indexes, references):
-            worker = TestPingLatencyWorker(AS_UserServers(), index, reference)
+    @staticmethod
+    def findItemIndex(factory: ConfigurationFactory, hint: int = -1) -> int:
+        if 0 <= hint < len(AS_UserServers()) and AS_UserServers()[hint] is factory:
+            return hint
 
-            worker.setAutoDelete(True)
-            worker.finished.connect(
-                lambda paramIndex, paramFactory: self.flushItem(
-                    paramIndex, self.Headers.index('Latency'), paramFactory
-                )
-            )
+        # Linear find
+        for index, server in enumerate(AS_UserServers()):
+            if server is factory:
+                return index
 
-            APP().threadPool.start(worker)
+        return -1
 
-    def testSelectedItemTcpingLatency(self):
+    def testSelectedItemLatency(self, method: str):
         indexes = self.selectedIndex
 
         if len(indexes) == 0:
             # Nothing selected. Do nothing
             return
 
-        # Real selected factory
-        references = list(AS_UserServers()[index] for index in indexes)
+        targets = []
 
-        for index, reference in zip(indexes, references):
-            worker = TestTcpingLatencyWorker(AS_UserServers(), index, reference)
+        for index in indexes:
+            # Real selected factory
+            factory = AS_UserServers()[index]
 
-            worker.setAutoDelete(True)
-            worker.finished.connect(
-                lambda paramIndex, paramFactory: self.flushItem(
-                    paramIndex, self.Headers.index('Latency'), paramFactory
-                )
-            )
+            try:
+                port = int(factory.itemPort.split(',')[0])
+            except Exception:
+                # Any non-exit exceptions
 
-            APP().threadPool.start(worker)
+                port = 0
 
-    @QtCore.Slot()
-    def handleTestDownloadSpeedJob(self):
-        try:
-            index, server = self.testDownloadSpeedQueue.get_nowait()
-        except queue.Empty:
-            # Queue is empty
+            targets.append(((index, factory), factory.itemAddress, port))
 
-            return
+        def progressCallback(results):
+            for (index, factory), stats, resolveTime in results:
+                if FastItemDeletionSearch.isInTrash(factory):
+                    # Deleted. Do nothing
+                    continue
 
-        def testDownloadSpeed(counter=0, timeout=5000, step=100):
-            worker = TestDownloadSpeedWorker(AS_UserServers(), index, server)
-            worker.progressed.connect(
-                lambda paramIndex, paramFactory: self.flushItem(
-                    paramIndex, self.Headers.index('Speed'), paramFactory
-                )
-            )
-            worker.run()
+                factory.setExtras('delayStats', stats)
+                factory.setExtras('delayResult', latencyStatsRepr(stats))
 
-            while (
-                not APP().isExiting() and not worker.isFinished() and counter < timeout
-            ):
-                PySide6LegacyEventLoopWait(step)
+                if resolveTime >= 0:
+                    factory.setExtras('resolveResult', f'{round(resolveTime * 1000)}ms')
+                else:
+                    factory.setExtras('resolveResult', '')
+
+                index = self.findItemIndex(factory, index)
 
-                counter += step
+                if index >= 0:
+                    self.flushItem(index, self.Headers.index('Latency'), factory)
 
-            if not worker.isFinished():
-                worker.abort()
+        def finishedCallback():
+            # Persist the results with the servers right away
+            APP().userServers.sync()
 
-                while not worker.isFinished():
-                    PySide6LegacyEventLoopWait(step)
+        self.latencyTester.test(
+            method,
+            targets,
+            progressCallback,
+            finishedCallback,
+            concurrency=self.getIntSettings('LatencyTestConcurrency'),
+            samples=self.getIntSettings('LatencyTestSamples'),
+            deadline=self.getIntSettings('LatencyTestDeadline'),
+        )
+
+    def testSelectedItemPingLatency(self):
+        self.testSelectedItemLatency('ping')
 
-            if APP().isExiting():
-                # Stop timer
-                self.testDownloadSpeedTimer.stop()
+    def testSelectedItemTcpingLatency(self):
+        self.testSelectedItemLatency('tcping')
 
-        testDownloadSpeed()
+    def stopLatencyTest(self):
+        self.latencyTester.cancelAll()
 
     def testSelectedItemDownloadSpeed(self):
         indexes = self.selectedIndex
@@ -1407,17 +2197,38 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
             # Nothing selected. Do nothing
             return
 
-        # Real selected factory
-        references = list(AS_UserServers()[index] for index in indexes)
+        self.downloadSpeedScheduler.schedule(
+            indexes,
+            targetURL=AppSettings.get('SpeedTestTarget'),
+            byteBudget=self.getIntSettings('SpeedTestByteBudget'),
+            # Convert to milliseconds
+            timeout=self.getIntSettings('SpeedTestDuration') * 1000,
+            warmUp=self.getIntSettings('SpeedTestWarmUp') * 1000,
+        )
 
-        for index, reference in zip(indexes, references):
-            try:
-                # Served by FIFO
-                self.testDownloadSpeedQueue.put_nowait((index, reference))
-            except Exception:
-                # Any non-exit exceptions
+    def testSelectedItemURLLatency(self):
+        indexes = self.selectedIndex
 
-                pass
+        if len(indexes) == 0:
+            # Nothing selected. Do nothing
+            return
+
+        self.urlLatencyScheduler.schedule(
+            indexes, targetURL=AppSettings.get('URLTestTarget')
+        )
+
+    def localPortsInUse(self) -> set:
+        """
+        :return: Local ports handed out to test cores. They may not be bound yet
+        """
+
+        ports = set(ProxiedTestScheduler.PortsInUse)
+
+        for scheduler in [self.downloadSpeedScheduler, self.urlLatencyScheduler]:
+            for batchCore in scheduler.batches:
+                ports.update(batchCore.allPorts())
+
+        return ports
 
     def clearSelectedItemTestResult(self):
         indexes = self.selectedIndex
@@ -1429,10 +2240,16 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         for index in indexes:
             factory = AS_UserServers()[index]
             factory.setExtras('delayResult', '')
+            factory.setExtras('delayStats', {})
+            factory.setExtras('resolveResult', '')
             factory.setExtras('speedResult', '')
+            factory.setExtras('speedStats', {})
+            factory.setExtras('urlTestResult', '')
+            factory.setExtras('urlTestStats', {})
 
             self.flushItem(index, self.Headers.index('Latency'), factory)
             self.flushItem(index, self.Headers.index('Speed'), factory)
+            self.flushItem(index, self.Headers.index('URL Test'), factory)
 
     def updateSubs(self, httpProxy: Union[str, None]):
         self.subsManager.configureHttpProxy(httpProxy)
@@ -1441,22 +2258,117 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
             self.subsManager.updateSubs(key, value.get('webURL', ''))
 
     def appendNewItemByFactory(self, factory: ConfigurationFactory):
-        AS_UserServers().append(factory)
+        self.appendNewItemsByFactory([factory])
 
-        row = self.rowCount()
+    def appendNewItemsByFactory(self, factories: list[ConfigurationFactory]):
+        isEmpty = len(AS_UserServers()) == 0
 
-        self.insertRow(row)
-        self.flushRow(row, factory)
+        self.serverModel.appendItems(factories)
 
-        if len(AS_UserServers()) == 1:
+        if isEmpty and len(AS_UserServers()) > 0:
             # The first one. Click it
-            self.setCurrentItem(self.item(0, 0))
+            self.setCurrentIndex(self.viewIndex(0))
 
             # Try to be user-friendly in some extreme cases
             if not APP().isSystemTrayConnected():
                 # Activate automatically
                 self.activateItemByIndex(0, True)
 
+    def replaceSubsItems(self, unique: str, uris: list[str], mergedCallback=None):
+        """
+        Merge share links uris into the items of subscription unique.
+        Servers are matched by identity: unchanged ones keep their object,
+        extras and row. Links are parsed off the GUI thread. mergedCallback,
+        if any, is called once the merge is done
+        """
+
+        # identity: existing factories not matched yet
+        unmatched = {}
+
+        for server in AS_UserServers():
+            if server.getExtras('subsId') == unique:
+                unmatched.setdefault(server.identity(), collections.deque()).append(
+                    server
+                )
+
+        try:
+            activated = AS_UserServers()[AS_UserActivatedItemIndex()]
+        except Exception:
+            # Any non-exit exceptions
+
+            activated = None
+
+        context = {'activatedChanged': False}
+
+        def progressCallback(factories: list[ConfigurationFactory]):
+            newFactories = []
+
+            for factory in factories:
+                candidates = unmatched.get(factory.identity())
+
+                if not candidates:
+                    newFactories.append(factory)
+
+                    continue
+
+                server = candidates.popleft()
+
+                configChanged = not server.sameConfig(factory)
+                remarkChanged = server.itemRemark != factory.itemRemark
+
+                if configChanged:
+                    server.replaceConfig(factory)
+
+                    if server is activated:
+                        context['activatedChanged'] = True
+
+                if remarkChanged:
+                    server.setExtras('remark', factory.itemRemark)
+
+                if configChanged or remarkChanged:
+                    index = self.findItemIndex(server)
+
+                    if index >= 0:
+                        self.flushRow(index, server)
+
+            if newFactories:
+                self.appendNewItemsByFactory(newFactories)
+
+        def finishedCallback(diagnostics: list[ShareLinkDiagnostic]):
+            for diagnostic in diagnostics:
+                logger.error(f'invalid item in subscription {unique}. {diagnostic}')
+
+            staleIds = set(
+                id(server) for candidates in unmatched.values() for server in candidates
+            )
+
+            if staleIds:
+                self.deleteItemByIndex(
+                    list(
+                        index
+                        for index, server in enumerate(AS_UserServers())
+                        if id(server) in staleIds
+                    )
+                )
+
+            if (
+                context['activatedChanged']
+                and id(activated) not in staleIds
+                and APP().isSystemTrayConnected()
+            ):
+                # Config of the active node changed. Reload
+                APP().systemTray.ConnectAction.doReload()
+
+            # Persist only the changed records right away
+            APP().userServers.sync()
+
+            if callable(mergedCallback):
+                mergedCallback()
+
+        self.shareLinkParser.parse(
+            uris, progressCallback, finishedCallback, remark='', subsId=unique
+        )
+
     def appendNewItem(self, **kwargs):
         acceptInvalid = kwargs.pop('acceptInvalid', False)
 
@@ -1536,7 +2448,7 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         elif event.key() == QtCore.Qt.Key.Key_Return:
             if PLATFORM == 'Darwin':
                 # Activate by Enter key on macOS
-                self.itemActivated.emit(self.currentItem())
+                self.activated.emit(self.currentIndex())
             else:
                 super().keyPressEvent(event)
         else:
@@ -1553,4 +2465,4 @@ class UserServersQTableWidget(QTranslatable, AppQTableWidget):
         self.activateItemByIndex(AS_UserActivatedItemIndex(), True)
 
     def retranslate(self):
-        self.setHorizontalHeaderLabels(list(_(str(header)) for header in self.Headers))
+        self.serverModel.retranslate()
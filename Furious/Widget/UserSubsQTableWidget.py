@@ -136,6 +136,10 @@ class UserSubsQTableWidget(QTranslatable, AppQTableWidget):
 
         AS_UserSubscription()[unique][keyMap[item.column()]] = item.text()
 
+        if keyMap[item.column()] == 'webURL':
+            # Cached validators belong to the old URL
+            APP().userSubs.clearCache(unique)
+
     @QtCore.Slot(QtCore.QPoint)
     def handleCustomContextMenuRequested(self, point):
         self.contextMenu.exec(self.mapToGlobal(point))
@@ -25,6 +25,7 @@ from Furious.Utility import *
 from Furious.Widget.UserServersQTableWidget import *
 from Furious.Window.UserSubsWindow import *
 from Furious.Window.LogViewerWindow import *
+from Furious.Window.ConnectionsWindow import *
 from Furious.Window.XrayAssetViewerWindow import *
 
 from PySide6 import QtCore
@@ -49,6 +50,10 @@ needTrans = functools.partial(needTransFn, source=__name__)
 def connectedHttpProxyEndpoint() -> Union[str, None]:
     try:
         if APP().isSystemTrayConnected():
+            if APP().systemTray.ConnectAction.httpProxyEndpoint:
+                # May be served by a standby core after failover
+                return APP().systemTray.ConnectAction.httpProxyEndpoint
+
             index = AS_UserActivatedItemIndex()
 
             if index >= 0:
@@ -92,12 +97,16 @@ class AppNetworkStateManager(NetworkStateManager):
         if isinstance(parent, AppMainWindow):
             parent.setNetworkState(True)
 
+        APP().systemTray.ConnectAction.reportConnectivity(True)
+
     def errorCallback(self, errorString: str):
         parent = self.parent()
 
         if isinstance(parent, AppMainWindow):
             parent.setNetworkState(False, errorString=errorString)
 
+        APP().systemTray.ConnectAction.reportConnectivity(False)
+
     def startSingleTest(self):
         if not APP().isSystemTrayConnected():
             parent = self.parent()
@@ -130,6 +139,7 @@ class AppNetworkStateManager(NetworkStateManager):
 
 needTrans(
     'Server',
+    'Filter',
     'Add VMess Server...',
     'Add VLESS Server...',
     'Add Shadowsocks Server...',
@@ -145,6 +155,7 @@ needTrans(
     'Show Furious Log',
     'Show Core Log',
     'Show Tun2socks Log',
+    'Show Connections',
     'Tools',
     'Manage Xray-core Asset File...',
     'Check For Updates',
@@ -174,10 +185,20 @@ class AppMainWindow(AppQMainWindow):
             ),
         )
         self.xrayAssetViewerWindow = XrayAssetViewerWindow()
+        self.connectionsWindow = ConnectionsWindow()
 
         self.mainTab = AppQTabWidget()
         self.mainTab.addTab(self.userServersQTableWidget, _('Server'))
 
+        self.serverFilter = AppQLineEdit()
+        self.serverFilter.setPlaceholderText(_('Filter'))
+        self.serverFilter.setClearButtonEnabled(True)
+        self.serverFilter.textChanged.connect(
+            self.userServersQTableWidget.setFilterText
+        )
+
+        self.mainTab.setCornerWidget(self.serverFilter, QtCore.Qt.Corner.TopRightCorner)
+
         logActions = [
             AppQAction(
                 _('Show Furious Log'),
@@ -206,6 +227,16 @@ class AppMainWindow(AppQMainWindow):
                     QtCore.Qt.Key.Key_T,
                 ),
             ),
+            AppQSeperator(),
+            AppQAction(
+                _('Show Connections'),
+                callback=lambda: self.connectionsWindow.show(),
+                shortcut=QtCore.QKeyCombination(
+                    QtCore.Qt.KeyboardModifier.ControlModifier
+                    | QtCore.Qt.KeyboardModifier.ShiftModifier,
+                    QtCore.Qt.Key.Key_N,
+                ),
+            ),
         ]
 
         serverActions = [
@@ -405,6 +436,9 @@ class AppMainWindow(AppQMainWindow):
     def appendNewItemByFactory(self, factory: ConfigurationFactory):
         self.userServersQTableWidget.appendNewItemByFactory(factory)
 
+    def appendNewItemsByFactory(self, factories: list[ConfigurationFactory]):
+        self.userServersQTableWidget.appendNewItemsByFactory(factories)
+
     def flushRow(self, row: int, item: ConfigurationFactory):
         self.userServersQTableWidget.flushRow(row, item)
 
@@ -0,0 +1,197 @@
+# Copyright (C) 2024  Loren Eteval <loren.eteval@proton.me>
+#
+# This file is part of Furious.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from Furious.QtFramework import *
+from Furious.QtFramework import gettext as _
+from Furious.Library import *
+from Furious.Utility import *
+
+from PySide6 import QtCore
+from PySide6.QtWidgets import *
+
+import logging
+import functools
+
+__all__ = ['ConnectionsWindow']
+
+logger = logging.getLogger(__name__)
+
+needTrans = functools.partial(needTransFn, source=__name__)
+
+needTrans(
+    'Connections',
+    'Destination',
+    'Per Minute',
+    'Routing',
+    'Total',
+    'Clear',
+    'Exit',
+    'File',
+    'Sort By Rate',
+    'View',
+)
+
+
+class ConnectionsWindow(AppQMainWindow):
+    """
+    Top destinations and routing decisions, aggregated from the
+    access log of the running core
+    """
+
+    # Number of destinations shown
+    TOP_N = 100
+    # Interval between two view updates, in milliseconds
+    REFRESH_INTERVAL = 1000
+
+    Headers = [
+        'Destination',
+        'Connections',
+        'Per Minute',
+        'Routing',
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.setWindowTitle(_('Connections'))
+
+        self.stats = AccessLogStats()
+
+        self.tableWidget = AppQTableWidget()
+        self.tableWidget.setColumnCount(len(self.Headers))
+        self.tableWidget.setHorizontalHeaderLabels(
+            list(_(header) for header in self.Headers)
+        )
+        self.tableWidget.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tableWidget.setSelectionBehavior(
+            QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.tableWidget.verticalHeader().setVisible(False)
+        self.tableWidget.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch
+        )
+
+        self.setCentralWidget(self.tableWidget)
+
+        self.summaryLabel = QLabel()
+        self.statusBar().addWidget(self.summaryLabel)
+
+        self.refreshTimer = QtCore.QTimer()
+        self.refreshTimer.timeout.connect(self.refresh)
+
+        self.sortByRateAction = AppQAction(
+            _('Sort By Rate'),
+            checkable=True,
+            checked=False,
+            callback=lambda: self.refresh(),
+        )
+
+        self.fileMenu = AppQMenu(
+            AppQAction(
+                _('Clear'),
+                callback=lambda: self.clear(),
+            ),
+            AppQSeperator(),
+            AppQAction(
+                _('Exit'),
+                callback=lambda: self.hide(),
+            ),
+            title=_('File'),
+            parent=self.menuBar(),
+        )
+
+        self.viewMenu = AppQMenu(
+            self.sortByRateAction,
+            title=_('View'),
+            parent=self.menuBar(),
+        )
+
+        self.menuBar().addMenu(self.fileMenu)
+        self.menuBar().addMenu(self.viewMenu)
+
+    def setWidthAndHeight(self):
+        self.setGeometry(100, 100, 720, 720 / GOLDEN_RATIO)
+
+    def feed(self, text: str):
+        try:
+            self.stats.feed(text)
+        except Exception:
+            # Any non-exit exceptions
+
+            pass
+
+    def clear(self):
+        self.stats.clear()
+
+        self.refresh()
+
+    @QtCore.Slot()
+    def refresh(self):
+        rows = self.stats.top(self.TOP_N, self.sortByRateAction.isChecked())
+
+        self.tableWidget.setRowCount(len(rows))
+
+        for index, row in enumerate(rows):
+            routing = ', '.join(
+                f'{outbound} {count}'
+                for outbound, count in sorted(
+                    row['outbounds'].items(), key=lambda item: item[1], reverse=True
+                )
+            )
+
+            for column, text in enumerate(
+                [row['host'], str(row['count']), f'{row["rate"]:.1f}', routing]
+            ):
+                item = self.tableWidget.item(index, column)
+
+                if item is None:
+                    item = QTableWidgetItem()
+
+                    self.tableWidget.setItem(index, column, item)
+
+                item.setText(text)
+
+        self.summaryLabel.setText(
+            ' | '.join(
+                [f'{_("Total")} {self.stats.total}']
+                + list(
+                    f'{outbound} {count}'
+                    for outbound, count in self.stats.outbounds.most_common()
+                )
+            )
+        )
+
+    def showEvent(self, event):
+        super().showEvent(event)
+
+        self.refresh()
+
+        self.refreshTimer.start(self.REFRESH_INTERVAL)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+
+        self.refreshTimer.stop()
+
+    def retranslate(self):
+        super().retranslate()
+
+        self.tableWidget.setHorizontalHeaderLabels(
+            list(_(header) for header in self.Headers)
+        )
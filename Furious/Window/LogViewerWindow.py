@@ -19,14 +19,25 @@ from __future__ import annotations
 
 from Furious.QtFramework import *
 from Furious.QtFramework import gettext as _
+from Furious.Utility import *
 
 from PySide6 import QtCore
+from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 
+import re
+import logging
 import functools
+import collections
+import logging.handlers
 
 __all__ = ['LogViewerWindow']
 
+logger = logging.getLogger(__name__)
+
+registerAppSettings('LogViewerCapacity', default='20000')
+registerAppSettings('SpillLogsToDisk', isBinary=True)
+
 needTrans = functools.partial(needTransFn, source=__name__)
 
 needTrans('Unable to save log')
@@ -81,6 +92,44 @@ def saveAsFile(content: str):
             mbox.open()
 
 
+class LogLevel:
+    Error = 'Error'
+    Warning = 'Warning'
+    Info = 'Info'
+    Debug = 'Debug'
+
+    # Severity tags as written by Furious and the cores
+    TaggedPattern = re.compile(r'[\[=](error|warning|warn|info|debug)\b', re.IGNORECASE)
+    UpperPattern = re.compile(r'\b(ERROR|WARNING|WARN|INFO|DEBUG)\b')
+
+    # Only the line prefix is searched
+    SEARCH_LENGTH = 128
+
+    @staticmethod
+    def of(line: str) -> str:
+        """
+        :return: Level of the line, or empty string if not found
+        """
+
+        match = LogLevel.TaggedPattern.search(
+            line, 0, LogLevel.SEARCH_LENGTH
+        ) or LogLevel.UpperPattern.search(line, 0, LogLevel.SEARCH_LENGTH)
+
+        if match is None:
+            return ''
+
+        level = match.group(1).lower()
+
+        if level == 'error':
+            return LogLevel.Error
+        if level == 'warning' or level == 'warn':
+            return LogLevel.Warning
+        if level == 'debug':
+            return LogLevel.Debug
+
+        return LogLevel.Info
+
+
 needTrans(
     'Log Viewer',
     'Save As...',
@@ -91,35 +140,138 @@ needTrans(
     'Edit',
     'Zoom In',
     'Zoom Out',
+    'Follow Tail',
+    'Find Next',
+    'Find Previous',
     'View',
+    'Error',
+    'Warning',
+    'Info',
+    'Debug',
+    'Level',
+    'Search',
+    'Filter (Regex)',
+    'Pending',
+    'Consumed',
+    'Dropped',
 )
 
 
 class LogViewerWindow(AppQMainWindow):
+    """
+    Keeps the latest lines in a fixed-capacity ring buffer. The view is
+    only updated while visible, in batches
+    """
+
+    # Interval between two view updates, in milliseconds
+    FLUSH_INTERVAL = 100
+    # Delay before applying an edited filter, in milliseconds
+    FILTER_DELAY = 200
+    # Size of a spilled log file before it is rotated, in bytes
+    SPILL_MAX_BYTES = 10 * 1024 * 1024
+    # Number of rotated spilled log files kept
+    SPILL_BACKUP_COUNT = 3
+
     def __init__(self, *args, **kwargs):
         tabTitle = kwargs.pop('tabTitle', '')
         fontFamily = kwargs.pop('fontFamily', '')
         pointSizeSettingsName = kwargs.pop('pointSizeSettingsName', '')
+        spillName = kwargs.pop('spillName', '')
+        # Returns (pending chunks, lines consumed, lines dropped) of the
+        # log producers. No status bar if not given
+        msgStats = kwargs.pop('msgStats', None)
 
         super().__init__(*args, **kwargs)
 
+        # One window per log. Each of them cleans up
+        self.uniqueCleanup = False
+
+        # File name of the spilled log, without suffix. Empty means no spilling
+        self.spillName = spillName
+        self.msgStats = msgStats
+
         self.setWindowTitle(_('Log Viewer'))
 
-        self.textBrowser = DraculaTextBrowser(
+        try:
+            self.capacity = max(int(AppSettings.get('LogViewerCapacity')), 1)
+        except Exception:
+            # Any non-exit exceptions
+
+            self.capacity = 20000
+
+        # Ring buffer of the latest (level, line). Levels are
+        # indexed once so filters never parse the view again
+        self.lines = collections.deque(maxlen=self.capacity)
+        # Lines not in the view yet
+        self.pending = collections.deque(maxlen=self.capacity)
+        # Indented lines without a level continue the previous one
+        self.lastLevel = LogLevel.Info
+
+        self.levelFilter = {
+            LogLevel.Error,
+            LogLevel.Warning,
+            LogLevel.Info,
+            LogLevel.Debug,
+        }
+        self.regexFilter = None
+        self.followTail = True
+
+        self.spillHandler = None
+
+        if AppSettings.isStateON_('SpillLogsToDisk'):
+            self.setSpillEnabled(True)
+
+        self.textBrowser = DraculaPlainTextBrowser(
             fontFamily=fontFamily,
             pointSizeSettingsName=pointSizeSettingsName,
         )
-        self.textBrowser.setLineWrapMode(DraculaTextBrowser.LineWrapMode.NoWrap)
+        self.textBrowser.setLineWrapMode(DraculaPlainTextBrowser.LineWrapMode.NoWrap)
+        self.textBrowser.setMaximumBlockCount(self.capacity)
+
+        self.flushTimer = QtCore.QTimer()
+        self.flushTimer.timeout.connect(self.flush)
+
+        self.filterTimer = QtCore.QTimer()
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.timeout.connect(self.applyRegexFilter)
+
+        self.searchEdit = AppQLineEdit()
+        self.searchEdit.setPlaceholderText(_('Search'))
+        self.searchEdit.setClearButtonEnabled(True)
+        self.searchEdit.textChanged.connect(lambda: self.find(incremental=True))
+        self.searchEdit.returnPressed.connect(lambda: self.find())
+
+        self.filterEdit = AppQLineEdit()
+        self.filterEdit.setPlaceholderText(_('Filter (Regex)'))
+        self.filterEdit.setClearButtonEnabled(True)
+        self.filterEdit.textChanged.connect(
+            lambda: self.filterTimer.start(self.FILTER_DELAY)
+        )
+
+        self.cornerWidget = QWidget()
+
+        cornerLayout = QHBoxLayout(self.cornerWidget)
+        cornerLayout.setContentsMargins(0, 0, 0, 0)
+        cornerLayout.addWidget(self.searchEdit)
+        cornerLayout.addWidget(self.filterEdit)
 
         self.tabWidget = AppQTabWidget()
         self.tabWidget.addTab(self.textBrowser, tabTitle)
+        self.tabWidget.setCornerWidget(
+            self.cornerWidget, QtCore.Qt.Corner.TopRightCorner
+        )
 
         self.setCentralWidget(self.tabWidget)
 
+        self.msgStatsLabel = QLabel()
+
+        if callable(self.msgStats):
+            self.statusBar().addPermanentWidget(self.msgStatsLabel)
+
         self._fileMenu = AppQMenu(
             AppQAction(
                 _('Save As...'),
-                callback=lambda: saveAsFile(self.textBrowser.toPlainText()),
+                callback=lambda: saveAsFile(self.plainText()),
             ),
             AppQSeperator(),
             AppQAction(
@@ -153,6 +305,13 @@ class LogViewerWindow(AppQMainWindow):
             parent=self,
         )
 
+        self.followTailAction = AppQAction(
+            _('Follow Tail'),
+            checkable=True,
+            checked=True,
+            callback=lambda: self.setFollowTail(self.followTailAction.isChecked()),
+        )
+
         self._viewMenu = AppQMenu(
             AppQAction(
                 _('Zoom In'),
@@ -170,19 +329,235 @@ class LogViewerWindow(AppQMainWindow):
                     QtCore.Qt.Key.Key_Minus,
                 ),
             ),
+            AppQSeperator(),
+            AppQAction(
+                _('Find Next'),
+                callback=lambda: self.find(),
+                shortcut=QtCore.QKeyCombination(QtCore.Qt.Key.Key_F3),
+            ),
+            AppQAction(
+                _('Find Previous'),
+                callback=lambda: self.find(backward=True),
+                shortcut=QtCore.QKeyCombination(
+                    QtCore.Qt.KeyboardModifier.ShiftModifier,
+                    QtCore.Qt.Key.Key_F3,
+                ),
+            ),
+            AppQSeperator(),
+            self.followTailAction,
             title=_('View'),
             parent=self,
         )
 
+        def levelAction(level):
+            return AppQAction(
+                _(level),
+                checkable=True,
+                checked=True,
+                callback=lambda: self.toggleLevelFilter(level),
+            )
+
+        self._levelMenu = AppQMenu(
+            levelAction(LogLevel.Error),
+            levelAction(LogLevel.Warning),
+            levelAction(LogLevel.Info),
+            levelAction(LogLevel.Debug),
+            title=_('Level'),
+            parent=self,
+        )
+
         self.menuBar().addMenu(self._fileMenu)
         self.menuBar().addMenu(self._editMenu)
         self.menuBar().addMenu(self._viewMenu)
+        self.menuBar().addMenu(self._levelMenu)
+
+    def setSpillEnabled(self, enabled: bool):
+        if not self.spillName:
+            return
+
+        if enabled and self.spillHandler is None:
+            try:
+                spillDir = getUserDataDir() / 'Logs'
+                spillDir.mkdir(parents=True, exist_ok=True)
+
+                self.spillHandler = logging.handlers.RotatingFileHandler(
+                    spillDir / f'{self.spillName}.log',
+                    maxBytes=self.SPILL_MAX_BYTES,
+                    backupCount=self.SPILL_BACKUP_COUNT,
+                    encoding='utf-8',
+                    delay=True,
+                )
+            except Exception as ex:
+                # Any non-exit exceptions
+
+                logger.error(f'cannot spill {self.spillName} log to disk: {ex}')
+
+                self.spillHandler = None
+
+        if not enabled and self.spillHandler is not None:
+            self.spillHandler.close()
+            self.spillHandler = None
 
     def plainText(self) -> str:
-        return self.textBrowser.toPlainText()
+        return '\n'.join(line for level, line in self.lines)
 
     def appendLine(self, line: str):
-        self.textBrowser.appendLine(line)
+        # May be several lines. Thread-safe, the view is updated later
+        entries = []
+
+        for text in line.rstrip().splitlines():
+            level = LogLevel.of(text)
+
+            if level:
+                self.lastLevel = level
+            elif text[:1].isspace():
+                level = self.lastLevel
+            else:
+                level = LogLevel.Info
+
+            entries.append((level, text))
+
+        self.lines.extend(entries)
+        self.pending.extend(entries)
+
+        spillHandler = self.spillHandler
+
+        if spillHandler is not None:
+            for level, text in entries:
+                spillHandler.handle(logging.makeLogRecord({'msg': text}))
+
+    def accepts(self, level: str, line: str) -> bool:
+        if level not in self.levelFilter:
+            return False
+
+        return self.regexFilter is None or self.regexFilter.search(line) is not None
+
+    def filtered(self, entries) -> list[str]:
+        return list(line for level, line in entries if self.accepts(level, line))
+
+    @QtCore.Slot()
+    def flush(self):
+        entries = []
+
+        while self.pending:
+            entries.append(self.pending.popleft())
+
+        if len(entries) >= self.capacity:
+            # The whole view is replaced anyway
+            self.render()
+        else:
+            self.textBrowser.appendLines(self.filtered(entries), self.followTail)
+
+        self.updateMsgStats()
+
+    def updateMsgStats(self):
+        if not callable(self.msgStats):
+            return
+
+        try:
+            depth, consumed, dropped = self.msgStats()
+        except Exception:
+            # Any non-exit exceptions
+
+            return
+
+        self.msgStatsLabel.setText(
+            _('Pending')
+            + f': {depth if depth >= 0 else "-"}    '
+            + _('Consumed')
+            + f': {consumed}    '
+            + _('Dropped')
+            + f': {dropped}'
+        )
+
+    def render(self):
+        self.pending.clear()
+
+        self.textBrowser.setPlainText('\n'.join(self.filtered(self.lines)))
+
+        if self.followTail:
+            self.textBrowser.scrollToBottom()
+
+    def toggleLevelFilter(self, level: str):
+        self.levelFilter ^= {level}
+
+        self.render()
+
+    @QtCore.Slot()
+    def applyRegexFilter(self):
+        pattern = self.filterEdit.text()
+
+        if pattern:
+            try:
+                self.regexFilter = re.compile(pattern, re.IGNORECASE)
+            except re.error:
+                # Keep the previous filter while typing
+                return
+        else:
+            self.regexFilter = None
+
+        self.render()
+
+    def setFollowTail(self, followTail: bool):
+        self.followTail = followTail
+
+        if followTail:
+            self.textBrowser.scrollToBottom()
+
+    def find(self, backward=False, incremental=False):
+        text = self.searchEdit.text()
+
+        if not text:
+            return
+
+        if backward:
+            flags = QTextDocument.FindFlag.FindBackward
+        else:
+            flags = QTextDocument.FindFlag(0)
+
+        cursor = self.textBrowser.textCursor()
+
+        if incremental:
+            # Search again from where the current match starts
+            cursor.setPosition(cursor.selectionStart())
+
+            self.textBrowser.setTextCursor(cursor)
+
+        if not self.textBrowser.find(text, flags):
+            # Wrap around
+            if backward:
+                cursor.movePosition(QTextCursor.MoveOperation.End)
+            else:
+                cursor.movePosition(QTextCursor.MoveOperation.Start)
+
+            self.textBrowser.setTextCursor(cursor)
+            self.textBrowser.find(text, flags)
+
+        if self.textBrowser.textCursor().hasSelection():
+            # Stop following so the match stays in view
+            self.followTail = False
+            self.followTailAction.setChecked(False)
 
     def clear(self):
+        self.lines.clear()
+        self.pending.clear()
+
         self.textBrowser.clear()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+
+        # Not updated while hidden
+        self.render()
+
+        self.flushTimer.start(self.FLUSH_INTERVAL)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+
+        self.flushTimer.stop()
+
+    def cleanup(self):
+        self.flushTimer.stop()
+
+        self.setSpillEnabled(False)
@@ -347,7 +347,7 @@ class TextEditorWindow(AppQMainWindow):
                 pass
 
             if index == AS_UserActivatedItemIndex():
-                showNewChangesNextTimeMBox(parent=self)
+                APP().systemTray.ConnectAction.doReload()
 
             self.markAsSaved()
 
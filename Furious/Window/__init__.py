@@ -16,6 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from .AppMainWindow import *
+from .ConnectionsWindow import *
 from .LogViewerWindow import *
 from .QRCodeWindow import *
 from .TextEditorWindow import *